@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares per-point CDR curve decoding (previous parse_curve code)
+with bulk parse_curve_paths() on generated curves.
+Usage: python benchmarks/cdr_curves.py [NODES]
+"""
+
+import os
+import random
+import struct
+import sys
+import time
+from copy import deepcopy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2.formats.cdr.cdr_utils import parse_curve_paths, parse_size_value
+from uc2.sk2const import NODE_CUSP, NODE_SMOOTH, NODE_SYMMETRICAL, \
+    CURVE_CLOSED, CURVE_OPENED
+from uc2.utils import dword2py_int
+
+
+def parse_curve_per_point(data, offset):
+    paths = []
+    path = []
+    points = []
+    point1 = []
+    point2 = []
+    marker = NODE_CUSP
+    pointnum = dword2py_int(data[offset:offset + 4])
+    for i in range(pointnum):
+        x = parse_size_value(data[offset + 4 + i * 8:offset + 8 + i * 8])
+        y = parse_size_value(data[offset + 8 + i * 8:offset + 12 + i * 8])
+
+        point_type = ord(data[offset + 4 + pointnum * 8 + i])
+        if point_type & 0x10 == 0 and point_type & 0x20 == 0:
+            marker = NODE_CUSP
+        if point_type & 0x10 == 0x10:
+            marker = NODE_SMOOTH
+        if point_type & 0x20 == 0x20:
+            marker = NODE_SYMMETRICAL
+
+        if point_type & 0x40 == 0 and point_type & 0x80 == 0:
+            if path:
+                path.append(deepcopy(points))
+                path.append(CURVE_OPENED)
+                paths.append(deepcopy(path))
+            path = []
+            points = []
+            point1 = []
+            point2 = []
+            path.append([x, y])
+        if point_type & 0x40 == 0x40 and point_type & 0x80 == 0:
+            points.append([x, y])
+            point1 = []
+            point2 = []
+        if point_type & 0x40 == 0 and point_type & 0x80 == 0x80:
+            points.append(deepcopy([point1, point2, [x, y], marker]))
+            point1 = []
+            point2 = []
+        if point_type & 0x40 == 0x40 and point_type & 0x80 == 0x80:
+            if point1:
+                point2 = [x, y]
+            else:
+                point1 = [x, y]
+        if point_type & 8 == 8:
+            if path and points:
+                path.append(deepcopy(points))
+                path.append(CURVE_CLOSED)
+                paths.append(deepcopy(path))
+                path = []
+                points = []
+    if path:
+        path.append(deepcopy(points))
+        path.append(CURVE_OPENED)
+        paths.append(deepcopy(path))
+    return pointnum, paths
+
+
+def generate(nodes, subpath=50):
+    """
+    Returns curve points block with subpaths of lines
+    and Bezier segments.
+    """
+    coords = []
+    flags = []
+    while len(flags) < nodes:
+        flags.append(0x00)
+        for index in range(subpath - 1):
+            if index % 2:
+                flags.append(0x40)
+            else:
+                flags += [0xc0, 0xc0, 0x80 | random.choice((0, 0x10, 0x20))]
+        flags[-1] |= 0x08
+    for _i in flags:
+        coords += [random.randint(-10 ** 6, 10 ** 6) for _j in range(2)]
+    return struct.pack('<I', len(flags)) + \
+        struct.pack('<%dl' % len(coords), *coords) + \
+        ''.join(chr(item) for item in flags)
+
+
+def measure(func, *args):
+    start = time.time()
+    result = func(*args)
+    return result, time.time() - start
+
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    data = generate(nodes)
+    old, old_time = measure(parse_curve_per_point, data, 0)
+    new, new_time = measure(parse_curve_paths, data, 0)
+    print 'nodes %d, subpaths %d' % (new[0], len(new[1]))
+    print 'per point %8.3f s' % old_time
+    print 'bulk      %8.3f s  (x%.1f)' % (new_time, old_time / new_time)
+    print 'parity    %s' % (old == new)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares format detection latency of sequential checker calls
+(every checker opens file) and magic-byte sniffing with shared
+header buffer. Corpus files have no extensions, so detection
+goes by file content.
+Usage: python benchmarks/format_detection.py [REPEATS]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2 import uc2const
+from uc2.formats import _get_checker, sniffing
+
+CORPUS = (
+    (uc2const.SK2, '##sK1 2 1\ndocument()\n'),
+    (uc2const.SVG, '<?xml version="1.0"?>\n<!-- %s -->\n'
+                   '<svg xmlns="http://www.w3.org/2000/svg"/>\n' % ('x' * 80)),
+    (uc2const.WMF, '\xd7\xcd\xc6\x9a' + '\x00' * 60),
+    (uc2const.PLT, 'IN;PU0,0;PD100,100;\n'),
+    (uc2const.SK1, '##sK1 1\ndocument()\n'),
+    (uc2const.SK, '##Sketch 1 2\ndocument()\n'),
+    (uc2const.CDR, 'RIFF\x00\x10\x00\x00CDRDvrsn' + '\x00' * 60),
+    (uc2const.FIG, '#FIG 3.2\nLandscape\n'),
+    (uc2const.CGM, '\x00\x2a' + '\x00' * 60),
+    (uc2const.SKP, '##sK1 palette\npalette()\n'),
+    (uc2const.GPL, 'GIMP Palette\nName: test\n'),
+    (uc2const.SCRIBUS_PAL, '<?xml version="1.0"?>\n<SCRIBUSCOLORS Name="t">\n'
+                           '</SCRIBUSCOLORS>\n'),
+    (uc2const.SOC, '<?xml version="1.0"?>\n<office:color-table>\n'
+                   '</office:color-table>\n'),
+    (uc2const.CPL, '\xcd\xdc\x01\x00' + '\x00' * 60),
+    (uc2const.COREL_PAL, '<?xml version="1.0"?>\n<palette name="t">\n'
+                         '</palette>\n'),
+    (uc2const.ASE, 'ASEF\x00\x01\x00\x00\x00\x00\x00\x00'),
+    (uc2const.ACO, '\x00\x01\x00\x00'),
+    (uc2const.JCW, 'JCW\x01\x00\x00'),
+)
+
+
+def generate():
+    path = tempfile.mkdtemp('.corpus')
+    files = []
+    for index, (pid, data) in enumerate(CORPUS):
+        filepath = os.path.join(path, '%s_%d' % (pid, index))
+        with open(filepath, 'wb') as fileptr:
+            fileptr.write(data)
+        files.append((pid, filepath))
+    return path, files
+
+
+def detect_sequential(path, formats):
+    for pid in formats:
+        checker = _get_checker(pid)
+        if checker is not None and checker(path):
+            return pid
+    return None
+
+
+def detect_sniffed(path, formats):
+    header = sniffing.read_header(path)
+    for pid in sniffing.sniff(header, formats):
+        checker = _get_checker(pid)
+        if checker is not None and checker(path, header):
+            return pid
+    return None
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    # Bitmap formats are checked by native image libraries,
+    # so they are out of comparison
+    formats = uc2const.MODEL_LOADERS + uc2const.PALETTE_LOADERS
+    path, files = generate()
+    try:
+        for pid, filepath in files:
+            for detect in (detect_sequential, detect_sniffed):
+                if detect(filepath, formats) != pid:
+                    print '%s: %s detection failed' % (pid, detect.__name__)
+        for name, detect in (('sequential', detect_sequential),
+                             ('sniffed', detect_sniffed)):
+            start = time.time()
+            for _i in range(repeats):
+                for _pid, filepath in files:
+                    detect(filepath, formats)
+            elapsed = time.time() - start
+            print '%-10s %8.1f us/file' % (
+                name, elapsed * 1e6 / (repeats * len(files)))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures image downsampling for export: serial and thread pool
+resampling time per filter and encoded (PNG/Flate) image size at
+source and target resolution. Synthetic scans are placed at 600 dpi.
+Usage: python benchmarks/image_downsampling.py [IMAGES] [TARGET DPI]
+"""
+
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from PIL import Image, ImageFilter
+
+from uc2.libimg.downsampling import FILTERS, get_downsampled_size, \
+    resize_images
+
+SOURCE_DPI = 600
+SIZE = (2400, 1800)
+
+
+def generate(num):
+    images = []
+    for _i in range(num):
+        image = Image.frombytes('RGB', SIZE, os.urandom(SIZE[0] * SIZE[1] * 3))
+        # Noise blurred to scan-like content
+        image = image.filter(ImageFilter.GaussianBlur(random.randint(2, 6)))
+        images.append(image)
+    return images
+
+
+def get_encoded_size(images):
+    return sum(len(zlib.compress(image.tobytes(), 6)) for image in images)
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    dpi = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    images = generate(num)
+    size = get_downsampled_size(SIZE, (SOURCE_DPI, SOURCE_DPI), dpi)
+    jobs = [(image, size) for image in images]
+    print '%d images %dx%d at %d dpi -> %dx%d at %d dpi' % (
+        num, SIZE[0], SIZE[1], SOURCE_DPI, size[0], size[1], dpi)
+    result = None
+    for name in sorted(FILTERS):
+        timing = []
+        for workers in (1, None):
+            start = time.time()
+            result = resize_images(jobs, name, workers)
+            timing.append(time.time() - start)
+        print '%-8s serial %7.3f s  thread pool %7.3f s' % (
+            name, timing[0], timing[1])
+    print 'encoded size %10d -> %10d bytes' % (get_encoded_size(images),
+                                               get_encoded_size(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares PDF output size and save time for native gradient shadings
+and stepped (stripe per device unit) translucent gradients.
+Usage: python benchmarks/pdf_gradients.py file.sk2
+       python benchmarks/pdf_gradients.py --generate=100 (gradient objects)
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2 import app_cms, uc2_init, sk2const, uc2const
+from uc2.formats import get_loader
+from uc2.formats.pdf import pdf_saver
+from uc2.formats.sk2 import sk2_model
+from uc2.formats.sk2.sk2_presenter import SK2_Presenter
+
+
+def get_stop(position, alpha):
+    color = [random.random() for _i in range(3)]
+    return [position, [uc2const.COLOR_RGB, color, alpha, '']]
+
+
+def generate(app, num):
+    """
+    Returns document with rectangles filled by linear and radial
+    gradients; half of gradients have translucent stops.
+    """
+    doc = SK2_Presenter(app.appdata)
+    methods = doc.methods
+    layer = methods.get_layer(methods.get_page())
+    for index in range(num):
+        x = random.uniform(-250.0, 150.0)
+        y = random.uniform(-350.0, 250.0)
+        w = random.uniform(50.0, 300.0)
+        h = random.uniform(50.0, 300.0)
+        alpha = 0.5 if index % 2 else 1.0
+        stops = [get_stop(0.0, 1.0), get_stop(0.5, alpha), get_stop(1.0, 1.0)]
+        grad_type = sk2const.GRADIENT_RADIAL if index % 4 > 1 \
+            else sk2const.GRADIENT_LINEAR
+        gradient = [grad_type, [[x, y], [x + w, y + h]], stops]
+        fill = [sk2const.FILL_EVENODD, sk2const.FILL_GRADIENT, gradient]
+        style = [fill, [], [], []]
+        obj = sk2_model.Rectangle(doc.config, layer, [x, y, w, h],
+                                  style=style)
+        methods.append_object(obj, layer)
+        obj.update()
+    return doc
+
+
+def main():
+    app = uc2_init()
+    app.default_cms = app_cms.AppColorManager(app)
+    path = sys.argv[1]
+    if path.startswith('--generate='):
+        doc = generate(app, int(path.split('=')[1]))
+    else:
+        doc = get_loader(path)(app.appdata, path)
+    tmpdir = tempfile.mkdtemp()
+    for stepped in (False, True):
+        path = os.path.join(tmpdir, 'test%d.pdf' % stepped)
+        start = time.time()
+        pdf_saver(doc, path, cnf={'stepped-gradients': stepped})
+        print '%-8s save %7.3f s  size %10d' % (
+            'stepped' if stepped else 'native', time.time() - start,
+            os.path.getsize(path))
+        os.remove(path)
+    os.rmdir(tmpdir)
+    doc.close()
+
+
+if __name__ == '__main__':
+    main()
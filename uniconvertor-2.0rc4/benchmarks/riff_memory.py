@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures peak memory and time of RIFF/CDR model loading. Every mode
+runs in separate process:
+  lazy  - tree is built over file mmap, chunk bytes are not copied
+  eager - chunk bytes of every object are materialized and kept,
+          as the loader did before lazy chunks
+Usage: python benchmarks/riff_memory.py file.cdr
+       python benchmarks/riff_memory.py --generate=300 (synthetic MB)
+"""
+
+import os
+import resource
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def chunk(identifier, data):
+    result = identifier + struct.pack('<I', len(data)) + data
+    return result + '\0' if len(data) & 1 else result
+
+
+def riff_list(tag, data):
+    return chunk('LIST', tag + data)
+
+
+def generate(path, megabytes):
+    """
+    Writes RIFF file with plain object lists and compressed list.
+    """
+    record = chunk('obj ', os.urandom(4000))
+    group = riff_list('grp ', record * 256)
+    raw = chunk('obj ', 'x' * 999) * 1000
+    blocks = []
+    cmpr_raw = ''
+    for index in range(1000):
+        cmpr_raw += 'obj ' + struct.pack('<I', index) + 'x' * 1000
+        blocks.append(struct.pack('<I', 999))
+    compressed = zlib.compress(cmpr_raw)
+    blocksizes = zlib.compress(''.join(blocks))
+    cmpr_body = struct.pack('<III', len(compressed), len(cmpr_raw),
+                            len(blocksizes)) + '\0' * 12 + compressed + \
+        blocksizes
+    cmpr = riff_list('cmpr', cmpr_body + ('\0' if len(cmpr_body) & 1 else ''))
+    fileptr = open(path, 'wb')
+    fileptr.write('RIFF' + struct.pack('<I', 0) + 'CDRX')
+    count = max(1, megabytes * 1024 * 1024 / len(group))
+    for _i in range(count):
+        fileptr.write(group)
+    fileptr.write(riff_list('doc ', raw) + cmpr)
+    size = fileptr.tell()
+    fileptr.seek(4)
+    fileptr.write(struct.pack('<I', size - 8))
+    fileptr.close()
+
+
+def get_anon_memory():
+    """
+    Returns private anonymous memory in MB (Linux only). Unlike RSS
+    it excludes clean file pages of mmap which kernel can drop.
+    """
+    try:
+        for line in open('/proc/self/status'):
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1]) / 1024.0
+    except IOError:
+        pass
+    return 0.0
+
+
+def measure(path, mode):
+    from uc2.formats.riff.riff_filters import RIFF_Loader
+    from uc2.formats.riff import model
+
+    class Presenter(object):
+        model = None
+        config = None
+
+    start = time.time()
+    doc = RIFF_Loader().load(Presenter(), path)
+    chunks = []
+    stack = [doc]
+    count = 0
+    while stack:
+        obj = stack.pop()
+        count += 1
+        if mode == 'eager' and obj.cid != model.RIFF_ROOT:
+            chunks.append(obj.chunk)
+        stack.extend(obj.childs)
+    elapsed = time.time() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    print '%-6s objects %8d  time %7.3f s  peak RSS %8.1f MB  ' \
+          'anonymous %8.1f MB' % (mode, count, elapsed, peak,
+                                  get_anon_memory())
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] in ('lazy', 'eager'):
+        measure(sys.argv[2], sys.argv[1])
+        return
+    path = sys.argv[1]
+    tmp = None
+    if path.startswith('--generate='):
+        tmp = tempfile.mktemp(suffix='.riff')
+        generate(tmp, int(path.split('=')[1]))
+        path = tmp
+    print 'file size %.1f MB' % (os.path.getsize(path) / 1024.0 / 1024.0)
+    for mode in ('lazy', 'eager'):
+        subprocess.check_call([sys.executable, __file__, mode, path])
+    if tmp:
+        os.remove(tmp)
+
+
+if __name__ == '__main__':
+    main()
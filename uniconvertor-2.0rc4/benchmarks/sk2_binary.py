@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares text and binary SK2 variants: load/save time, file size
+and round-trip parity of document trees.
+Usage: python benchmarks/sk2_binary.py file.sk2
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2 import app_cms, uc2_init
+from uc2.formats.sk2 import sk2_loader, sk2_saver
+from uc2.formats.sk2.sk2_filters import SK2_Saver
+
+
+def get_tree(obj):
+    saver = SK2_Saver()
+    fields = {}
+    for item in saver.get_fields(obj):
+        if item == 'bitmap':
+            fields[item] = obj.handler.bitmap.tobytes()
+        elif item == 'alpha_channel':
+            fields[item] = obj.handler.alpha.tobytes()
+        else:
+            fields[item] = obj.__dict__[item]
+    return obj.cid, fields, [get_tree(child) for child in obj.childs]
+
+
+def measure(func, *args, **kw):
+    start = time.time()
+    result = func(*args, **kw)
+    return result, time.time() - start
+
+
+def main():
+    app = uc2_init()
+    app.default_cms = app_cms.AppColorManager(app)
+    doc = sk2_loader(app.appdata, sys.argv[1])
+    tree = get_tree(doc.model)
+    tmpdir = tempfile.mkdtemp()
+    for binary in (False, True):
+        path = os.path.join(tmpdir, 'test%d.sk2' % binary)
+        _res, save_time = measure(sk2_saver, doc, path, binary=binary)
+        new_doc, load_time = measure(sk2_loader, app.appdata, path)
+        parity = get_tree(new_doc.model) == tree
+        print '%-6s save %7.3f s  load %7.3f s  size %10d  parity %s' % (
+            'binary' if binary else 'text', save_time, load_time,
+            os.path.getsize(path), parity)
+        new_doc.close()
+        os.remove(path)
+    os.rmdir(tmpdir)
+    doc.close()
+
+
+if __name__ == '__main__':
+    main()
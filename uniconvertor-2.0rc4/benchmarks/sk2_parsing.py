@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares SK2 record parsing speed: compile()/exec versus literal parser.
+Usage: python benchmarks/sk2_parsing.py [number of objects]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2.utils.literals import parse_call
+
+
+class Recorder(object):
+    count = 0
+
+    def obj(self, tag):
+        self.count += 1
+
+    def set(self, item, val):
+        self.count += 1
+
+    def end(self):
+        self.count += 1
+
+
+def make_records(num):
+    style = [[1, 0, [u'RGB', [0.5, 0.25, 1.0], 1.0, u'', '']],
+             [], ['Sans', 'Regular', 12.0, 0, [], True], []]
+    curve = [[[0.0, 0.0], [[float(i), float(i) * 0.5] for i in range(20)] +
+              [[[1.0, 2.0], [3.0, 4.0], [5.0, 6.0], 0]], 1]]
+    lines = []
+    for _i in range(num):
+        lines.append("obj('curve')")
+        lines.append("set('paths',%s)" % repr(curve))
+        lines.append("set('trafo',%s)" % repr([1.0, 0.0, 0.0, 1.0, 0.0, 0.0]))
+        lines.append("set('style',%s)" % repr(style))
+        lines.append("set('name','it\\'s a curve')")
+        lines.append("end()")
+    return lines
+
+
+def run_exec(lines):
+    self = Recorder()
+    for line in lines:
+        code = compile('self.' + line, '<string>', 'exec')
+        exec code
+    return self.count
+
+
+def run_parser(lines):
+    rec = Recorder()
+    records = {'obj': rec.obj, 'set': rec.set, 'end': rec.end}
+    for line in lines:
+        name, args = parse_call(line)
+        records[name](*args)
+    return rec.count
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    lines = make_records(num)
+    for name, func in (('exec', run_exec), ('parser', run_parser)):
+        start = time.time()
+        count = func(lines)
+        elapsed = time.time() - start
+        print '%-8s %8d lines %8.3f s %10.0f lines/s' % (
+            name, count, elapsed, count / elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures CLI startup latency. Prints import time report of
+uc2.application (like "python -X importtime") and wall clock
+time of "uniconvertor --help" and GPL to SKP palette translation
+in fresh processes. Exits with error status if translation time
+exceeds threshold.
+Usage: python benchmarks/startup.py [--repeats=5] [--threshold=0.5]
+"""
+
+import __builtin__
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, SRC_DIR)
+
+REPEATS = 5
+THRESHOLD = 0.5  # seconds per GPL to SKP translation
+REPORT_SIZE = 25
+
+RUN_CODE = 'import sys; sys.path.insert(0, %r); ' \
+           'from uc2 import uc2_run; uc2_run()' % SRC_DIR
+
+PALETTE = 'GIMP Palette\nName: Startup\nColumns: 4\n#\n'
+
+
+def trace_imports():
+    """
+    Imports uc2.application collecting self and cumulative import
+    time of every module. Prints report sorted by cumulative time.
+    """
+    records = []
+    stack = []
+    original_import = __builtin__.__import__
+
+    def timed_import(name, *args, **kw):
+        if name in sys.modules:
+            return original_import(name, *args, **kw)
+        stack.append(0.0)
+        start = time.time()
+        try:
+            return original_import(name, *args, **kw)
+        finally:
+            cumulative = time.time() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            if name in sys.modules:
+                records.append((cumulative, cumulative - nested, name))
+
+    __builtin__.__import__ = timed_import
+    start = time.time()
+    import uc2.application
+    total = time.time() - start
+    __builtin__.__import__ = original_import
+
+    print 'import time: self [us] | cumulative | imported package'
+    for cumulative, own, name in sorted(records, reverse=True)[:REPORT_SIZE]:
+        print 'import time: %9d | %10d | %s' % (own * 1e6, cumulative * 1e6,
+                                               name)
+    native = [name for name in ('cairo', '_libpango', '_cms', '_libimg',
+                                'PIL', 'reportlab') if name in sys.modules]
+    modules = [name for name in sys.modules if sys.modules[name]]
+    print 'modules loaded: %d (uc2: %d), native: %s' % (
+        len(modules), len([name for name in modules
+                           if name.startswith('uc2')]),
+        ', '.join(native) or 'none')
+    print 'total import time: %.1f ms' % (total * 1e3)
+
+
+def run_cli(args, env):
+    start = time.time()
+    with open(os.devnull, 'w') as devnull:
+        ret = subprocess.call([sys.executable, '-c', RUN_CODE] + args,
+                              env=env, stdout=devnull, stderr=devnull)
+    return time.time() - start, ret
+
+
+def measure(name, args, env, repeats):
+    timings = []
+    for _i in range(repeats):
+        elapsed, ret = run_cli(args, env)
+        if ret:
+            print '%s failed with exit status %d' % (name, ret)
+            return None
+        timings.append(elapsed)
+    timings.sort()
+    print '%-12s best %7.1f ms  median %7.1f ms' % (
+        name, timings[0] * 1e3, timings[len(timings) // 2] * 1e3)
+    return timings[len(timings) // 2]
+
+
+def main():
+    options = dict(item[2:].split('=') for item in sys.argv[1:]
+                   if item.startswith('--') and '=' in item)
+    if '--imports' in sys.argv:
+        trace_imports()
+        return
+    repeats = int(options.get('repeats', REPEATS))
+    threshold = float(options.get('threshold', THRESHOLD))
+
+    subprocess.call([sys.executable, __file__, '--imports'])
+    print
+
+    path = tempfile.mkdtemp('.startup')
+    try:
+        src = os.path.join(path, 'palette.gpl')
+        with open(src, 'w') as fileptr:
+            fileptr.write(PALETTE)
+            for index in range(256):
+                fileptr.write('%3d %3d %3d color%d\n' % (
+                    index, 255 - index, index // 2, index))
+        dst = os.path.join(path, 'palette.skp')
+        env = dict(os.environ)
+        env['HOME'] = path
+        measure('--help', ['--help'], env, repeats)
+        elapsed = measure('gpl -> skp', [src, dst], env, repeats)
+    finally:
+        shutil.rmtree(path)
+
+    if elapsed is None or elapsed > threshold:
+        print 'FAILED: translation time exceeds %.1f ms threshold' % (
+            threshold * 1e3)
+        sys.exit(1)
+    print 'OK: translation time is below %.1f ms threshold' % (threshold * 1e3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares SVG export time and peak memory for XMLObject tree
+translation and streamed SVG body writing. Every mode runs
+in separate process, so peak RSS growth is measured after
+document is loaded.
+Usage: python benchmarks/svg_export.py file.sk2
+       python benchmarks/svg_export.py --generate=100000 (objects)
+"""
+
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2 import app_cms, uc2_init, sk2const, uc2const
+from uc2.formats import get_loader
+from uc2.formats.sk2 import sk2_model
+from uc2.formats.sk2.sk2_presenter import SK2_Presenter
+from uc2.formats.svg import SPOOL_SIZE
+from uc2.formats.svg.svg_presenter import SVG_Presenter
+
+MODES = ('tree', 'stream')
+
+
+def generate(app, num):
+    random.seed(num)
+    doc = SK2_Presenter(app.appdata)
+    methods = doc.methods
+    layer = methods.get_layer(methods.get_page())
+    for _i in range(num):
+        x = random.uniform(-250.0, 250.0)
+        y = random.uniform(-350.0, 350.0)
+        rect = [x, y, random.uniform(5.0, 50.0), random.uniform(5.0, 50.0)]
+        color = [uc2const.COLOR_RGB, [random.random() for _j in range(3)],
+                 1.0, '']
+        fill = [sk2const.FILL_EVENODD, sk2const.FILL_SOLID, color]
+        obj = sk2_model.Rectangle(doc.config, layer, rect,
+                                  style=[fill, [], [], []])
+        methods.append_object(obj, layer)
+        obj.update()
+    return doc
+
+
+def get_maxrss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def export(source, mode):
+    app = uc2_init()
+    app.default_cms = app_cms.AppColorManager(app)
+    if source.startswith('--generate='):
+        doc = generate(app, int(source.split('=')[1]))
+    else:
+        doc = get_loader(source)(app.appdata, source)
+    fd, path = tempfile.mkstemp('.svg')
+    os.close(fd)
+    rss = get_maxrss()
+    start = time.time()
+    svg_doc = SVG_Presenter(doc.appdata)
+    if mode == 'stream':
+        stream = tempfile.SpooledTemporaryFile(SPOOL_SIZE)
+        svg_doc.translate_from_sk2(doc, stream)
+        svg_doc.save(path)
+        stream.close()
+    else:
+        svg_doc.translate_from_sk2(doc)
+        svg_doc.save(path)
+    print '%-8s save %7.3f s  peak RSS +%8d KB  size %10d' % (
+        mode, time.time() - start, get_maxrss() - rss,
+        os.path.getsize(path))
+    svg_doc.close()
+    os.remove(path)
+    doc.close()
+
+
+def main():
+    if len(sys.argv) > 2:
+        export(sys.argv[1], sys.argv[2])
+        return
+    for mode in MODES:
+        subprocess.call([sys.executable, __file__, sys.argv[1], mode])
+
+
+if __name__ == '__main__':
+    main()
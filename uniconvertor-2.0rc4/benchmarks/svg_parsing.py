@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Microbenchmark of SVG path data, point list and transform parsers.
+Corpus is taken from 'd', 'points' and 'transform' attributes of
+provided SVG files or generated (map-like polylines and font-like
+outlines with multi-MB 'd' attributes).
+Usage: python benchmarks/svg_parsing.py [file.svg ...]
+"""
+
+import os
+import random
+import sys
+import time
+from xml.etree import cElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2.formats.svg.svg_utils import get_svg_trafo, parse_svg_path_cmds, \
+    parse_svg_points
+
+
+def get_num():
+    return '%.3f' % random.uniform(-100.0, 100.0)
+
+
+def generate():
+    random.seed(0)
+    # Map-like: long relative polylines
+    map_d = ['M 0,0']
+    for _i in range(200000):
+        map_d.append('l%s,%s' % (get_num(), get_num()))
+    # Font-like: short closed curves
+    font_d = []
+    for _i in range(20000):
+        font_d.append('M%s %s' % (get_num(), get_num()))
+        for _j in range(4):
+            font_d.append('C%s' % ' '.join([get_num() for _k in range(6)]))
+            font_d.append('Q%s' % ' '.join([get_num() for _k in range(4)]))
+        font_d.append('z')
+    points = ' '.join(['%s,%s' % (get_num(), get_num())
+                       for _i in range(100000)])
+    trafos = ['translate(%s,%s) rotate(%s) scale(%s)' % (
+        get_num(), get_num(), get_num(), get_num())
+              for _i in range(20000)]
+    return [''.join(map_d), ' '.join(font_d)], [points], trafos
+
+
+def load(paths):
+    ds, points, trafos = [], [], []
+    for path in paths:
+        for _event, el in cElementTree.iterparse(path):
+            if 'd' in el.attrib:
+                ds.append(el.attrib['d'])
+            if 'points' in el.attrib:
+                points.append(el.attrib['points'])
+            if 'transform' in el.attrib:
+                trafos.append(el.attrib['transform'])
+    return ds, points, trafos
+
+
+def measure(name, func, items):
+    size = sum(len(item) for item in items)
+    start = time.time()
+    for item in items:
+        func(item)
+    elapsed = time.time() - start
+    print '%-10s %6d items %10d bytes %8.3f s %8.2f MB/s' % (
+        name, len(items), size, elapsed,
+        size / 1048576.0 / elapsed if elapsed else 0.0)
+
+
+def main():
+    ds, points, trafos = load(sys.argv[1:]) if sys.argv[1:] else generate()
+    measure('path', parse_svg_path_cmds, ds)
+    measure('points', parse_svg_points, points)
+    measure('transform', get_svg_trafo, trafos)
+
+
+if __name__ == '__main__':
+    main()
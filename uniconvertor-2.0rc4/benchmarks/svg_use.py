@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares SVG import time with memoized <use> instances and with
+re-translation of referenced element on every <use>.
+Usage: python benchmarks/svg_use.py file.svg
+       python benchmarks/svg_use.py --generate=50000 (<use> elements)
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2 import app_cms, uc2_init
+from uc2.formats.svg import svg_loader
+from uc2.formats.svg.svg_translators import SVG_to_SK2_Translator
+
+SYMBOLS = '''<defs>
+<linearGradient id="grad"><stop offset="0" stop-color="red"/>
+<stop offset="1" stop-color="blue"/></linearGradient>
+<symbol id="pin"><path d="M 0,0 C 5,-10 15,-10 20,0 L 10,20 Z"
+ fill="url(#grad)" stroke="black"/><circle cx="10" cy="0" r="4"
+ fill="white"/></symbol>
+<g id="tree"><rect x="8" y="20" width="4" height="10" fill="brown"/>
+<path d="M 0,20 L 10,0 20,20 Z" fill="green"/></g>
+<symbol id="icon"><use xlink:href="#pin"/>
+<use xlink:href="#tree" transform="translate(25) scale(0.5)"/></symbol>
+</defs>
+'''
+
+
+def generate(num):
+    random.seed(num)
+    fd, path = tempfile.mkstemp('.svg')
+    fileptr = os.fdopen(fd, 'w')
+    fileptr.write('<svg xmlns="http://www.w3.org/2000/svg" '
+                  'xmlns:xlink="http://www.w3.org/1999/xlink" '
+                  'width="1000" height="1000">\n')
+    fileptr.write(SYMBOLS)
+    for _i in range(num):
+        fileptr.write('<use xlink:href="#%s" transform="translate(%.2f,%.2f)'
+                      ' rotate(%d)"/>\n' % (
+                          random.choice(('pin', 'tree', 'icon')),
+                          random.uniform(0.0, 1000.0),
+                          random.uniform(0.0, 1000.0),
+                          random.randint(0, 359)))
+    fileptr.write('</svg>\n')
+    fileptr.close()
+    return path
+
+
+def translate_reference(translator, parent, obj_id, trafo, style):
+    translator.translate_obj(parent, translator.id_map[obj_id], trafo, style)
+
+
+def main():
+    app = uc2_init()
+    app.default_cms = app_cms.AppColorManager(app)
+    path = sys.argv[1]
+    generated = path.startswith('--generate=')
+    if generated:
+        path = generate(int(path.split('=')[1]))
+    translate_instance = SVG_to_SK2_Translator.__dict__['translate_instance']
+    for name, method in (('instances', translate_instance),
+                         ('reference', translate_reference)):
+        SVG_to_SK2_Translator.translate_instance = method
+        start = time.time()
+        doc = svg_loader(app.appdata, path)
+        print '%-10s load %7.3f s' % (name, time.time() - start)
+        doc.close()
+    SVG_to_SK2_Translator.translate_instance = translate_instance
+    if generated:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
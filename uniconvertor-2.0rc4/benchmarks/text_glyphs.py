@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares text-to-curve conversion time with disabled and enabled
+glyph outline cache on catalogue-like labels.
+Usage: python benchmarks/text_glyphs.py [LABELS] [FONT FAMILY]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2 import libpango
+from uc2.libpango import core
+
+MARKUP = [('b', (0, 4)), ('u', (5, 9))]
+
+
+def generate(num):
+    random.seed(num)
+    chars = string.ascii_letters + string.digits + '  .,-'
+    return [''.join(random.choice(chars) for _j in range(40)).decode('utf-8')
+            for _i in range(num)]
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    family = sys.argv[2] if len(sys.argv) > 2 else 'Sans'
+    labels = generate(num)
+    text_style = [family, 'Regular', 9.0, 0, [], False]
+    for name, size in (('no cache', 0), ('cache', core.GLYPH_CACHE_SIZE)):
+        core.GLYPH_CACHE.maxsize = size
+        core.GLYPH_CACHE.hits = core.GLYPH_CACHE.misses = 0
+        libpango.clear_glyph_cache()
+        start = time.time()
+        for index, text in enumerate(labels):
+            libpango.get_text_paths(text, -1, text_style,
+                                    MARKUP if index % 3 else [])
+        hits, misses, length = libpango.get_glyph_cache_stats()
+        print '%-8s %7.3f s  hits %8d  misses %8d  size %6d' % (
+            name, time.time() - start, hits, misses, length)
+
+
+if __name__ == '__main__':
+    main()
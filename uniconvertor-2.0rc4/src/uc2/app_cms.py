@@ -32,8 +32,6 @@ class AppColorManager(ColorManager):
         ColorManager.__init__(self)
 
     def update(self):
-        self.handles = {}
-        self.clear_transforms()
         config = self.app.config
         profiles = [config.cms_rgb_profile,
                     config.cms_cmyk_profile,
@@ -46,23 +44,16 @@ class AppColorManager(ColorManager):
                          config.cms_gray_profiles,
                          config.cms_display_profiles]
         index = 0
-        profile_dir = self.app.appdata.app_color_profile_dir
+        self.profile_dir = self.app.appdata.app_color_profile_dir
+        self.profile_paths = {}
         for item in CS + [COLOR_DISPLAY, ]:
-            path = None
             profile = profiles[index]
             if profile and profile in profile_dicts[index]:
                 profile_filename = profile_dicts[index][profile]
-                path = os.path.join(profile_dir, profile_filename)
-            if path:
-                path = fsutils.get_sys_path(path)
-                self.handles[item] = libcms.cms_open_profile_from_file(path)
-            else:
-                profile_dir = self.app.appdata.app_color_profile_dir
-                filename = 'built-in_%s.icm' % item
-                path = os.path.join(profile_dir, filename)
-                path = fsutils.get_sys_path(path)
-                self.handles[item] = libcms.cms_open_profile_from_file(path)
+                path = os.path.join(self.profile_dir, profile_filename)
+                self.profile_paths[item] = fsutils.get_sys_path(path)
             index += 1
+        self.set_handles(CS + [COLOR_DISPLAY, ])
         self.use_cms = config.cms_use
         self.use_display_profile = config.cms_use_display_profile
         self.rgb_intent = config.cms_rgb_intent
@@ -0,0 +1,546 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+#
+#  Resident conversion server. Jobs are accepted over Unix domain socket
+#  and are executed by pool of warm worker processes, so application
+#  startup is paid once per worker.
+#
+#  Every message is a 4-byte big-endian header length, JSON header and
+#  'data_size' bytes of raw data. Request header fields:
+#    cmd        - 'convert' (default), 'health' or 'metrics'
+#    format     - output format id (see uc2const.SAVER_FORMATS)
+#    input_name - file name of provided data (used for format detection)
+#    input      - source file path, if data is not provided
+#    output     - destination file path; if omitted, result is returned
+#                 as response data
+#    options    - dict of translation options
+#    timeout    - job timeout in seconds
+#  Response header has 'status' field: 'ok', 'error', 'timeout' or 'busy'.
+#
+#  File paths ('input' and 'output' fields) are accepted only if the server
+#  is started with --allow-paths option. Request data is read after a job
+#  slot is acquired and is limited by --max-size option; request data and
+#  result are streamed through temporary files of the server.
+#
+
+import json
+import logging
+import multiprocessing
+import os
+import Queue
+import shutil
+import signal
+import socket
+import SocketServer
+import stat
+import struct
+import tempfile
+import threading
+import time
+
+from uc2 import uc2const
+from uc2.utils import fsutils
+
+LOG = logging.getLogger(__name__)
+
+HEADER_SIZE = struct.Struct('>I')
+MAX_HEADER_SIZE = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+STATUS_TIMEOUT = 'timeout'
+STATUS_BUSY = 'busy'
+
+
+class ServerError(Exception):
+    pass
+
+
+class ServerTimeout(ServerError):
+    pass
+
+
+def _to_str(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, list):
+        return [_to_str(item) for item in value]
+    if isinstance(value, dict):
+        return dict((_to_str(key), _to_str(val)) for key, val in value.items())
+    return value
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, CHUNK_SIZE))
+        if not chunk:
+            raise ServerError('Connection is closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return ''.join(chunks)
+
+
+def _send_header(sock, header, data_size=0):
+    body = json.dumps(dict(header, data_size=data_size))
+    sock.sendall(HEADER_SIZE.pack(len(body)) + body)
+
+
+def send_message(sock, header, data=''):
+    _send_header(sock, header, len(data))
+    if data:
+        sock.sendall(data)
+
+
+def send_file(sock, header, path):
+    """
+    Sends message with file content as data by chunks.
+    """
+    fileptr = fsutils.get_fileptr(path)
+    try:
+        fileptr.seek(0, os.SEEK_END)
+        _send_header(sock, header, fileptr.tell())
+        fileptr.seek(0)
+        while True:
+            chunk = fileptr.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sock.sendall(chunk)
+    finally:
+        fileptr.close()
+
+
+def recv_header(sock, max_data_size=None):
+    """
+    Returns header of incoming message. Message data
+    should be read by recv_data() or recv_file().
+    """
+    size = HEADER_SIZE.unpack(_recv_exact(sock, HEADER_SIZE.size))[0]
+    if size > MAX_HEADER_SIZE:
+        raise ServerError('Message header is too large')
+    header = _to_str(json.loads(_recv_exact(sock, size)))
+    if not isinstance(header, dict):
+        raise ServerError('Message header should be an object')
+    data_size = header.get('data_size', 0)
+    if not isinstance(data_size, (int, long)) or data_size < 0:
+        raise ServerError('Wrong message data size')
+    if max_data_size is not None and data_size > max_data_size:
+        raise ServerError('Message data is too large (%d bytes, '
+                          'limit is %d bytes)' % (data_size, max_data_size))
+    return header
+
+
+def recv_data(sock, header):
+    return _recv_exact(sock, header.get('data_size', 0))
+
+
+def recv_file(sock, header, path):
+    """
+    Writes message data into file by chunks.
+    """
+    size = header.get('data_size', 0)
+    fileptr = fsutils.get_fileptr(path, True)
+    try:
+        while size:
+            chunk = _recv_exact(sock, min(size, CHUNK_SIZE))
+            fileptr.write(chunk)
+            size -= len(chunk)
+    finally:
+        fileptr.close()
+
+
+def recv_message(sock, max_data_size=None):
+    """
+    Returns (header, data) tuple of incoming message.
+    """
+    header = recv_header(sock, max_data_size)
+    return header, recv_data(sock, header)
+
+
+# Worker process side
+def run_server_job(app, job):
+    """
+    Executes conversion job in worker process. Job is a dict
+    of 'input', 'output', 'format' and 'options' fields prepared
+    by server. Returns response header.
+    """
+    options = dict(job.get('options') or {})
+    options['format'] = job['format']
+    _src, _dst, error, elapsed = app.run_job(job['input'], job['output'],
+                                             options)
+    response = {'status': STATUS_ERROR if error else STATUS_OK,
+                'time': elapsed}
+    if error:
+        response['error'] = error
+    return response
+
+
+def _worker_loop(conn, path, cfgdir, options):
+    from uc2.application import UCApplication
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    app = UCApplication(path, cfgdir)
+    app.init_runtime(options, worker=True)
+    try:
+        while True:
+            try:
+                job = conn.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+            try:
+                conn.send(run_server_job(app, job))
+            except Exception as e:
+                LOG.error('Server job is failed: %s', e, exc_info=True)
+                conn.send({'status': STATUS_ERROR, 'error': str(e)})
+    finally:
+        app.flush_glyph_cache(True)
+
+
+# Server process side
+class ServerWorker(object):
+    """
+    Warm worker process connected by pipe. Worker executes
+    a job at a time and is restarted if the job exceeds timeout.
+    """
+    process = None
+    conn = None
+
+    def __init__(self, path, cfgdir, options):
+        self.args = (path, cfgdir, options)
+        self.start()
+
+    def start(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker_loop, args=(child_conn,) + self.args)
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
+
+    def restart(self):
+        self.stop(True)
+        self.start()
+
+    def stop(self, kill=False):
+        if self.process.is_alive():
+            if kill:
+                self.process.terminate()
+            else:
+                try:
+                    self.conn.send(None)
+                except (IOError, OSError):
+                    self.process.terminate()
+        self.process.join(5.0)
+        self.conn.close()
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def run(self, job, timeout):
+        """
+        Returns response header or raises ServerError
+        if the job is not finished in time.
+        """
+        try:
+            self.conn.send(job)
+            if self.conn.poll(timeout):
+                return self.conn.recv()
+        except (EOFError, IOError, OSError):
+            self.restart()
+            raise ServerError('Worker process is crashed')
+        self.restart()
+        raise ServerTimeout('Job timeout (%s s) is exceeded' % timeout)
+
+
+class ServerMetrics(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start = time.time()
+        self.counters = dict.fromkeys(
+            ['jobs', 'ok', 'failed', 'timeouts', 'rejected', 'active'], 0)
+        self.job_time = 0.0
+
+    def inc(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    def job_done(self, status, job_time):
+        name = {STATUS_OK: 'ok', STATUS_TIMEOUT: 'timeouts'}.get(status,
+                                                                 'failed')
+        with self.lock:
+            self.counters[name] += 1
+            self.job_time += job_time
+
+    def get_metrics(self):
+        with self.lock:
+            metrics = dict(self.counters)
+            done = metrics['ok'] + metrics['failed'] + metrics['timeouts']
+            metrics['avg_job_time'] = self.job_time / done if done else 0.0
+        metrics['uptime'] = time.time() - self.start
+        return metrics
+
+
+class ServerRequestHandler(SocketServer.BaseRequestHandler):
+    def handle(self):
+        server = self.server.uc_server
+        try:
+            header = recv_header(self.request, server.max_data_size)
+            cmd = header.get('cmd', 'convert')
+            if cmd == 'health':
+                send_message(self.request, server.get_health())
+            elif cmd == 'metrics':
+                send_message(self.request, server.get_metrics())
+            elif cmd == 'convert':
+                server.convert(self.request, header)
+            else:
+                send_message(self.request, {
+                    'status': STATUS_ERROR,
+                    'error': 'Unknown command "%s"' % cmd})
+        except (ServerError, ValueError, struct.error) as e:
+            send_message(self.request, {'status': STATUS_ERROR,
+                                        'error': str(e)})
+
+
+class ThreadingUnixServer(SocketServer.ThreadingMixIn,
+                          SocketServer.UnixStreamServer):
+    daemon_threads = True
+    uc_server = None
+
+
+class UCServer(object):
+    """
+    Conversion server. Number of accepted jobs is limited by workers
+    count plus queue size; extra jobs are rejected with 'busy' status.
+    """
+    server = None
+    workers = None
+    idle = None
+    slots = None
+    tmpdir = None
+
+    def __init__(self, app, address, options):
+        self.app = app
+        self.address = address
+        self.options = options
+        config = app.config
+        self.workers_num = options.get('workers', config.batch_workers)
+        if not isinstance(self.workers_num, int) or self.workers_num < 1:
+            self.workers_num = multiprocessing.cpu_count()
+        self.timeout = options.get('timeout', config.server_job_timeout)
+        self.queue_size = options.get('queue', config.server_queue_size)
+        max_size = options.get('max-size', config.server_max_data_size)
+        self.max_data_size = int(max_size * 1024 * 1024)
+        self.allow_paths = options.get('allow-paths',
+                                       config.server_allow_paths)
+        self.metrics = ServerMetrics()
+
+    def remove_socket(self):
+        if os.path.lexists(self.address):
+            if not stat.S_ISSOCK(os.lstat(self.address).st_mode):
+                raise ServerError('"%s" exists and is not a socket'
+                                  % self.address)
+            os.remove(self.address)
+
+    def start(self):
+        self.remove_socket()
+        self.tmpdir = tempfile.mkdtemp(prefix='uc2_')
+        self.workers = [ServerWorker(self.app.path, self.app.cfgdir,
+                                     self.options)
+                        for _i in range(self.workers_num)]
+        self.idle = Queue.Queue()
+        for worker in self.workers:
+            self.idle.put(worker)
+        self.slots = threading.BoundedSemaphore(self.workers_num +
+                                                self.queue_size)
+        # Socket is accessible by server owner only
+        umask = os.umask(0o177)
+        try:
+            self.server = ThreadingUnixServer(self.address,
+                                              ServerRequestHandler)
+        finally:
+            os.umask(umask)
+        os.chmod(self.address, 0o600)
+        self.server.uc_server = self
+        LOG.info('Server is started on "%s" with %d workers',
+                 self.address, self.workers_num)
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self.server:
+            self.server.server_close()
+            self.server = None
+            self.remove_socket()
+        for worker in self.workers or []:
+            worker.stop()
+        self.workers = []
+        if self.tmpdir:
+            shutil.rmtree(self.tmpdir, True)
+            self.tmpdir = None
+        LOG.info('Server is stopped')
+
+    def get_health(self):
+        alive = len([item for item in self.workers if item.is_alive()])
+        return {'status': STATUS_OK if alive else STATUS_ERROR,
+                'workers': self.workers_num, 'alive': alive,
+                'idle': self.idle.qsize()}
+
+    def get_metrics(self):
+        metrics = self.metrics.get_metrics()
+        metrics.update(status=STATUS_OK, workers=self.workers_num,
+                       queue_size=self.queue_size)
+        return metrics
+
+    def check_job(self, header):
+        """
+        Returns error message if convert request is not acceptable.
+        """
+        fmt = header.get('format', '')
+        if fmt not in uc2const.SAVER_FORMATS:
+            return 'Unsupported output format "%s"' % fmt
+        if not isinstance(header.get('options') or {}, dict):
+            return 'Translation options should be an object'
+        if not isinstance(header.get('timeout') or 0, (int, long, float)):
+            return 'Job timeout should be a number'
+        if not self.allow_paths and \
+                (header.get('input') or header.get('output')):
+            return 'File paths are not allowed by server'
+        if bool(header.get('data_size')) == bool(header.get('input')):
+            return 'Either input data or input file path should be provided'
+        return ''
+
+    def get_job(self, sock, header, jobdir):
+        """
+        Reads request data into job directory and returns job
+        for worker process.
+        """
+        fmt = header['format']
+        job = {'format': fmt, 'options': header.get('options') or {}}
+        if header.get('data_size'):
+            name = os.path.basename(header.get('input_name', '')) or 'input'
+            job['input'] = os.path.join(jobdir, 'in_' + name)
+            recv_file(sock, header, job['input'])
+        else:
+            job['input'] = header['input']
+        job['output'] = header.get('output') or os.path.join(
+            jobdir, 'output.' + uc2const.FORMAT_EXTENSION[fmt][0])
+        return job
+
+    def run_job(self, job, timeout):
+        start = time.time()
+        self.metrics.inc('jobs')
+        worker = self.idle.get()
+        self.metrics.inc('active')
+        try:
+            response = worker.run(job, timeout)
+        except ServerError as e:
+            LOG.error('Server job is failed: %s', e)
+            status = STATUS_TIMEOUT if isinstance(e, ServerTimeout) \
+                else STATUS_ERROR
+            response = {'status': status, 'error': str(e)}
+        finally:
+            self.metrics.inc('active', -1)
+            self.idle.put(worker)
+        self.metrics.job_done(response['status'], time.time() - start)
+        return response
+
+    def convert(self, sock, header):
+        """
+        Executes convert request. Request data is read after job
+        slot is acquired; result is sent from output file by chunks.
+        """
+        error = self.check_job(header)
+        if error:
+            send_message(sock, {'status': STATUS_ERROR, 'error': error})
+            return
+        if not self.slots.acquire(False):
+            self.metrics.inc('rejected')
+            send_message(sock, {'status': STATUS_BUSY,
+                                'error': 'Server queue is full'})
+            return
+        jobdir = tempfile.mkdtemp(dir=self.tmpdir)
+        try:
+            try:
+                job = self.get_job(sock, header, jobdir)
+                response = self.run_job(job, header.get('timeout') or
+                                        self.timeout)
+            finally:
+                self.slots.release()
+            if response['status'] == STATUS_OK and not header.get('output'):
+                send_file(sock, response, job['output'])
+            else:
+                send_message(sock, response)
+        finally:
+            shutil.rmtree(jobdir, True)
+
+
+class UCClient(object):
+    """
+    Local client of conversion server.
+    """
+
+    def __init__(self, address, timeout=None):
+        self.address = address
+        self.timeout = timeout
+
+    def request(self, header, data=''):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+            _send_header(sock, header, len(data))
+            try:
+                sock.sendall(data)
+            except socket.error:
+                # Server may reject request without reading data
+                pass
+            return recv_message(sock)
+        finally:
+            sock.close()
+
+    def health(self):
+        return self.request({'cmd': 'health'})[0]
+
+    def metrics(self):
+        return self.request({'cmd': 'metrics'})[0]
+
+    def convert(self, fmt, src='', data='', name='', dst='', options=None,
+                timeout=None):
+        """
+        Translates src file or data into fmt format. Returns
+        (response header, result data) tuple; result data is empty
+        if dst file path is provided. File paths are accepted only
+        by server started with --allow-paths option.
+        """
+        header = {'cmd': 'convert', 'format': fmt, 'options': options or {}}
+        if src:
+            header['input'] = os.path.abspath(src)
+        if name:
+            header['input_name'] = name
+        if dst:
+            header['output'] = os.path.abspath(dst)
+        if timeout:
+            header['timeout'] = timeout
+        return self.request(header, data)
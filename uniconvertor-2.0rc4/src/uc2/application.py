@@ -16,9 +16,16 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import datetime
+import glob
 import logging
+import multiprocessing
 import os
+import re
+import shlex
+import signal
+import socket
 import sys
+import time
 
 import uc2
 from uc2 import app_cms, uc2const
@@ -31,11 +38,23 @@ from uc2.utils.mixutils import echo, config_logging
 
 LOG = logging.getLogger(__name__)
 
+# Options which values are file names, so they are not converted
+STRING_OPTIONS = ('batch',)
+OUTPUT_FIELDS = re.compile(r'\{(name|ext|dir)\}')
+
 
 def log_stub(*args):
     return args
 
 
+def format_output_pattern(pattern, fields):
+    """
+    Substitutes {name}, {ext} and {dir} fields of batch output
+    pattern. Other text (braces too) is kept as is.
+    """
+    return OUTPUT_FIELDS.sub(lambda match: fields[match.group(1)], pattern)
+
+
 LOG_MAP = {
     msgconst.JOB: LOG.info,
     msgconst.INFO: LOG.info,
@@ -54,11 +73,40 @@ copyright (C) 2007-%s sK1 Project Team (https://sk1project.net)
 Usage: uniconvertor [OPTIONS] [INPUT FILE] [OUTPUT FILE]
 Example: uniconvertor drawing.cdr drawing.svg
 
+Batch mode: uniconvertor --batch [OPTIONS] "INPUT PATTERN" "OUTPUT PATTERN"
+            uniconvertor --batch=MANIFEST [OPTIONS]
+Example: uniconvertor --batch --workers=4 "cdr/*.cdr" "svg/{name}.svg"
+
+Server mode: uniconvertor --server=SOCKET [OPTIONS]
+Example: uniconvertor --server=/tmp/uniconvertor.sock --workers=4
+
  Available options:
  --help      Display this help and exit
  --verbose   Show internal logs
  --log=      Logging level: DEBUG, INFO, WARN, ERROR (by default, INFO)
  --format=   Type of output file format (values provided below)
+ --binary    Save SK2 output file in binary variant
+ --tiles=    Save PNG output as COLSxROWS tiles: NAME_ROW_COLUMN.png
+ --image-dpi=
+             Downsample PDF and SVG images above this resolution
+ --image-filter=
+             Downsampling filter: nearest, bilinear, bicubic
+             (by default) or lanczos
+ --glyph-cache
+             Keep text outlines in persistent cache shared by processes
+ --stepped-gradients
+             Draw translucent PDF gradients as stripes (instead of
+             native shadings with soft mask)
+ --batch     Batch mode; manifest file lists "SOURCE DESTINATION" per line
+ --workers=  Number of batch and server mode worker processes
+             (by default, CPU count)
+ --server=   Server mode; run conversion server on Unix domain socket
+ --timeout=  Batch and server mode job timeout in seconds
+             (by default, 300)
+ --queue=    Server mode jobs waiting for free worker (by default, 16)
+ --max-size= Server mode request data limit in MB (by default, 256)
+ --allow-paths
+             Server mode accepts input and output file paths of clients
 
 ---INPUT FILE FORMATS-------------------------------
 
@@ -94,9 +142,12 @@ class UCApplication(object):
     palettes = None
     do_verbose = False
     log_filepath = ''
+    cfgdir = '~'
+    glyph_cache = False
 
     def __init__(self, path='', cfgdir='~', check=True):
         self.path = path
+        self.cfgdir = cfgdir
         cfgdir = fsutils.expanduser(fsutils.get_utf8_path(cfgdir))
         self.config = UCConfig()
         self.config.app = self
@@ -146,12 +197,7 @@ class UCApplication(object):
             echo('For details see logs: %s\n' % self.log_filepath)
             sys.exit(1)
 
-    def run(self, cwd=None):
-        if '--help' in sys.argv or '-help' in sys.argv or len(sys.argv) == 1:
-            self.show_help()
-        elif len(sys.argv) == 2:
-            self.show_short_help('Not enough arguments!')
-
+    def parse_cmdline(self, cwd=None):
         files = []
         options_list = []
         options = {}
@@ -167,13 +213,6 @@ class UCApplication(object):
                     filename = os.path.join(cwd, filename)
                 files.append(filename)
 
-        if not files:
-            self.show_short_help('File names are not provided!')
-        elif len(files) == 1:
-            self.show_short_help('Destination file name is not provided!')
-        elif not os.path.lexists(files[0]):
-            self.show_short_help('Source file "%s" is not found!' % files[0])
-
         for item in options_list:
             result = item[2:].split('=')
             if not len(result) == 2:
@@ -181,16 +220,26 @@ class UCApplication(object):
             else:
                 key, value = result
                 value = value.replace('"', '').replace("'", '')
-                if value.isdigit():
+                if key in STRING_OPTIONS:
+                    pass
+                elif value.isdigit():
                     value = int(value)
                 elif value.replace('.', '').isdigit():
                     value = float(value)
                 elif value.lower() in ('yes', 'no'):
                     value = {'yes': True, 'no': False}[value.lower()]
                 options[key] = value
+        return files, options
 
+    def log_message(self, *args):
+        LOG_MAP[args[0]](args[1])
+
+    def init_runtime(self, options, worker=False):
         self.do_verbose = options.get('verbose', False)
-        events.connect(events.MESSAGES, self.verbose)
+        if worker:
+            events.connect(events.MESSAGES, self.log_message)
+        else:
+            events.connect(events.MESSAGES, self.verbose)
         log_level = options.get('log', self.config.log_level)
         self.log_filepath = os.path.join(self.appdata.app_config_dir, 'uc2.log')
         config_logging(self.log_filepath, log_level)
@@ -198,74 +247,369 @@ class UCApplication(object):
         self.default_cms = app_cms.AppColorManager(self)
         self.palettes = PaletteManager(self)
 
-        msg = 'Translation of "%s" into "%s"' % (files[0], files[1])
+        self.glyph_cache = options.get('glyph-cache', self.config.glyph_cache)
+        if self.glyph_cache:
+            from uc2 import libpango
+            path = os.path.join(self.appdata.app_config_dir, 'glyphs.cache')
+            libpango.open_glyph_disk_cache(path)
+
+    def translate(self, src, dst, options):
+        """
+        Translates src file into dst file. Errors are reported
+        by MESSAGES events and TranslationError exception.
+        """
+        msg = 'Translation of "%s" into "%s"' % (src, dst)
         events.emit(events.MESSAGES, msgconst.JOB, msg)
 
-        saver_ids = uc2const.PALETTE_SAVERS
-        saver_ids += uc2const.MODEL_SAVERS + uc2const.BITMAP_SAVERS
+        saver_ids = uc2const.PALETTE_SAVERS + uc2const.MODEL_SAVERS + \
+            uc2const.BITMAP_SAVERS
         sid = options.get('format', '').lower()
         if sid and sid in saver_ids:
             saver_id = sid
             saver = get_saver_by_id(saver_id)
         else:
-            saver, saver_id = get_saver(files[1], return_id=True)
+            saver, saver_id = get_saver(dst, return_id=True)
         if saver is None:
-            msg = 'Output file format of "%s" is unsupported.' % files[1]
+            msg = 'Output file format of "%s" is unsupported.' % dst
             events.emit(events.MESSAGES, msgconst.ERROR, msg)
+            raise TranslationError('Translation is interrupted')
 
-            msg = 'Translation is interrupted'
-            events.emit(events.MESSAGES, msgconst.STOP, msg)
-
-        loader, loader_id = get_loader(files[0], return_id=True)
+        loader, loader_id = get_loader(src, return_id=True)
         if loader is None:
-            msg = 'Input file format of "%s" is unsupported.' % files[0]
+            msg = 'Input file format of "%s" is unsupported.' % src
             events.emit(events.MESSAGES, msgconst.ERROR, msg)
+            raise TranslationError('Translation is interrupted')
 
-            msg = 'Translation is interrupted'
-            events.emit(events.MESSAGES, msgconst.STOP, msg)
-
-        doc = None
+        pal_translation = loader_id in uc2const.PALETTE_LOADERS and \
+            saver_id in uc2const.PALETTE_SAVERS
         try:
-            if loader_id in uc2const.PALETTE_LOADERS and \
-                    saver_id in uc2const.PALETTE_SAVERS:
-                doc = loader(self.appdata, files[0], convert=True, **options)
+            if pal_translation:
+                doc = loader(self.appdata, src, convert=True, **options)
             else:
-                doc = loader(self.appdata, files[0], **options)
+                doc = loader(self.appdata, src, **options)
         except Exception as e:
-            msg = 'Error while loading "%s"' % files[0]
+            msg = 'Error while loading "%s"' % src
             msg += 'The file may be corrupted or contains unknown file format.'
             events.emit(events.MESSAGES, msgconst.ERROR, msg)
 
             msg = 'Loading is interrupted'
             LOG.error('%s %s', msg, e)
-            events.emit(events.MESSAGES, msgconst.STOP, msg)
+            raise TranslationError(msg)
 
-        if doc is not None:
-            try:
-                if loader_id in uc2const.PALETTE_LOADERS and \
-                        saver_id in uc2const.PALETTE_SAVERS:
-                    saver(doc, files[1], translate=False, convert=True,
-                          **options)
-                else:
-                    saver(doc, files[1], **options)
-            except Exception as e:
-                msg = 'Error while translation and saving "%s"' % files[0]
-                events.emit(events.MESSAGES, msgconst.ERROR, msg)
-
-                msg = 'Translation is interrupted'
-                LOG.error('%s %s', msg, e, exc_info=True)
-                events.emit(events.MESSAGES, msgconst.STOP, msg)
-        else:
-            msg = 'Error creating model for "%s"' % files[0]
+        if doc is None:
+            msg = 'Error creating model for "%s"' % src
+            events.emit(events.MESSAGES, msgconst.ERROR, msg)
+            raise TranslationError('Translation is interrupted')
+
+        try:
+            if pal_translation:
+                saver(doc, dst, translate=False, convert=True, **options)
+            else:
+                saver(doc, dst, **options)
+        except Exception as e:
+            msg = 'Error while translation and saving "%s"' % src
             events.emit(events.MESSAGES, msgconst.ERROR, msg)
 
             msg = 'Translation is interrupted'
-            events.emit(events.MESSAGES, msgconst.STOP, msg)
+            LOG.error('%s %s', msg, e, exc_info=True)
+            raise TranslationError(msg)
+        finally:
+            doc.close()
+            self.flush_glyph_cache()
 
-        doc.close()
         msg = 'Translation is successful'
         events.emit(events.MESSAGES, msgconst.OK, msg)
+
+    def flush_glyph_cache(self, force=False):
+        """
+        Writes text outlines collected by translations into persistent
+        glyph cache, so other processes can reuse them. Without force
+        outlines are written once enough of them are collected.
+        """
+        if self.glyph_cache:
+            from uc2 import libpango
+            libpango.flush_glyph_disk_cache(force)
+
+    def run(self, cwd=None):
+        if '--help' in sys.argv or '-help' in sys.argv or len(sys.argv) == 1:
+            self.show_help()
+
+        files, options = self.parse_cmdline(cwd)
+
+        if options.get('batch'):
+            self.run_batch(files, options, cwd)
+        elif options.get('server'):
+            self.run_server(options, cwd)
+        elif len(sys.argv) == 2:
+            self.show_short_help('Not enough arguments!')
+
+        if not files:
+            self.show_short_help('File names are not provided!')
+        elif len(files) == 1:
+            self.show_short_help('Destination file name is not provided!')
+        elif not os.path.lexists(files[0]):
+            self.show_short_help('Source file "%s" is not found!' % files[0])
+
+        self.init_runtime(options)
+        try:
+            self.translate(files[0], files[1], options)
+        except TranslationError as e:
+            events.emit(events.MESSAGES, msgconst.STOP, str(e))
+        self.flush_glyph_cache(True)
+
         if self.do_verbose:
             echo('')
 
         sys.exit(0)
+
+    # Batch mode
+    def get_batch_jobs(self, files, options, cwd=None):
+        """
+        Returns list of (src, dst) pairs. Jobs are read from manifest
+        file (--batch=FILE, a line per job: SOURCE DESTINATION) or
+        are generated by glob pattern and output pattern.
+        Output pattern supports {name}, {ext} and {dir} fields of
+        source file: "out/{name}.svg"
+        """
+        jobs = []
+        manifest = options['batch']
+        if isinstance(manifest, str):
+            if not os.path.dirname(manifest) and cwd:
+                manifest = os.path.join(cwd, manifest)
+            if not os.path.lexists(manifest):
+                self.show_short_help('Manifest file "%s" is not found!'
+                                     % manifest)
+            base_dir = os.path.dirname(os.path.abspath(manifest))
+            fileptr = fsutils.get_fileptr(manifest)
+            lines = fileptr.readlines()
+            fileptr.close()
+            for line in lines:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                items = shlex.split(line)
+                if len(items) != 2:
+                    self.show_short_help('Wrong manifest line: %s' % line)
+                jobs.append(tuple(os.path.join(base_dir, item)
+                                  for item in items))
+        else:
+            if len(files) != 2:
+                self.show_short_help('Input and output patterns '
+                                     'are required for batch mode!')
+            pattern, out_pattern = files
+            for src in sorted(glob.glob(pattern)):
+                name, ext = os.path.splitext(os.path.basename(src))
+                dst = format_output_pattern(out_pattern, {
+                    'name': name, 'ext': ext[1:],
+                    'dir': os.path.dirname(src)})
+                jobs.append((src, dst))
+
+        destinations = {}
+        for src, dst in jobs:
+            key = os.path.normcase(os.path.abspath(dst))
+            if key in destinations:
+                self.show_short_help('Files "%s" and "%s" are translated '
+                                     'into the same file "%s"!'
+                                     % (destinations[key], src, dst))
+            destinations[key] = src
+        return jobs
+
+    def run_job(self, src, dst, options):
+        """
+        Runs single batch job. Returns (src, dst, error, time) tuple
+        where error is empty string for successful translation.
+        """
+        start = time.time()
+        error = ''
+        try:
+            dst_dir = os.path.dirname(dst)
+            if dst_dir and not os.path.lexists(dst_dir):
+                fsutils.makedirs(dst_dir)
+            if not os.path.lexists(src):
+                raise TranslationError('Source file is not found')
+            self.translate(src, dst, options)
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            LOG.error('Batch job "%s" is failed: %s', src, error)
+        return src, dst, error, time.time() - start
+
+    def run_batch(self, files, options, cwd=None):
+        jobs = self.get_batch_jobs(files, options, cwd)
+        workers = options.get('workers', self.config.batch_workers)
+        if not isinstance(workers, int) or workers < 1:
+            workers = multiprocessing.cpu_count()
+        workers = min(workers, len(jobs)) or 1
+        timeout = options.get('timeout', self.config.batch_job_timeout)
+        log_level = options.get('log', self.config.log_level)
+        self.log_filepath = os.path.join(self.appdata.app_config_dir, 'uc2.log')
+        config_logging(self.log_filepath, log_level)
+
+        start = time.time()
+        results = []
+        pending = list(reversed(jobs))
+        idle = [BatchWorker(self.path, self.cfgdir, options)
+                for _i in range(workers)]
+        busy = []
+        try:
+            while pending or busy:
+                while pending and idle:
+                    worker = idle.pop()
+                    worker.submit(pending.pop(), timeout)
+                    busy.append(worker)
+                for worker in list(busy):
+                    result = worker.get_result()
+                    if result is None:
+                        continue
+                    busy.remove(worker)
+                    idle.append(worker)
+                    results.append(result)
+                    if options.get('verbose'):
+                        status = 'FAILED' if result[2] else 'OK'
+                        echo('%-6s| %s -> %s (%.2f s)' % (
+                            status, result[0], result[1], result[3]))
+                if busy:
+                    busy[0].wait(BatchWorker.poll_interval)
+        finally:
+            for worker in idle + busy:
+                worker.stop(bool(busy))
+
+        failed = [item for item in results if item[2]]
+        echo('')
+        echo('Batch translation: %d files, %d translated, %d failed, '
+             '%d workers, %.2f s' % (len(results), len(results) - len(failed),
+                                     len(failed), workers, time.time() - start))
+        for src, dst, error, _time in failed:
+            echo('  FAILED %s: %s' % (src, error))
+        echo('')
+        sys.exit(1 if failed else 0)
+
+    # Server mode
+    def run_server(self, options, cwd=None):
+        from uc2.app_server import UCServer, ServerError
+
+        address = options['server']
+        if not isinstance(address, str):
+            self.show_short_help('Server socket path is not provided!')
+        if not os.path.dirname(address) and cwd:
+            address = os.path.join(cwd, address)
+        self.do_verbose = options.get('verbose', False)
+        log_level = options.get('log', self.config.log_level)
+        self.log_filepath = os.path.join(self.appdata.app_config_dir, 'uc2.log')
+        config_logging(self.log_filepath, log_level)
+
+        server = UCServer(self, address, options)
+        try:
+            server.start()
+        except (ServerError, socket.error) as e:
+            server.stop()
+            self.show_short_help('Cannot start server: %s' % e)
+        echo('Conversion server is listening on "%s" (%d workers)'
+             % (address, server.workers_num))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            echo('')
+        sys.exit(0)
+
+
+class TranslationError(Exception):
+    pass
+
+
+class BatchWorker(object):
+    """
+    Warm batch worker process connected by pipe. Worker is restarted
+    if the job crashes the process or exceeds timeout, so the job
+    is reported as failed and the batch goes on.
+    """
+    poll_interval = 0.05
+    process = None
+    conn = None
+    job = None
+    start_time = 0.0
+    timeout = None
+
+    def __init__(self, path, cfgdir, options):
+        self.args = (path, cfgdir, options)
+        self.start()
+
+    def start(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_batch_loop, args=(child_conn,) + self.args)
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
+
+    def restart(self):
+        self.stop(True)
+        self.start()
+
+    def stop(self, kill=False):
+        if self.process.is_alive():
+            if kill:
+                self.process.terminate()
+            else:
+                try:
+                    self.conn.send(None)
+                except (IOError, OSError):
+                    self.process.terminate()
+        self.process.join(5.0)
+        self.conn.close()
+
+    def submit(self, job, timeout=None):
+        self.job = job
+        self.timeout = timeout
+        self.start_time = time.time()
+        try:
+            self.conn.send(job)
+        except (IOError, OSError):
+            pass
+
+    def wait(self, timeout):
+        try:
+            self.conn.poll(timeout)
+        except (EOFError, IOError, OSError):
+            pass
+
+    def get_result(self):
+        """
+        Returns (src, dst, error, time) tuple of finished job
+        or None if the job is still running.
+        """
+        elapsed = time.time() - self.start_time
+        try:
+            if self.conn.poll():
+                return self.conn.recv()
+            crashed = not self.process.is_alive()
+        except (EOFError, IOError, OSError):
+            crashed = True
+        if crashed:
+            self.process.join(1.0)
+            error = 'Worker process is crashed (exit code %s)' % \
+                    self.process.exitcode
+        elif self.timeout and elapsed > self.timeout:
+            error = 'Job timeout (%s s) is exceeded' % self.timeout
+        else:
+            return None
+        LOG.error('Batch job "%s" is failed: %s', self.job[0], error)
+        self.restart()
+        return self.job[0], self.job[1], error, elapsed
+
+
+def _batch_loop(conn, path, cfgdir, options):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    app = UCApplication(path, cfgdir)
+    app.init_runtime(options, worker=True)
+    try:
+        while True:
+            try:
+                job = conn.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+            conn.send(app.run_job(job[0], job[1], options))
+    finally:
+        app.flush_glyph_cache(True)
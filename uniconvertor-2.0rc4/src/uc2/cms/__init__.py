@@ -16,6 +16,8 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import copy
+import os
+import tempfile
 from copy import deepcopy
 
 import libcms
@@ -26,6 +28,7 @@ from uc2.uc2const import COLOR_RGB, COLOR_CMYK, COLOR_LAB, COLOR_GRAY, \
 from uc2.uc2const import IMAGE_MONO, IMAGE_GRAY, IMAGE_RGB, IMAGE_CMYK, \
     IMAGE_LAB, IMAGE_TO_COLOR
 from uc2.utils import fsutils
+from uc2.utils.cache import LRUCache
 
 CS = [COLOR_RGB, COLOR_CMYK, COLOR_LAB, COLOR_GRAY]
 
@@ -447,15 +450,67 @@ def get_profile_descr(filepath):
     return ret
 
 
+def get_builtin_profile_path(profile_dir, colorspace):
+    """
+    Returns path of built-in profile file in profile directory.
+    Missing profile file is saved on first request. Concurrent
+    processes can request it at once, so profile is saved into
+    temporary file and renamed into place.
+    """
+    filename = 'built-in_%s.icm' % colorspace
+    path = fsutils.get_sys_path(os.path.join(profile_dir, filename))
+    if not fsutils.lexists(path):
+        fd, tmp_path = tempfile.mkstemp('.tmp', filename + '.',
+                                        os.path.dirname(path))
+        os.close(fd)
+        try:
+            libcms.cms_save_default_profile(tmp_path, colorspace)
+            os.rename(tmp_path, path)
+        except OSError:
+            # On Windows rename fails if other process has saved profile
+            if not fsutils.lexists(path):
+                raise
+        finally:
+            if fsutils.lexists(tmp_path):
+                os.remove(tmp_path)
+    return path
+
+
+class ProfileHandles(dict):
+    """
+    Color profile handles which are opened on first access.
+    Loader callable returns profile handle for colorspace.
+    """
+
+    def __init__(self, loader, colorspaces):
+        dict.__init__(self)
+        self.loader = loader
+        self.colorspaces = colorspaces
+
+    def __contains__(self, colorspace):
+        return colorspace in self.colorspaces
+
+    def __missing__(self, colorspace):
+        if colorspace not in self.colorspaces:
+            raise KeyError(colorspace)
+        handle = self[colorspace] = self.loader(colorspace)
+        return handle
+
+
 class ColorManager(object):
     """The class provides abstract color manager.
     On CM object instantiation default built-in profiles
-    are used to create internal stuff.
+    are used to create internal stuff. Profiles are opened
+    on first color transform.
     """
 
     handles = None
+    profile_paths = None
+    profile_dir = ''
     transforms = None
     proof_transforms = None
+    color_cache = None
+    color_cache_size = 4096
 
     use_cms = True
     use_display_profile = False
@@ -475,14 +530,38 @@ class ColorManager(object):
         """
         Sets color profile handles using built-in profiles
         """
-        self.handles = {}
+        self.profile_paths = {}
+        self.set_handles(CS)
+
+    def set_handles(self, colorspaces):
+        self.handles = ProfileHandles(self.open_profile, colorspaces)
         self.clear_transforms()
-        for item in CS:
-            self.handles[item] = libcms.cms_create_default_profile(item)
+
+    def open_profile(self, colorspace):
+        """
+        Opens profile from self.profile_paths. Built-in profile is used
+        if path is not provided, it is read from profile directory
+        if self.profile_dir is set.
+        """
+        path = self.profile_paths.get(colorspace)
+        if not path and self.profile_dir:
+            path = get_builtin_profile_path(self.profile_dir, colorspace)
+        if path:
+            return libcms.cms_open_profile_from_file(path)
+        return libcms.cms_create_default_profile(colorspace)
 
     def clear_transforms(self):
         self.transforms = {}
         self.proof_transforms = {}
+        if self.color_cache is None:
+            self.color_cache = LRUCache(self.color_cache_size)
+        self.color_cache.clear()
+
+    def get_cache_stats(self):
+        """
+        Returns (hits, misses, size) tuple of color transform cache.
+        """
+        return self.color_cache.get_stats()
 
     def get_transform(self, cs_in, cs_out):
         """
@@ -534,10 +613,39 @@ class ColorManager(object):
         if not self.use_cms:
             return do_simple_transform(color[1], cs_in, cs_out)
         in_color = colorb(color)
-        out_color = colorb()
-        transform = self.get_transform(cs_in, cs_out)
-        libcms.cms_do_transform(transform, in_color, out_color)
-        return decode_colorb(out_color, cs_out)
+        intent = self.cmyk_intent if cs_out == COLOR_CMYK else self.rgb_intent
+        key = (cs_in, cs_out, tuple(in_color), intent, self.flags)
+        ret = self.color_cache.get(key)
+        if ret is None:
+            out_color = colorb()
+            transform = self.get_transform(cs_in, cs_out)
+            libcms.cms_do_transform(transform, in_color, out_color)
+            ret = tuple(decode_colorb(out_color, cs_out))
+            self.color_cache.put(key, ret)
+        return list(ret)
+
+    def do_transforms(self, colors, cs_in, cs_out):
+        """
+        Converts list of colors between colorspaces.
+        Colors missing in cache are transformed by single lcms call.
+        Returns list of color values lists.
+        """
+        if not self.use_cms:
+            return [do_simple_transform(color[1], cs_in, cs_out)
+                    for color in colors]
+        intent = self.cmyk_intent if cs_out == COLOR_CMYK else self.rgb_intent
+        keys = [(cs_in, cs_out, tuple(colorb(color)), intent, self.flags)
+                for color in colors]
+        result = [self.color_cache.get(key) for key in keys]
+        missed = [index for index, value in enumerate(result) if value is None]
+        if missed:
+            transform = self.get_transform(cs_in, cs_out)
+            in_colors = [list(keys[index][2]) for index in missed]
+            out_colors = libcms.cms_do_transforms(transform, in_colors, cs_in)
+            for index, out_color in zip(missed, out_colors):
+                result[index] = tuple(decode_colorb(out_color, cs_out))
+                self.color_cache.put(keys[index], result[index])
+        return [list(value) for value in result]
 
     def do_bitmap_transform(self, img, mode, cs_out=None):
         """
@@ -558,10 +666,16 @@ class ColorManager(object):
         Returns list of color values.
         """
         in_color = colorb(color)
-        out_color = colorb()
-        transform = self.get_proof_transform(cs_in)
-        libcms.cms_do_transform(transform, in_color, out_color)
-        return decode_colorb(out_color, COLOR_RGB)
+        key = (cs_in, None, tuple(in_color), self.cmyk_intent,
+               self.rgb_intent, self.flags, self.use_display_profile)
+        ret = self.color_cache.get(key)
+        if ret is None:
+            out_color = colorb()
+            transform = self.get_proof_transform(cs_in)
+            libcms.cms_do_transform(transform, in_color, out_color)
+            ret = tuple(decode_colorb(out_color, COLOR_RGB))
+            self.color_cache.put(key, ret)
+        return list(ret)
 
     def do_proof_bitmap_transform(self, img):
         """
@@ -658,6 +772,26 @@ class ColorManager(object):
                        COLOR_GRAY: self.get_grayscale_color}
         return methods_map[cs](color)
 
+    def get_colors(self, colors, cs=COLOR_RGB):
+        """
+        Convert list of colors into requested colorspace.
+        Colors of the same colorspace are converted in one batch.
+        Stores alpha channel and color name.
+        """
+        ret = [None] * len(colors)
+        batches = {}
+        for index, color in enumerate(colors):
+            if color[0] in CS and color[0] != cs:
+                batches.setdefault(color[0], []).append(index)
+            else:
+                ret[index] = self.get_color(color, cs)
+        for cs_in, indexes in batches.items():
+            values = self.do_transforms([colors[i] for i in indexes], cs_in, cs)
+            for index, vals in zip(indexes, values):
+                color = colors[index]
+                ret[index] = [cs, vals, color[2], color[3]]
+        return ret
+
     def mix_colors(self, color0, color1, coef=.5):
         supported = [COLOR_RGB, COLOR_CMYK, COLOR_GRAY]
         if not color0[0] in supported:
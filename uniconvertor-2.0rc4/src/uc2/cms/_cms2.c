@@ -493,6 +493,44 @@ pycms_TransformPixels (PyObject *self, PyObject *args) {
 	return Py_BuildValue("O",  PyCObject_FromVoidPtr((void *)result, (void *)free));
 }
 
+static PyObject *
+pycms_TransformPixelBuffer (PyObject *self, PyObject *args) {
+
+	unsigned char *inbuf;
+	int inlen, count, insize, outsize;
+	void *transform;
+	cmsHTRANSFORM hTransform;
+	cmsUInt32Number in_fmt, out_fmt;
+	PyObject *result;
+
+	if (!PyArg_ParseTuple(args, "Os#i", &transform, &inbuf, &inlen, &count)) {
+		Py_INCREF(Py_None);
+		return Py_None;
+	}
+
+	hTransform = (cmsHTRANSFORM) PyCObject_AsVoidPtr(transform);
+	in_fmt = cmsGetTransformInputFormat(hTransform);
+	out_fmt = cmsGetTransformOutputFormat(hTransform);
+	insize = (T_CHANNELS(in_fmt) + T_EXTRA(in_fmt)) * T_BYTES(in_fmt);
+	outsize = (T_CHANNELS(out_fmt) + T_EXTRA(out_fmt)) * T_BYTES(out_fmt);
+
+	if (count < 0 || inlen < count * insize) {
+		Py_INCREF(Py_None);
+		return Py_None;
+	}
+
+	result = PyString_FromStringAndSize(NULL, count * outsize);
+	if (result == NULL) {
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	cmsDoTransform(hTransform, inbuf, PyString_AS_STRING(result), count);
+	Py_END_ALLOW_THREADS
+
+	return result;
+}
+
 static PyObject *
 pycms_GetVersion (PyObject *self, PyObject *args) {
 	return Py_BuildValue("i",  LCMS_VERSION);
@@ -518,6 +556,7 @@ PyMethodDef pycms_methods[] = {
 	{"getPixelsFromImage", pycms_GetPixelsFromImage, METH_VARARGS},
 	{"setImagePixels", pycms_SetImagePixels, METH_VARARGS},
 	{"transformPixels", pycms_TransformPixels, METH_VARARGS},
+	{"transformPixelBuffer", pycms_TransformPixelBuffer, METH_VARARGS},
 	{NULL, NULL}
 };
 
@@ -18,9 +18,6 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
-from PIL import Image
-
-import _cms
 
 from uc2 import uc2const
 
@@ -35,6 +32,7 @@ def get_version():
     :rtype str
     :return: version string
     """
+    import _cms
     ver = str(_cms.getVersion())
     return '%s.%s' % (ver[0], ver[2]) if ver[0] == '2' \
         else '%s.%s' % (ver[0], ver[1:])
@@ -51,6 +49,7 @@ def cms_set_alarm_codes(r, g, b):
     :param g: green channel
     :param b: blue channel
     """
+    import _cms
     if r in COLOR_RNG and g in COLOR_RNG and b in COLOR_RNG:
         _cms.setAlarmCodes(r, g, b)
     else:
@@ -66,6 +65,7 @@ def cms_open_profile_from_file(profile_path):
     :param profile_path: a valid filename path to the ICC profile
     :return: handle to lcms profile
     """
+    import _cms
     if not os.path.isfile(profile_path):
         raise CmsError('Invalid profile path provided: %s' % profile_path)
 
@@ -87,7 +87,7 @@ def cms_open_profile_from_string(profile_str):
     :param profile_str: ICC profile as a python string
     :return: handle to lcms profile
     """
-
+    import _cms
     if not len(profile_str):
         raise CmsError("Empty profile string provided")
 
@@ -342,6 +342,7 @@ def cms_create_transform(in_profile, in_mode, out_profile, out_mode,
 
     :return: handle to lcms transformation
     """
+    import _cms
 
     if intent not in INTENTS:
         raise CmsError('renderingIntent must be an integer between 0 and 3')
@@ -374,6 +375,7 @@ def cms_create_proofing_transform(in_profile, in_mode, out_profile, out_mode,
 
     :return: handle to lcms transformation
     """
+    import _cms
 
     if intent not in INTENTS:
         raise CmsError('Rendering intent must be an integer between 0 and 3')
@@ -401,6 +403,7 @@ def cms_do_transform(transform, inbuff, outbuff):
     :param inbuff: 4-member list. The members should be between 0 and 255
     :param outbuff: 4-member list. The members should be between 0 and 255
     """
+    import _cms
     if isinstance(inbuff, list) and isinstance(outbuff, list):
         ret = _cms.transformPixel(transform, *inbuff)
         outbuff[0] = ret[0]
@@ -413,6 +416,42 @@ def cms_do_transform(transform, inbuff, outbuff):
         raise CmsError(msg)
 
 
+# Packed pixel sizes of 8-bit lcms formats (see getLCMStype in _cms2.c)
+PIXEL_SIZES = {
+    uc2const.COLOR_GRAY: 1,
+    uc2const.COLOR_LAB: 3,
+}
+
+
+def cms_do_transforms(transform, inbuffs, in_mode):
+    """Transform list of color values using provided lcms transform handle.
+    All colors are packed into single buffer and transformed by one lcms call.
+
+    :param transform: valid lcms transformation handle
+    :param inbuffs: list of 4-member lists. The members should be
+                    between 0 and 255
+    :param in_mode: colorspace of transform input
+
+    :return: list of 4-member lists
+    """
+    import _cms
+    if not inbuffs:
+        return []
+    in_size = PIXEL_SIZES.get(in_mode, 4)
+    buff = bytearray()
+    for item in inbuffs:
+        buff.extend(item[:in_size])
+    count = len(inbuffs)
+    ret = _cms.transformPixelBuffer(transform, str(buff), count)
+    if ret is None:
+        raise CmsError('Cannot transform pixel buffer')
+    ret = bytearray(ret)
+    out_size = len(ret) / count
+    tail = [0] * (4 - out_size)
+    return [list(ret[i:i + out_size]) + tail
+            for i in range(0, len(ret), out_size)]
+
+
 def cms_do_bitmap_transform(transform, image, in_mode, out_mode):
     """Provides PIL images support for color management.
     Currently supports L, RGB, CMYK and LAB modes only.
@@ -424,7 +463,8 @@ def cms_do_bitmap_transform(transform, image, in_mode, out_mode):
 
     :return: new PIL image object in out_mode colorspace
     """
-
+    import _cms
+    from PIL import Image
     if image.mode not in uc2const.IMAGE_COLORSPACES:
         raise CmsError('Unsupported image type: %s' % image.mode)
 
@@ -449,6 +489,7 @@ def cms_get_profile_name(profile):
     :param profile: valid lcms profile handle
     :return: profile name string
     """
+    import _cms
     return _cms.getProfileName(profile).strip().decode('cp1252').encode('utf-8')
 
 
@@ -458,6 +499,7 @@ def cms_get_profile_info(profile):
     :param profile: valid lcms profile handle
     :return: profile description info string
     """
+    import _cms
     return _cms.getProfileInfo(profile).strip().decode('cp1252').encode('utf-8')
 
 
@@ -467,4 +509,5 @@ def cms_get_profile_copyright(profile):
     :param profile: valid lcms profile handle
     :return: profile copyright info string
     """
+    import _cms
     return _cms.getProfileInfoCopyright(profile).strip().decode('cp1252').encode('utf-8')
@@ -20,6 +20,7 @@ import os
 from importlib import import_module
 
 from fallback import fallback_check, im_loader
+from sniffing import read_header, sniff
 from uc2 import events, msgconst
 from uc2 import uc2const
 from uc2.utils import fsutils
@@ -100,6 +101,8 @@ def get_loader(path, experimental=False, return_id=False):
     ext = get_file_extension(path)
     loader = None
     ld_formats = [] + uc2const.LOADER_FORMATS
+    header = read_header(path)
+    fallback_checked = False
 
     msg = 'Start to search for loader by file extension %s' % (ext.__str__())
     events.emit(events.MESSAGES, msgconst.INFO, msg)
@@ -109,7 +112,11 @@ def get_loader(path, experimental=False, return_id=False):
     for item in ld_formats:
         if ext in uc2const.FORMAT_EXTENSION[item]:
             checker = _get_checker(item)
-            if checker and checker(path):
+            if checker is fallback_check:
+                if fallback_checked:
+                    continue
+                fallback_checked = True
+            if checker and checker(path, header):
                 loader = _get_loader(item)
                 ret_id = item
                 break
@@ -120,20 +127,25 @@ def get_loader(path, experimental=False, return_id=False):
         msg = 'Start to search loader by file content'
         events.emit(events.MESSAGES, msgconst.INFO, msg)
 
-        for item in ld_formats:
+        for item in sniff(header, ld_formats):
             checker = _get_checker(item)
+            if checker is fallback_check:
+                # Bitmap formats share the same checker
+                if fallback_checked:
+                    continue
+                fallback_checked = True
             if checker is not None:
-                if checker(path):
+                if checker(path, header):
                     loader = _get_loader(item)
                     ret_id = item
                     break
 
-    if loader is None:
+    if loader is None and not fallback_checked:
         msg = 'By file content loader is not found for %s' % path
         events.emit(events.MESSAGES, msgconst.WARNING, msg)
         msg = 'Try using fallback loader'
         events.emit(events.MESSAGES, msgconst.INFO, msg)
-        if fallback_check(path):
+        if fallback_check(path, header):
             loader = im_loader
 
     if loader is None:
@@ -17,9 +17,8 @@
 
 from uc2.formats.aco.aco_const import ACO1_VER, ACO2_VER
 from uc2.formats.aco.aco_presenter import ACO_Presenter
-from uc2.formats.sk2.sk2_presenter import SK2_Presenter
 from uc2.formats.skp.skp_presenter import SKP_Presenter
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -36,6 +35,7 @@ def aco_loader(appdata, filename=None, fileptr=None, translate=True,
     if translate:
         skp_doc = SKP_Presenter(appdata, cnf)
         doc.convert_to_skp(skp_doc)
+        from uc2.formats.sk2.sk2_presenter import SK2_Presenter
         sk2_doc = SK2_Presenter(appdata, cnf)
         skp_doc.translate_to_sk2(sk2_doc)
         doc.close()
@@ -65,8 +65,6 @@ def aco_saver(doc, filename=None, fileptr=None, translate=True,
         doc.save(filename, fileptr)
 
 
-def check_aco(path):
-    fileptr = get_fileptr(path)
-    string = fileptr.read(2)
-    fileptr.close()
-    return string in (ACO1_VER, ACO2_VER)
+def check_aco(path, header=None):
+    header = get_header(path, header)
+    return header[:2] in (ACO1_VER, ACO2_VER)
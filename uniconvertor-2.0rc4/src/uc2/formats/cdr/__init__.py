@@ -18,7 +18,7 @@
 from uc2.formats.cdr import cdr_const
 from uc2.formats.cdr.cdr_presenter import CDR_Presenter
 from uc2.formats.sk2.sk2_presenter import SK2_Presenter
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -42,10 +42,8 @@ def cdr_saver(cdr_doc, filename=None, fileptr=None, translate=True, cnf=None,
     cdr_doc.save(filename)
 
 
-def check_cdr(path):
-    fileptr = get_fileptr(path)
-    header = fileptr.read(12)
-    fileptr.close()
+def check_cdr(path, header=None):
+    header = get_header(path, header)[:12]
     if not header[:4] == cdr_const.RIFF_ID:
         return False
     if header[8:] in cdr_const.CDR_VERSIONS:
@@ -15,11 +15,15 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import zlib
+
 from uc2 import _, events
 from uc2.utils import get_chunk_size, dword2py_int, py_int2dword
 from uc2.formats.riff import model
+from uc2.formats.riff.riff_filters import map_file, map_data, skip, \
+    decompress, RIFF_Saver
 from uc2.formats.cdr.cdr_model import generic_dict
-from uc2.formats.generic_filters import AbstractLoader, AbstractSaver
+from uc2.formats.generic_filters import AbstractLoader
 
 
 class CDR_Loader(AbstractLoader):
@@ -39,7 +43,7 @@ class CDR_Loader(AbstractLoader):
 
     def do_load(self):
         self.parent_stack = []
-        self.model = self.parse_file(self.fileptr)
+        self.model = self.parse_file(map_file(self.fileptr))
 
     def report_position(self, position):
         if 100.0 * (position - self.file_position) / self.file_size > 3.0:
@@ -94,12 +98,14 @@ class CDR_Loader(AbstractLoader):
         offset = fileptr.tell()
 
         if list_identifier == 'cmpr':
-            fileptr.seek(offset)
             self.stream_start = offset
-            self.stream_size = get_chunk_size(size_field)
-            chunk = fileptr.read(size - 4)
-            return self.parse_cmpr_list(identifier + size_field + \
-                                        list_identifier + chunk)
+            self.stream_size = size
+            obj = model.RiffCmprList(identifier + size_field +
+                                     list_identifier + fileptr.read(12))
+            obj.set_source(fileptr, offset + 12, size - 16,
+                           self.parse_cmpr_list)
+            skip(fileptr, offset + size - 4)
+            return obj
 
         class_ = self.get_class(identifier, list_identifier)
         obj = class_(identifier + size_field + list_identifier)
@@ -107,10 +113,11 @@ class CDR_Loader(AbstractLoader):
         while fileptr.tell() <= offset + size - 8:
             ret = self.parse_stream(fileptr)
             if ret is None:
-                fileptr.seek(offset)
-                chunk = fileptr.read(size - 4)
-                return model.RiffUnparsedList(identifier + size_field + \
-                                              list_identifier + chunk)
+                obj = model.RiffUnparsedList(identifier + size_field +
+                                             list_identifier)
+                obj.set_source(fileptr, offset, size - 4)
+                skip(fileptr, offset + size - 4)
+                return obj
             else:
                 obj.childs.append(ret)
 
@@ -121,32 +128,31 @@ class CDR_Loader(AbstractLoader):
             return None
         size_field = fileptr.read(4)
         size = get_chunk_size(size_field)
-        chunk = fileptr.read(size)
-        self.report_position(fileptr.tell())
         class_ = self.get_class(identifier)
-        return class_(identifier + size_field + chunk)
-
-    def parse_cmpr_list(self, buff):
-        obj = model.RiffCmprList(buff)
-        import StringIO, zlib
-        compressedsize = dword2py_int(buff[12:16])
+        obj = class_(identifier + size_field)
+        obj.set_source(fileptr, fileptr.tell(), size)
+        skip(fileptr, fileptr.tell() + size)
+        self.report_position(fileptr.tell())
+        return obj
 
-        decomp = zlib.decompressobj()
-        uncompresseddata = decomp.decompress(buff[36:])
+    def parse_cmpr_list(self, obj):
+        compressedsize = obj.compressedsize
+        uncompresseddata = decompress(obj.source, obj.offset + 12,
+                                      obj.size - 12)
 
-        blocksizesdata = zlib.decompress(buff[36 + compressedsize:])
+        blocksizesdata = zlib.decompress(
+            buffer(obj.source, obj.offset + 12 + compressedsize,
+                   obj.size - 12 - compressedsize))
         blocksizes = []
         for i in range(0, len(blocksizesdata), 4):
             blocksizes.append(dword2py_int(blocksizesdata[i:i + 4]))
 
-        stream = StringIO.StringIO(uncompresseddata)
+        stream = map_data(uncompresseddata)
         self.stream_decompr_size = len(uncompresseddata)
         while stream.tell() < len(uncompresseddata):
             ret = self.parse_comressed_stream(stream, blocksizes)
             obj.childs.append(ret)
 
-        return obj
-
     def parse_comressed_stream(self, stream, blocksizes):
         identifier = stream.read(4)
         if identifier == 'LIST':
@@ -170,10 +176,11 @@ class CDR_Loader(AbstractLoader):
         while stream.tell() <= offset + size - 8:
             ret = self.parse_comressed_stream(stream, blocksizes)
             if ret is None:
-                stream.seek(offset)
-                chunk = stream.read(size - 4)
-                return model.RiffUnparsedList(identifier + size_field + \
-                                              list_identifier + chunk)
+                obj = model.RiffUnparsedList(identifier + size_field +
+                                             list_identifier)
+                obj.set_source(stream, offset, size - 4)
+                skip(stream, offset + size - 4)
+                return obj
             else:
                 obj.childs.append(ret)
 
@@ -186,14 +193,13 @@ class CDR_Loader(AbstractLoader):
         size = blocksizes[rawsize]
         size_field = py_int2dword(size)
         if size & 1: size += 1
-        chunk = stream.read(size)
-        self.report_stream_position(stream.tell())
         class_ = self.get_class(identifier)
-        return class_(identifier + size_field + chunk)
+        obj = class_(identifier + size_field)
+        obj.set_source(stream, stream.tell(), size)
+        skip(stream, stream.tell() + size)
+        self.report_stream_position(stream.tell())
+        return obj
 
 
-class CDR_Saver(AbstractSaver):
+class CDR_Saver(RIFF_Saver):
     name = 'CDR_Saver'
-
-    def do_save(self):
-        self.fileptr.write(self.model.get_chunk())
@@ -19,7 +19,10 @@ import struct
 from colorsys import yiq_to_rgb, hls_to_rgb, hsv_to_rgb
 
 from uc2 import uc2const, cms
-from uc2.utils import double2py_float, word2py_int, long2py_float
+from uc2.sk2const import NODE_CUSP, NODE_SMOOTH, NODE_SYMMETRICAL, \
+    CURVE_CLOSED, CURVE_OPENED
+from uc2.utils import double2py_float, word2py_int, long2py_float, \
+    dword2py_int
 from uc2.formats.cdr.cdr_const import cdrunit_to_pt, \
     CDR_COLOR_CMYK, CDR_COLOR_BGR, CDR_COLOR_CMY, CDR_COLOR_CMYK255, \
     CDR_COLOR_GRAY, CDR_COLOR_LAB, CDR_COLOR_REGISTRATION, CDR_COLOR_CMYK2, \
@@ -217,6 +220,64 @@ def parse_size_value(data):
     return long2py_float(data) * cdrunit_to_pt
 
 
+def parse_curve_paths(data, offset):
+    """
+    Decodes curve points block (points number, coordinates and
+    point flags) starting from offset.
+    Returns (points number, paths) tuple.
+    """
+    pointnum = dword2py_int(data[offset:offset + 4])
+    start = offset + 4
+    end = start + 8 * pointnum
+    coords = struct.unpack('<%dl' % (2 * pointnum), data[start:end])
+    coords = [item * cdrunit_to_pt for item in coords]
+    flags = bytearray(data[end:end + pointnum])
+
+    paths = []
+    path = []
+    points = []
+    point1 = []
+    point2 = []
+    for i, point_type in enumerate(flags):
+        point = [coords[2 * i], coords[2 * i + 1]]
+        node_type = point_type & 0xc0
+        if not node_type:
+            if path:
+                path += [points, CURVE_OPENED]
+                paths.append(path)
+            path = [point]
+            points = []
+            point1 = []
+            point2 = []
+        elif node_type == 0x40:
+            points.append(point)
+            point1 = []
+            point2 = []
+        elif node_type == 0x80:
+            if point_type & 0x20:
+                marker = NODE_SYMMETRICAL
+            elif point_type & 0x10:
+                marker = NODE_SMOOTH
+            else:
+                marker = NODE_CUSP
+            points.append([point1, point2, point, marker])
+            point1 = []
+            point2 = []
+        elif point1:
+            point2 = point
+        else:
+            point1 = point
+        if point_type & 8 and path and points:
+            path += [points, CURVE_CLOSED]
+            paths.append(path)
+            path = []
+            points = []
+    if path:
+        path += [points, CURVE_OPENED]
+        paths.append(path)
+    return pointnum, paths
+
+
 def get_cdr_color(color):
     """
     Converts color list to CDR colorspace and color valbytes
@@ -20,6 +20,7 @@ import zipfile
 from uc2.formats.cdrz import const
 from uc2.formats.cdrz.presenter import CDRZ_Presenter
 from uc2.formats.pdxf.presenter import PDXF_Presenter
+from uc2.formats.sniffing import get_header
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -41,8 +42,9 @@ def cdrz_saver(cdr_doc, filename, translate=True, cnf=None, **kw):
     cdr_doc.save(filename)
 
 
-def check_cdrz(path):
-    if not zipfile.is_zipfile(path):
+def check_cdrz(path, header=None):
+    if not get_header(path, header)[:2] == 'PK' or \
+            not zipfile.is_zipfile(path):
         return False
 
     cdrz_file = zipfile.ZipFile(path, 'r')
@@ -23,7 +23,7 @@ from uc2 import uc2const, utils
 from uc2.formats.cgm.cgm_const import CGM_SIGNATURE
 from uc2.formats.cgm.cgm_presenter import CGM_Presenter
 from uc2.formats.sk2.sk2_presenter import SK2_Presenter
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -56,7 +56,6 @@ def cgm_saver(sk2_doc, filename=None, fileptr=None,
         sk2_doc.save(filename, fileptr)
 
 
-def check_cgm(path):
-    with get_fileptr(path) as fileptr:
-        sign = fileptr.read(2)
+def check_cgm(path, header=None):
+    sign = get_header(path, header)[:2]
     return utils.uint16_be(sign) & 0xffe0 == CGM_SIGNATURE
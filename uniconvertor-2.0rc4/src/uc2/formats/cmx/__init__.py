@@ -20,7 +20,7 @@ from uc2 import uc2const
 from uc2.formats.cmx import cmx_const
 from uc2.formats.cmx.cmx_presenter import CMX_Presenter
 from uc2.formats.sk2.sk2_presenter import SK2_Presenter
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -52,9 +52,8 @@ def cmx_saver(sk2_doc, filename=None, fileptr=None,
         sk2_doc.save(filename, fileptr)
 
 
-def check_cmx(path):
-    with get_fileptr(path) as fileptr:
-        riff_sign = fileptr.read(4) in (cmx_const.ROOT_ID, cmx_const.ROOTX_ID)
-        _size = fileptr.read(4)
-        cmx_sign = fileptr.read(4) == cmx_const.CMX_ID
+def check_cmx(path, header=None):
+    header = get_header(path, header)
+    riff_sign = header[:4] in (cmx_const.ROOT_ID, cmx_const.ROOTX_ID)
+    cmx_sign = header[8:12] == cmx_const.CMX_ID
     return riff_sign and cmx_sign
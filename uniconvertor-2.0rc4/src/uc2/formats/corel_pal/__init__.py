@@ -16,9 +16,8 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 from uc2.formats.corel_pal.corel_pal_presenter import CorelPalette_Presenter
-from uc2.formats.sk2.sk2_presenter import SK2_Presenter
 from uc2.formats.skp.skp_presenter import SKP_Presenter
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header_lines
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -35,6 +34,7 @@ def corel_pal_loader(appdata, filename=None, fileptr=None, translate=True,
     if translate:
         skp_doc = SKP_Presenter(appdata, cnf)
         doc.convert_to_skp(skp_doc)
+        from uc2.formats.sk2.sk2_presenter import SK2_Presenter
         sk2_doc = SK2_Presenter(appdata, cnf)
         skp_doc.translate_to_sk2(sk2_doc)
         doc.close()
@@ -64,15 +64,8 @@ def corel_pal_saver(doc, filename=None, fileptr=None, translate=True,
         doc.save(filename, fileptr)
 
 
-def check_corel_pal(path):
-    fileptr = get_fileptr(path)
-    ret = False
-    i = 0
-    while i < 20:
-        line = fileptr.readline()
+def check_corel_pal(path, header=None):
+    for line in get_header_lines(path, header):
         if not line.find('<palette') == -1:
-            ret = True
-            break
-        i += 1
-    fileptr.close()
-    return ret
+            return True
+    return False
@@ -157,6 +157,17 @@ class CorelPalette_Methods:
         else:
             return verbose_color(color)
 
+    def add_colors(self, colors):
+        supported = [COLOR_RGB, COLOR_CMYK, COLOR_GRAY, COLOR_SPOT]
+        indexes = [i for i, color in enumerate(colors)
+                   if color[0] not in supported]
+        colors = list(colors)
+        converted = self.cms.get_colors([colors[i] for i in indexes])
+        for index, color in zip(indexes, converted):
+            colors[index] = color
+        for color in colors:
+            self.add_color(color)
+
     def add_color(self, color):
         if color[0] == COLOR_SPOT:
             self.add_spot_color(color)
@@ -70,8 +70,7 @@ class CorelPalette_Presenter(TaggedModelPresenter):
             for item in skp.comments.splitlines():
                 comments += item + '\n'
         mtds.set_palette_comments(comments.decode('utf-8').encode(encoding))
-        for item in skp.colors:
-            mtds.add_color(item)
+        mtds.add_colors(skp.colors)
         mtds.clear_model()
 
     def convert_to_skp(self, skp_doc):
@@ -15,16 +15,15 @@
 # 	You should have received a copy of the GNU General Public License
 # 	along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from uc2 import libimg
 from uc2 import uc2const, sk2const
-from uc2.formats.sk2 import sk2_model
-from uc2.formats.sk2.sk2_presenter import SK2_Presenter
-from uc2.utils.fsutils import get_fileptr
 from uc2.utils.mixutils import merge_cnf
 
 
 def im_loader(appdata, filename=None, fileptr=None, translate=True, cnf=None,
               **kw):
+    from uc2.formats.sk2 import sk2_model
+    from uc2.formats.sk2.sk2_presenter import SK2_Presenter
+
     cnf = merge_cnf(cnf, kw)
 
     sk2_doc = SK2_Presenter(appdata, cnf)
@@ -57,5 +56,6 @@ def im_loader(appdata, filename=None, fileptr=None, translate=True, cnf=None,
     return sk2_doc
 
 
-def fallback_check(path):
+def fallback_check(path, header=None):
+    from uc2 import libimg
     return libimg.check_image(path)
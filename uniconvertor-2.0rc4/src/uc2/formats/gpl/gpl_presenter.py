@@ -61,8 +61,9 @@ class GPL_Presenter(TextModelPresenter):
         self.model.columns = skp_model.columns
         self.model.comments = 'Palette source: ' + skp_model.source
         self.model.comments += '\n' + skp_model.comments
-        for item in skp_model.colors:
-            r, g, b = self.cms.get_rgb_color255(item)
+        rgb_colors = self.cms.get_colors(skp_model.colors, COLOR_RGB)
+        for item, color in zip(skp_model.colors, rgb_colors):
+            r, g, b = cms.val_255(color[1])
             self.model.colors.append([r, g, b, item[3]])
 
     def convert_to_skp(self, skp_doc):
@@ -17,9 +17,8 @@
 
 from uc2.formats.jcw.jcw_const import JCW_ID
 from uc2.formats.jcw.jcw_presenter import JCW_Presenter
-from uc2.formats.sk2.sk2_presenter import SK2_Presenter
 from uc2.formats.skp.skp_presenter import SKP_Presenter
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -36,6 +35,7 @@ def jcw_loader(appdata, filename=None, fileptr=None, translate=True,
     if translate:
         skp_doc = SKP_Presenter(appdata, cnf)
         doc.convert_to_skp(skp_doc)
+        from uc2.formats.sk2.sk2_presenter import SK2_Presenter
         sk2_doc = SK2_Presenter(appdata, cnf)
         skp_doc.translate_to_sk2(sk2_doc)
         doc.close()
@@ -65,8 +65,6 @@ def jcw_saver(doc, filename=None, fileptr=None, translate=True,
         doc.save(filename, fileptr)
 
 
-def check_jcw(path):
-    fileptr = get_fileptr(path)
-    string = fileptr.read(len(JCW_ID))
-    fileptr.close()
-    return string == JCW_ID
+def check_jcw(path, header=None):
+    header = get_header(path, header)
+    return header[:len(JCW_ID)] == JCW_ID
@@ -60,11 +60,11 @@ class JCW_Presenter(BinaryModelPresenter):
             colorspace = JCW_RGB
 
         self.model = JCW_Palette(colorspace, namesize)
-        for color in skp_model.colors:
-            if colorspace == JCW_CMYK:
-                clr = self.cms.get_cmyk_color(color)
-            else:
-                clr = self.cms.get_rgb_color(color)
+        if colorspace == JCW_CMYK:
+            colors = self.cms.get_colors(skp_model.colors, uc2const.COLOR_CMYK)
+        else:
+            colors = self.cms.get_colors(skp_model.colors, uc2const.COLOR_RGB)
+        for color, clr in zip(skp_model.colors, colors):
             if clr[3]:
                 clr[3] = clr[3].encode('iso-8859-1', errors='ignore')
             if not clr[3]:
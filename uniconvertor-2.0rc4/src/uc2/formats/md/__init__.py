@@ -31,5 +31,5 @@ def md_saver(doc, filename=None, fileptr=None, translate=True, cnf=None, **kw):
     doc.save(filename)
 
 
-def check_md(path):
+def check_md(path, header=None):
     return ".md" in path
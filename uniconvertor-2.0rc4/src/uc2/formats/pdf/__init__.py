@@ -17,7 +17,8 @@
 
 from uc2.formats.pdf.pdf_filters import PDF_Saver
 from uc2.formats.pdf.pdfconst import PDF_SIGNATURE
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header
+from uc2.libimg.downsampling import get_downsampler
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -31,12 +32,20 @@ def pdf_saver(sk2_doc, filename=None, fileptr=None, translate=True, cnf=None,
     cnf = merge_cnf(cnf, kw)
     sk2_saver = sk2_doc.saver
     sk2_doc.saver = PDF_Saver()
-    sk2_doc.save(filename, fileptr)
-    sk2_doc.saver = sk2_saver
+    if 'stepped-gradients' in cnf.keys():
+        stepped = str(cnf['stepped-gradients']) in ('True', '1')
+        sk2_doc.saver.stepped_gradients = stepped
+    downsampler = get_downsampler(cnf)
+    if downsampler:
+        downsampler.apply(sk2_doc.model)
+    try:
+        sk2_doc.save(filename, fileptr)
+    finally:
+        if downsampler:
+            downsampler.restore()
+        sk2_doc.saver = sk2_saver
 
 
-def check_pdf(path):
-    fileptr = get_fileptr(path)
-    string = fileptr.read(len(PDF_SIGNATURE))
-    fileptr.close()
-    return string == PDF_SIGNATURE
+def check_pdf(path, header=None):
+    header = get_header(path, header)
+    return header[:len(PDF_SIGNATURE)] == PDF_SIGNATURE
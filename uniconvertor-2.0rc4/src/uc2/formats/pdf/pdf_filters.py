@@ -24,6 +24,7 @@ import pdfgen
 
 class PDF_Saver(AbstractSaver):
     name = 'PDF_Saver'
+    stepped_gradients = False
 
     def do_save(self):
         renderer = pdfgen.PDFGenerator(self.fileptr, self.presenter.cms)
@@ -53,6 +54,7 @@ class PDF_Saver(AbstractSaver):
         # ---PDF doc data end
 
         renderer.set_compression(True)
+        renderer.set_stepped_gradients(self.stepped_gradients)
 
         methods = self.presenter.methods
         desktop_layers = methods.get_desktop_layers()
@@ -64,11 +66,13 @@ class PDF_Saver(AbstractSaver):
         for page in pages:
             w, h = methods.get_page_size(page)
             renderer.start_page(w, h)
+            page_bbox = [-w / 2.0, -h / 2.0, w / 2.0, h / 2.0]
 
             layers = desktop_layers + methods.get_layers(page)
             layers += master_layers
             for layer in layers:
                 if methods.is_layer_visible(layer):
-                    renderer.render(layer.childs, True)
+                    objs = layer.query_bbox(page_bbox, visual=True)
+                    renderer.render(objs, True)
             renderer.end_page()
         renderer.save()
@@ -15,17 +15,54 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import hashlib
 import math
+from cStringIO import StringIO
 from copy import deepcopy
+
+import reportlab
 from reportlab.lib.colors import CMYKColorSep, Color, CMYKColor
+from reportlab.lib.rl_accel import fp_str
 from reportlab.lib.utils import ImageReader
-from reportlab.pdfbase.pdfdoc import PDFInfo, PDFString, PDFDate, PDFDictionary
+from reportlab.pdfbase.pdfdoc import PDFInfo, PDFString, PDFDate, \
+    PDFDictionary, PDFArray, PDFName, PDFStream, PDFAxialShading, \
+    PDFRadialShading, PDFExponentialFunction, PDFStitchingFunction, \
+    PDFImageXObject, PDFObjectReference
+from reportlab.pdfgen import canvas as rl_canvas
 from reportlab.pdfgen.canvas import Canvas, FILL_EVEN_ODD, FILL_NON_ZERO
 
 from pdfconst import PDF_VERSION_DEFAULT
 from uc2 import _, uc2const, events
 from uc2 import libgeom, libcairo, sk2const
 from uc2.formats.sk2 import sk2_model
+from uc2.libimg.handlers import JPEG_FMT
+
+
+def check_extgstate():
+    """
+    Soft masks are put into ExtGState cache of reportlab canvas,
+    which has no public API. Checks that reportlab version and cache
+    layout are known, otherwise translucent gradients are stepped.
+    """
+    if reportlab.Version.split('.')[0] not in ('2', '3'):
+        return False
+    try:
+        state = rl_canvas.ExtGState()
+        return isinstance(state._c, dict) and hasattr(state, 'getState')
+    except Exception:
+        return False
+
+
+EXTGSTATE_SUPPORTED = check_extgstate()
+
+
+def get_image_hash(image, alpha_channel=None):
+    digest = hashlib.md5()
+    for item in (image, alpha_channel):
+        if item is not None:
+            digest.update('%s%r' % (item.mode, item.size))
+            digest.update(item.tobytes())
+    return digest.hexdigest()
 
 
 class UC2PDFInfo(PDFInfo):
@@ -56,12 +93,15 @@ class PDFGenerator(object):
     canvas = None
     colorspace = None
     use_spot = True
+    stepped_gradients = False
     num_pages = 0
     page_count = 0
     prgs_msg = _('Saving in progress...')
 
     def __init__(self, fileptr, cms, version=PDF_VERSION_DEFAULT):
         self.cms = cms
+        self.xobjects = {}
+        self.patterns = {}
         self.canvas = Canvas(fileptr, pdfVersion=version[0])
         self.info = UC2PDFInfo(self.canvas._doc)
         self.info.pdfxversion = version[1]
@@ -97,6 +137,9 @@ class PDFGenerator(object):
     def set_spot_usage(self, val=True):
         self.use_spot = val
 
+    def set_stepped_gradients(self, val=True):
+        self.stepped_gradients = val
+
     # ---Page processing
 
     def set_num_pages(self, num=1):
@@ -234,8 +277,8 @@ class PDFGenerator(object):
             fillrule = FILL_NON_ZERO
         self.canvas._fillMode = fillrule
 
-    def set_rgb_values(self, color, pdfcolor):
-        r, g, b = self.cms.get_rgb_color(color)[1]
+    def set_rgb_values(self, color, pdfcolor, rgb=None):
+        r, g, b = (rgb or self.cms.get_rgb_color(color))[1]
         density = pdfcolor.density
         if density < 1:
             r = density * (r - 1) + 1
@@ -243,22 +286,26 @@ class PDFGenerator(object):
             b = density * (b - 1) + 1
         pdfcolor.red, pdfcolor.green, pdfcolor.blue = (r, g, b)
 
-    def get_pdfcolor(self, color):
+    def get_pdfcolor(self, color, rgb=None, cmyk=None, gray=None):
+        """
+        Returns reportlab color. RGB, CMYK and grayscale variants
+        of the color can be provided by batch conversion.
+        """
         alpha = color[2]
         if self.use_spot and color[0] == uc2const.COLOR_SPOT:
-            c, m, y, k = self.cms.get_cmyk_color(color)[1]
+            c, m, y, k = (cmyk or self.cms.get_cmyk_color(color))[1]
             spotname = color[3]
             if spotname == uc2const.COLOR_REG:
                 spotname = 'All'
             pdfcolor = CMYKColorSep(c, m, y, k, spotName=spotname, alpha=alpha)
         elif self.colorspace == uc2const.COLOR_CMYK:
-            c, m, y, k = self.cms.get_cmyk_color(color)[1]
+            c, m, y, k = (cmyk or self.cms.get_cmyk_color(color))[1]
             pdfcolor = CMYKColor(c, m, y, k, alpha=alpha)
         elif self.colorspace == uc2const.COLOR_RGB:
-            r, g, b = self.cms.get_rgb_color(color)[1]
+            r, g, b = (rgb or self.cms.get_rgb_color(color))[1]
             return Color(r, g, b, alpha)
         elif self.colorspace == uc2const.COLOR_GRAY:
-            gray = self.cms.get_grayscale_color(color)
+            gray = gray or self.cms.get_grayscale_color(color)
             k = 1.0 - gray[1][0]
             c = m = y = 0.0
             pdfcolor = CMYKColor(c, m, y, k, alpha=alpha)
@@ -271,12 +318,23 @@ class PDFGenerator(object):
                 c = m = y = 0.0
                 pdfcolor = CMYKColor(c, m, y, k, alpha=alpha)
             else:
-                c, m, y, k = self.cms.get_cmyk_color(color)[1]
+                c, m, y, k = (cmyk or self.cms.get_cmyk_color(color))[1]
                 pdfcolor = CMYKColor(c, m, y, k, alpha=alpha)
 
-        self.set_rgb_values(color, pdfcolor)
+        self.set_rgb_values(color, pdfcolor, rgb)
         return pdfcolor
 
+    def get_pdfcolors(self, colors):
+        # Required color transforms are done in batches
+        none = [None] * len(colors)
+        rgbs, cmyks, grays = self.cms.get_colors(colors), none, none
+        if self.colorspace == uc2const.COLOR_GRAY:
+            grays = self.cms.get_colors(colors, uc2const.COLOR_GRAY)
+        elif self.colorspace != uc2const.COLOR_RGB:
+            cmyks = self.cms.get_colors(colors, uc2const.COLOR_CMYK)
+        return [self.get_pdfcolor(*item)
+                for item in zip(colors, rgbs, cmyks, grays)]
+
     def stroke_pdfpath(self, pdfpath, stroke_style, stroke_trafo=None):
         stroke_trafo = stroke_trafo or []
 
@@ -326,37 +384,126 @@ class PDFGenerator(object):
                 if stop[1][2] < 1.0:
                     transparency = True
                     break
-            if transparency:
+            stepped = self.stepped_gradients or not EXTGSTATE_SUPPORTED
+            if transparency and stepped:
                 self.fill_tr_gradient(obj, pdfpath, fill_trafo, gradient)
             else:
-                self.fill_gradient(pdfpath, fill_trafo, gradient)
+                self.fill_gradient(obj, pdfpath, fill_trafo, gradient)
 
         elif fill_style[1] == sk2const.FILL_PATTERN:
             pattern = fill_style[2]
             self.fill_pattern(obj, pdfpath, fill_trafo, pattern)
 
-    def fill_gradient(self, pdfpath, fill_trafo, gradient):
+    def get_shading_function(self, values, positions):
+        """
+        Builds PDF function (exponential for two stops and
+        stitching for more stops) interpolating stop values.
+        """
+        if len(values) == 1:
+            values = values * 2
+            positions = [0.0, 1.0]
+        if positions[0] > 0.0:
+            values = values[:1] + values
+            positions = [0.0] + positions
+        if positions[-1] < 1.0:
+            values = values + values[-1:]
+            positions = positions + [1.0]
+        functions = [PDFExponentialFunction(N=1, C0=values[i],
+                                            C1=values[i + 1])
+                     for i in range(len(values) - 1)]
+        if len(functions) == 1:
+            return functions[0]
+        return PDFStitchingFunction(functions, positions[1:-1],
+                                    [0.0, 1.0] * len(functions),
+                                    Domain='[0.0 1.0]')
+
+    def get_shading(self, gradient, values, colorspace):
+        sp, ep = gradient[1]
+        positions = [stop[0] for stop in gradient[2]]
+        function = self.get_shading_function(values, positions)
+        if gradient[0] == sk2const.GRADIENT_RADIAL:
+            x, y = sp
+            radius = libgeom.distance(sp, ep)
+            return PDFRadialShading(x, y, 0.0, x, y, radius,
+                                    Function=function, ColorSpace=colorspace,
+                                    Extend='[true true]')
+        x0, y0 = sp
+        x1, y1 = ep
+        return PDFAxialShading(x0, y0, x1, y1, Function=function,
+                               ColorSpace=colorspace, Extend='[true true]')
+
+    def get_shading_colors(self, colors):
+        """
+        Returns shading colorspace and stop color values.
+        Spot colors are shaded as their CMYK alternatives.
+        """
+        if all(isinstance(color, CMYKColor) for color in colors):
+            return 'DeviceCMYK', [[value * color.density
+                                   for value in color.cmyk()]
+                                  for color in colors]
+        return 'DeviceRGB', [list(color.rgb()) for color in colors]
+
+    def set_alpha_mask(self, obj, fill_trafo, gradient):
+        """
+        Sets soft mask of luminosity group painted by grayscale
+        shading of stop alpha values. Mask is defined in current
+        (fill) coordinate system.
+        """
+        doc = self.canvas._doc
+        alphas = [[stop[1][2]] for stop in gradient[2]]
+        shading = self.get_shading(gradient, alphas, 'DeviceGray')
+
+        if fill_trafo:
+            inv_trafo = libgeom.invert_trafo(fill_trafo)
+        else:
+            inv_trafo = [] + sk2const.NORMAL_TRAFO
+        paths = libgeom.apply_trafo_to_paths(obj.paths, obj.trafo)
+        paths = libgeom.apply_trafo_to_paths(paths, inv_trafo)
+        bbox = libgeom.normalize_bbox(libgeom.get_paths_bbox(paths))
+
+        group = PDFDictionary({'Type': PDFName('Group'),
+                               'S': PDFName('Transparency'),
+                               'CS': PDFName('DeviceGray')})
+        resources = PDFDictionary({'Shading': PDFDictionary(
+            {'Sh0': doc.Reference(shading)})})
+        form = PDFStream(PDFDictionary({'Type': PDFName('XObject'),
+                                        'Subtype': PDFName('Form'),
+                                        'FormType': 1,
+                                        'BBox': PDFArray(bbox),
+                                        'Group': group,
+                                        'Resources': resources}),
+                         '/Sh0 sh')
+        mask = PDFDictionary({'Type': PDFName('Mask'),
+                              'S': PDFName('Luminosity'),
+                              'G': doc.Reference(form)})
+        self.set_extgstate('SMask', mask)
+
+    def set_extgstate(self, key, value):
+        """
+        Sets graphics state parameter which has no canvas API.
+        Parameter is registered in canvas ExtGState cache to get
+        into page resources. It is the only place which relies
+        on reportlab internals (see check_extgstate()).
+        """
+        states = self.canvas._extgstate._c
+        name = 'gUCs%d' % len(states)
+        states[(key, value)] = name
+        self.canvas._code.append('/%s gs' % name)
+
+    def fill_gradient(self, obj, pdfpath, fill_trafo, gradient):
         self.canvas.saveState()
         self.canvas.clipPath(pdfpath, 0, 0)
         if fill_trafo:
             self.canvas.transform(*fill_trafo)
-        grad_type = gradient[0]
-        sp, ep = gradient[1]
         stops = gradient[2]
-        colors = []
-        positions = []
-        for offset, color in stops:
-            positions.append(offset)
-            colors.append(self.get_pdfcolor(color))
-        if grad_type == sk2const.GRADIENT_RADIAL:
-            radius = libgeom.distance(sp, ep)
-            self.canvas.radialGradient(sp[0], sp[1], radius, colors,
-                                       positions, True)
-        else:
-            x0, y0 = sp
-            x1, y1 = ep
-            self.canvas.linearGradient(x0, y0, x1, y1, colors,
-                                       positions, True)
+        alphas = set([stop[1][2] for stop in stops])
+        if len(alphas) > 1:
+            self.set_alpha_mask(obj, fill_trafo, gradient)
+        elif alphas.pop() < 1.0:
+            self.canvas.setFillAlpha(stops[0][1][2])
+        colors = self.get_pdfcolors([stop[1] for stop in stops])
+        colorspace, values = self.get_shading_colors(colors)
+        self.canvas.shade(self.get_shading(gradient, values, colorspace))
         self.canvas.restoreState()
 
     def fill_tr_gradient(self, obj, pdfpath, fill_trafo, gradient):
@@ -489,30 +636,84 @@ class PDFGenerator(object):
 
         self.canvas.restoreState()
 
-    def draw_image(self, image, alpha_channel=None):
-        if not image:
-            return
-        if self.colorspace == uc2const.COLOR_CMYK:
-            image = self.cms.convert_image(image, uc2const.IMAGE_CMYK)
-        elif self.colorspace == uc2const.COLOR_RGB:
-            image = self.cms.convert_image(image, uc2const.IMAGE_RGB)
-        elif self.colorspace == uc2const.COLOR_GRAY:
-            image = self.cms.convert_image(image, uc2const.IMAGE_GRAY)
-        img = ImageReader(image)
-        img.getRGBData()
+    def get_mask_xobject(self, alpha_channel):
+        name = 'UCMask' + get_image_hash(alpha_channel)
+        if name not in self.xobjects:
+            doc = self.canvas._doc
+            mask = PDFImageXObject(name, ImageReader(alpha_channel))
+            mask._decode = [0, 1]
+            self.xobjects[name] = doc.Reference(mask,
+                                                doc.getXObjectName(name))
+        return self.xobjects[name]
+
+    def get_image_xobject(self, image, alpha_channel=None):
+        """
+        Returns (name, width, height) of image XObject.
+        XObjects are registered by content hash, so identical
+        bitmaps and alpha channels are embedded once.
+        """
+        name = 'UCImage' + get_image_hash(image, alpha_channel)
+        if name not in self.xobjects:
+            if self.colorspace == uc2const.COLOR_CMYK:
+                image = self.cms.convert_image(image, uc2const.IMAGE_CMYK)
+            elif self.colorspace == uc2const.COLOR_RGB:
+                image = self.cms.convert_image(image, uc2const.IMAGE_RGB)
+            elif self.colorspace == uc2const.COLOR_GRAY:
+                image = self.cms.convert_image(image, uc2const.IMAGE_GRAY)
+            doc = self.canvas._doc
+            mask = None if alpha_channel else 'auto'
+            img = PDFImageXObject(name, ImageReader(image), mask=mask)
+            if alpha_channel:
+                img.smask = self.get_mask_xobject(alpha_channel)
+            doc.Reference(img, doc.getXObjectName(name))
+            self.xobjects[name] = (name, img.width, img.height)
+        return self.xobjects[name]
+
+    def get_jpeg_xobject(self, jpeg_str, alpha_channel=None):
+        """
+        Returns (name, width, height) of image XObject embedding
+        JPEG data as is (DCTDecode filter) without re-encoding.
+        """
+        digest = hashlib.md5(jpeg_str)
         if alpha_channel:
-            img._dataA = ImageReader(alpha_channel)
-        self.canvas.drawImage(img, 0, 0, mask='auto')
-
-    def draw_pixmap_obj(self, obj):
+            digest.update(get_image_hash(alpha_channel))
+        name = 'UCJpeg' + digest.hexdigest()
+        if name not in self.xobjects:
+            doc = self.canvas._doc
+            img = PDFImageXObject(name)
+            if not img.loadImageFromJPEG(StringIO(jpeg_str)):
+                return None
+            # Binary stream without ASCII85 layer
+            img.streamContent = jpeg_str
+            img._filters = ('DCTDecode',)
+            if alpha_channel:
+                img.smask = self.get_mask_xobject(alpha_channel)
+            doc.Reference(img, doc.getXObjectName(name))
+            self.xobjects[name] = (name, img.width, img.height)
+        return self.xobjects[name]
+
+    def get_pixmap_xobjects(self, obj):
         hnd = obj.handler
-        cs = self.colorspace
         if obj.colorspace in uc2const.DUOTONES:
-            for bundle in hnd.convert_duotone_to_image(self.cms, cs):
-                if bundle:
-                    self.draw_image(*bundle)
+            bundles = hnd.convert_duotone_to_image(self.cms, self.colorspace)
         else:
-            self.draw_image(hnd.bitmap, hnd.alpha)
+            source = hnd.get_source_str()
+            if source and source[0] == JPEG_FMT and \
+                    obj.colorspace == uc2const.IMAGE_RGB and \
+                    self.colorspace in (None, uc2const.COLOR_RGB):
+                xobject = self.get_jpeg_xobject(source[1], hnd.alpha)
+                if xobject:
+                    return [xobject]
+            bundles = [(hnd.bitmap, hnd.alpha)]
+        return [self.get_image_xobject(*bundle)
+                for bundle in bundles if bundle and bundle[0]]
+
+    def draw_pixmap_obj(self, obj):
+        for name, w, h in self.get_pixmap_xobjects(obj):
+            self.canvas.saveState()
+            self.canvas.scale(w, h)
+            self.canvas.doForm(name)
+            self.canvas.restoreState()
 
     def draw_pixmap(self, obj):
         self.canvas.saveState()
@@ -522,36 +723,83 @@ class PDFGenerator(object):
         self.draw_pixmap_obj(obj)
         self.canvas.restoreState()
 
+    def get_pattern_tile(self, obj, pattern):
+        """
+        Returns image XObjects and size of pattern tile.
+        Tiles are cached by pattern content.
+        """
+        digest = hashlib.md5(pattern[1])
+        if pattern[0] == sk2const.PATTERN_IMG and len(pattern) > 2:
+            digest.update(repr(pattern[2]))
+        key = digest.hexdigest()
+        if key not in self.patterns:
+            image_obj = sk2_model.Pixmap(obj.config)
+            image_obj.handler.load_from_b64str(self.cms, pattern[1])
+            if pattern[0] == sk2const.PATTERN_IMG and len(pattern) > 2:
+                image_obj.style[3] = deepcopy(pattern[2])
+            self.patterns[key] = (self.get_pixmap_xobjects(image_obj),
+                                  image_obj.get_size())
+        return self.patterns[key]
+
     def fill_pattern(self, obj, pdfpath, fill_trafo, pattern):
+        """
+        Fills path by PDF tiling pattern. Pattern is painted inside
+        form XObject, so pattern matrix is relative to current user
+        space rather than to page default space.
+        """
         if not fill_trafo:
             fill_trafo = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
         inv_ptrn_trafo = libgeom.invert_trafo(pattern[3])
         inv_trafo = libgeom.multiply_trafo(libgeom.invert_trafo(fill_trafo),
                                            libgeom.invert_trafo(inv_ptrn_trafo))
         paths = libgeom.apply_trafo_to_paths(obj.paths, obj.trafo)
-        paths = libgeom.apply_trafo_to_paths(paths, inv_trafo)
         bbox = libgeom.get_paths_bbox(paths)
+        paths = libgeom.apply_trafo_to_paths(paths, inv_trafo)
+        ptrn_bbox = libgeom.get_paths_bbox(paths)
         cv_trafo = libgeom.multiply_trafo(pattern[3], fill_trafo)
 
-        image_obj = sk2_model.Pixmap(obj.config)
-        image_obj.handler.load_from_b64str(self.cms, pattern[1])
-        if pattern[0] == sk2const.PATTERN_IMG and len(pattern) > 2:
-            image_obj.style[3] = deepcopy(pattern[2])
+        images, (w, h) = self.get_pattern_tile(obj, pattern)
+        if not images:
+            return
+        # Tile grid starts at top left corner as stepped tiles did
+        origin = [1.0, 0.0, 0.0, 1.0, ptrn_bbox[0], ptrn_bbox[3]]
+        matrix = libgeom.multiply_trafo(origin, cv_trafo)
+
+        doc = self.canvas._doc
+        xobjects = {}
+        content = []
+        for name, img_w, img_h in images:
+            regname = doc.getXObjectName(name)
+            xobjects[regname] = PDFObjectReference(regname)
+            content.append('q %s 0 0 %s 0 0 cm /%s Do Q' %
+                           (fp_str(img_w), fp_str(img_h), regname))
+        tile = PDFStream(PDFDictionary({
+            'Type': PDFName('Pattern'),
+            'PatternType': 1,
+            'PaintType': 1,
+            'TilingType': 1,
+            'BBox': PDFArray([0, 0, w, h]),
+            'XStep': w,
+            'YStep': h,
+            'Matrix': PDFArray(matrix),
+            'Resources': PDFDictionary({'XObject': PDFDictionary(xobjects)})
+        }), '\n'.join(content))
+
+        x0, y0, x1, y1 = bbox
+        resources = PDFDictionary({'Pattern': PDFDictionary(
+            {'P0': doc.Reference(tile)})})
+        form = PDFStream(PDFDictionary({'Type': PDFName('XObject'),
+                                        'Subtype': PDFName('Form'),
+                                        'FormType': 1,
+                                        'BBox': PDFArray(bbox),
+                                        'Resources': resources}),
+                         '/Pattern cs /P0 scn %s re f' %
+                         fp_str(x0, y0, x1 - x0, y1 - y0))
+        name = 'UCPattern%d' % len(self.xobjects)
+        doc.Reference(form, doc.getXObjectName(name))
+        self.xobjects[name] = (name, x1 - x0, y1 - y0)
 
         self.canvas.saveState()
         self.canvas.clipPath(pdfpath, 0, 0)
-        self.canvas.transform(*cv_trafo)
-
-        w, h = image_obj.get_size()
-        x = bbox[0]
-        y = bbox[3]
-        while y > bbox[1] - h:
-            while x < bbox[2]:
-                self.canvas.saveState()
-                self.canvas.transform(1.0, 0.0, 0.0, 1.0, x, y)
-                self.draw_pixmap_obj(image_obj)
-                self.canvas.restoreState()
-                x += w
-            y -= h
-            x = bbox[0]
+        self.canvas.doForm(name)
         self.canvas.restoreState()
@@ -20,6 +20,7 @@ import zipfile
 from uc2.formats.pdxf import const
 from uc2.formats.pdxf import model
 from uc2.formats.pdxf.presenter import PDXF_Presenter
+from uc2.formats.sniffing import get_header
 from uc2.utils.mixutils import merge_cnf
 
 PDXF_HEADER = (b'\x50\x4b\x03\x04\x14\x00\x00\x00')
@@ -36,8 +37,9 @@ def pdxf_saver(pdxf_doc, filename, translate=True, cnf=None, **kw):
     pdxf_doc.save(filename)
 
 
-def check_pdxf(path):
-    if not zipfile.is_zipfile(path):
+def check_pdxf(path, header=None):
+    if not get_header(path, header)[:2] == 'PK' or \
+            not zipfile.is_zipfile(path):
         return False
 
     pdxf_file = zipfile.ZipFile(path, 'r')
@@ -15,9 +15,7 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import os
-
-from uc2.cms import ColorManager, CS, libcms
+from uc2.cms import ColorManager, CS
 
 
 class PDXF_ColorManager(ColorManager):
@@ -28,20 +26,14 @@ class PDXF_ColorManager(ColorManager):
         ColorManager.__init__(self)
 
     def update(self):
-        self.handles = {}
-        self.clear_transforms()
         profiles = self.presenter.model.profiles
         rm = self.presenter.rm
         if not profiles: profiles = ['', '', '', '', ]
         index = 0
+        self.profile_dir = self.presenter.appdata.app_color_profile_dir
+        self.profile_paths = {}
         for item in CS:
-            path = None
-            if profiles[index]: path = rm.get_resource_path(profiles[index])
-            if path:
-                self.handles[item] = libcms.cms_open_profile_from_file(path)
-            else:
-                profile_dir = self.presenter.appdata.app_color_profile_dir
-                filename = 'built-in_%s.icm' % item
-                path = os.path.join(profile_dir, filename)
-                self.handles[item] = libcms.cms_open_profile_from_file(path)
+            if profiles[index]:
+                self.profile_paths[item] = rm.get_resource_path(profiles[index])
             index += 1
+        self.set_handles(CS)
@@ -15,11 +15,9 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import os
-
 from uc2.formats.plt.plt_presenter import PltPresenter
 from uc2.formats.sk2.sk2_presenter import SK2_Presenter
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -48,14 +46,5 @@ def plt_saver(doc, filename=None, fileptr=None, translate=True, cnf=None, **kw):
         doc.save(filename)
 
 
-def check_plt(path):
-    file_size = os.path.getsize(path)
-    fileptr = get_fileptr(path)
-
-    if file_size > 20:
-        string = fileptr.read(20)
-    else:
-        string = fileptr.read()
-
-    fileptr.close()
-    return string.startswith('IN;')
+def check_plt(path, header=None):
+    return get_header(path, header).startswith('IN;')
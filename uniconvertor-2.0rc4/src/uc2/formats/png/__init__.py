@@ -15,10 +15,13 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
+
 import cairo
 
 from uc2.formats.fallback import im_loader
 from uc2.formats.sk2.crenderer import CairoRenderer
+from uc2.formats.sniffing import get_header
 from uc2.utils.fsutils import get_fileptr
 from uc2.utils.mixutils import merge_cnf
 
@@ -30,43 +33,81 @@ def png_loader(appdata, filename=None, fileptr=None, translate=True, cnf=None,
     return im_loader(appdata, filename, fileptr, translate, cnf, **kw)
 
 
+def render_page(sk2_doc, rend, page, bbox, size, antialias_flag=True):
+    """
+    Renders bbox region of the page into image surface of provided
+    size (1 pt per pixel). Objects outside the region are skipped.
+    """
+    x0, y0, x1, y1 = bbox
+    trafo = (1.0, 0, 0, -1.0, -x0, y1)
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, *size)
+    ctx = cairo.Context(surface)
+    ctx.set_matrix(cairo.Matrix(*trafo))
+
+    rend.antialias_flag = antialias_flag
+    for item in sk2_doc.methods.get_visible_layers(page):
+        if not item.properties[3] and antialias_flag:
+            rend.antialias_flag = False
+        rend.render_layer(ctx, item, bbox)
+        if not item.properties[3] and antialias_flag:
+            rend.antialias_flag = True
+    return surface
+
+
+def get_tile_bboxes(w, h, tiles):
+    """
+    Splits page into tiles. Tiles value is 'COLSxROWS' or 'N'
+    (NxN tiles) string. Returns list of (row, column, bbox, size) tuples.
+    """
+    items = [max(int(item), 1) for item in tiles.lower().split('x')]
+    cols, rows = items if len(items) == 2 else items * 2
+    result = []
+    xs = [int(w) * i // cols for i in range(cols + 1)]
+    ys = [int(h) * i // rows for i in range(rows + 1)]
+    for row in range(rows):
+        for col in range(cols):
+            bbox = [xs[col] - w / 2.0, h / 2.0 - ys[row + 1],
+                    xs[col + 1] - w / 2.0, h / 2.0 - ys[row]]
+            size = (xs[col + 1] - xs[col], ys[row + 1] - ys[row])
+            result.append((row, col, bbox, size))
+    return result
+
+
 def png_saver(sk2_doc, filename=None, fileptr=None, translate=True, cnf=None,
               **kw):
     cnf = merge_cnf(cnf, kw)
-    if filename and not fileptr:
-        fileptr = get_fileptr(filename, True)
     page = sk2_doc.methods.get_page()
     w, h = page.page_format[1]
-    trafo = (1.0, 0, 0, -1.0, w / 2.0, h / 2.0)
-
-    canvas_matrix = cairo.Matrix(*trafo)
-    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, int(w), int(h))
-    ctx = cairo.Context(surface)
-    ctx.set_matrix(canvas_matrix)
 
     rend = CairoRenderer(sk2_doc.cms)
     antialias_flag = True
     if 'antialiasing' in cnf.keys():
         if not cnf['antialiasing'] in ('True', '1'):
             antialias_flag = False
-    rend.antialias_flag = antialias_flag
-    layers = sk2_doc.methods.get_visible_layers(page)
 
-    for item in layers:
-        if not item.properties[3] and antialias_flag:
-            rend.antialias_flag = False
-        rend.render(ctx, item.childs)
-        if not item.properties[3] and antialias_flag:
-            rend.antialias_flag = True
+    tiles = cnf.get('tiles')
+    if tiles and filename:
+        # Tiles are saved as NAME_ROW_COLUMN.png
+        name, ext = os.path.splitext(filename)
+        for row, col, bbox, size in get_tile_bboxes(w, h, str(tiles)):
+            surface = render_page(sk2_doc, rend, page, bbox, size,
+                                  antialias_flag)
+            fileptr = get_fileptr('%s_%d_%d%s' % (name, row, col, ext), True)
+            surface.write_to_png(fileptr)
+            fileptr.close()
+        return
 
+    if filename and not fileptr:
+        fileptr = get_fileptr(filename, True)
+    bbox = [-w / 2.0, -h / 2.0, w / 2.0, h / 2.0]
+    surface = render_page(sk2_doc, rend, page, bbox, (int(w), int(h)),
+                          antialias_flag)
     surface.write_to_png(fileptr)
     fileptr.close()
 
 
-def check_png(path):
-    fileptr = get_fileptr(path)
-    mstr = fileptr.read(len(PNG_ID))
-    fileptr.close()
-    if mstr == PNG_ID:
+def check_png(path, header=None):
+    header = get_header(path, header)
+    if header[:len(PNG_ID)] == PNG_ID:
         return True
     return False
@@ -41,6 +41,65 @@ class RiffModelObject(BinaryModelObject):
     chunk_size = 0
     version = ''
 
+    source = None
+    offset = 0
+    size = 0
+    parser = None
+    _chunk = ''
+    _childs = []
+
+    def set_source(self, source, offset, size, parser=None):
+        """
+        Binds chunk content to (offset, size) region of source buffer
+        (usually file mmap); the chunk passed to constructor is kept
+        as a header. Chunk bytes are sliced on each access and are not
+        kept by object. Optional parser callback fills child list
+        on first access.
+        """
+        self.source = source
+        self.offset = offset
+        self.size = size
+        if parser is not None:
+            self.parser = parser
+
+    def detach_source(self):
+        """
+        Copies chunk content out of source buffers, so the object and
+        its parsed childs do not depend on source file map anymore.
+        Unparsed childs are parsed from the copy on first access.
+        """
+        if self.source is not None and not isinstance(self.source, str):
+            self.source = self.source[self.offset:self.offset + self.size]
+            self.offset = 0
+        if self.parser is None:
+            for child in self._childs:
+                child.detach_source()
+
+    def _get_chunk(self):
+        if self.source is None:
+            return self._chunk
+        return self._chunk + self.source[self.offset:self.offset + self.size]
+
+    def _set_chunk(self, chunk):
+        self.source = None
+        self._chunk = chunk
+
+    chunk = property(_get_chunk, _set_chunk)
+
+    def _get_childs(self):
+        if self.parser is not None:
+            parser = self.parser
+            self.parser = None
+            self._childs = []
+            parser(self)
+        return self._childs
+
+    def _set_childs(self, childs):
+        self.parser = None
+        self._childs = childs
+
+    childs = property(_get_childs, _set_childs)
+
     def resolve(self):
         name = ''
         if self.chunk_tag:
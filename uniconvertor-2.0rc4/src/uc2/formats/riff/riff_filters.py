@@ -15,18 +15,52 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import mmap
+import zlib
+
 from uc2.utils import get_chunk_size, dword2py_int, py_int2dword
 from uc2.formats.generic_filters import AbstractLoader, AbstractSaver
 from uc2.formats.riff import model
 
 
+def map_file(fileptr):
+    """
+    Returns read-only mmap of the file. If the file cannot be mapped
+    its content is copied into anonymous memory map.
+    """
+    try:
+        return mmap.mmap(fileptr.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, ValueError, EnvironmentError):
+        fileptr.seek(0)
+        return map_data(fileptr.read())
+
+
+def map_data(data):
+    """
+    Returns anonymous memory map filled by data string. The map is
+    both a stream and a buffer for lazy chunks.
+    """
+    buf = mmap.mmap(-1, len(data) or 1)
+    buf.write(data)
+    buf.seek(0)
+    return buf
+
+
+def skip(stream, position):
+    stream.seek(min(position, len(stream)))
+
+
+def decompress(buf, offset, size):
+    return zlib.decompressobj().decompress(buffer(buf, offset, size))
+
+
 class RIFF_Loader(AbstractLoader):
     name = 'RIFF_Loader'
 
     def do_load(self):
         self.model = None
         self.parent_stack = []
-        self.model = self.parse_file(self.fileptr)
+        self.model = self.parse_file(map_file(self.fileptr))
 
     def parse_file(self, fileptr):
         identifier = fileptr.read(4)
@@ -58,20 +92,23 @@ class RIFF_Loader(AbstractLoader):
         offset = fileptr.tell()
 
         if list_identifier == 'cmpr':
-            fileptr.seek(offset)
-            chunk = fileptr.read(size - 4)
-            return self.parse_cmpr_list(identifier + size_field + \
-                                        list_identifier + chunk)
+            obj = model.RiffCmprList(identifier + size_field +
+                                     list_identifier + fileptr.read(12))
+            obj.set_source(fileptr, offset + 12, size - 16,
+                           self.parse_cmpr_list)
+            skip(fileptr, offset + size - 4)
+            return obj
 
         obj = model.RiffList(identifier + size_field + list_identifier)
 
         while fileptr.tell() <= offset + size - 8:
             ret = self.parse_stream(fileptr)
             if ret is None:
-                fileptr.seek(offset)
-                chunk = fileptr.read(size - 4)
-                return model.RiffUnparsedList(identifier + size_field + \
-                                              list_identifier + chunk)
+                obj = model.RiffUnparsedList(identifier + size_field +
+                                             list_identifier)
+                obj.set_source(fileptr, offset, size - 4)
+                skip(fileptr, offset + size - 4)
+                return obj
             else:
                 obj.childs.append(ret)
 
@@ -82,46 +119,45 @@ class RIFF_Loader(AbstractLoader):
             return None
         size_field = fileptr.read(4)
         size = get_chunk_size(size_field)
-        chunk = fileptr.read(size)
-        return model.RiffObject(identifier + size_field + chunk)
+        obj = model.RiffObject(identifier + size_field)
+        obj.set_source(fileptr, fileptr.tell(), size)
+        skip(fileptr, fileptr.tell() + size)
+        return obj
 
     def parse_pack(self, fileptr, identifier):
         size_field = fileptr.read(4)
         size = get_chunk_size(size_field)
-        chunk = fileptr.read(size)
-        obj = model.RiffPackObject(identifier + size_field + chunk)
+        obj = model.RiffPackObject(identifier + size_field)
+        obj.set_source(fileptr, fileptr.tell(), size, self.parse_pack_childs)
+        skip(fileptr, fileptr.tell() + size)
+        return obj
 
-        import StringIO, zlib
-        decomp = zlib.decompressobj()
-        uncompresseddata = decomp.decompress(chunk[12:])
-        stream = StringIO.StringIO(uncompresseddata)
+    def parse_pack_childs(self, obj):
+        uncompresseddata = decompress(obj.source, obj.offset + 12,
+                                      obj.size - 12)
+        stream = map_data(uncompresseddata)
 
         while stream.tell() < len(uncompresseddata):
             ret = self.parse_stream(stream)
             obj.childs.append(ret)
 
-        return obj
-
-    def parse_cmpr_list(self, buff):
-        obj = model.RiffCmprList(buff)
-        import StringIO, zlib
-        compressedsize = dword2py_int(buff[12:16])
-
-        decomp = zlib.decompressobj()
-        uncompresseddata = decomp.decompress(buff[36:])
+    def parse_cmpr_list(self, obj):
+        compressedsize = obj.compressedsize
+        uncompresseddata = decompress(obj.source, obj.offset + 12,
+                                      obj.size - 12)
 
-        blocksizesdata = zlib.decompress(buff[36 + compressedsize:])
+        blocksizesdata = zlib.decompress(
+            buffer(obj.source, obj.offset + 12 + compressedsize,
+                   obj.size - 12 - compressedsize))
         blocksizes = []
         for i in range(0, len(blocksizesdata), 4):
             blocksizes.append(dword2py_int(blocksizesdata[i:i + 4]))
 
-        stream = StringIO.StringIO(uncompresseddata)
+        stream = map_data(uncompresseddata)
         while stream.tell() < len(uncompresseddata):
             ret = self.parse_comressed_stream(stream, blocksizes)
             obj.childs.append(ret)
 
-        return obj
-
     def parse_comressed_stream(self, stream, blocksizes):
         identifier = stream.read(4)
         if identifier == 'LIST':
@@ -145,10 +181,11 @@ class RIFF_Loader(AbstractLoader):
         while stream.tell() <= offset + size - 8:
             ret = self.parse_comressed_stream(stream, blocksizes)
             if ret is None:
-                stream.seek(offset)
-                chunk = stream.read(size - 4)
-                return model.RiffUnparsedList(identifier + size_field + \
-                                              list_identifier + chunk)
+                obj = model.RiffUnparsedList(identifier + size_field +
+                                             list_identifier)
+                obj.set_source(stream, offset, size - 4)
+                skip(stream, offset + size - 4)
+                return obj
             else:
                 obj.childs.append(ret)
 
@@ -161,12 +198,22 @@ class RIFF_Loader(AbstractLoader):
         size = blocksizes[rawsize]
         size_field = py_int2dword(size)
         if size & 1: size += 1
-        chunk = stream.read(size)
-        return model.RiffObject(identifier + size_field + chunk)
+        obj = model.RiffObject(identifier + size_field)
+        obj.set_source(stream, stream.tell(), size)
+        skip(stream, stream.tell() + size)
+        return obj
 
 
 class RIFF_Saver(AbstractSaver):
     name = 'RIFF_Saver'
 
+    def save(self, presenter, path=None, fileptr=None):
+        # Lazy chunks are slices of source file map. Target file can be
+        # the source one which is truncated on opening, so chunks are
+        # copied before.
+        if presenter.model is not None:
+            presenter.model.detach_source()
+        AbstractSaver.save(self, presenter, path, fileptr)
+
     def do_save(self):
         self.fileptr.write(self.model.get_chunk())
@@ -18,9 +18,8 @@
 from uc2.formats.scribus_pal.scribus_pal_model import SP_TAG
 from uc2.formats.scribus_pal.scribus_pal_presenter import \
     ScribusPalettePresenter
-from uc2.formats.sk2.sk2_presenter import SK2_Presenter
 from uc2.formats.skp.skp_presenter import SKP_Presenter
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header_lines
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -37,6 +36,7 @@ def scribus_pal_loader(appdata, filename=None, fileptr=None, translate=True,
     if translate:
         skp_doc = SKP_Presenter(appdata, cnf)
         doc.convert_to_skp(skp_doc)
+        from uc2.formats.sk2.sk2_presenter import SK2_Presenter
         sk2_doc = SK2_Presenter(appdata, cnf)
         skp_doc.translate_to_sk2(sk2_doc)
         doc.close()
@@ -66,15 +66,8 @@ def scribus_pal_saver(doc, filename=None, fileptr=None, translate=True,
         doc.save(filename, fileptr)
 
 
-def check_scribus_pal(path):
-    fileptr = get_fileptr(path)
-    ret = False
-    i = 0
-    while i < 20:
-        line = fileptr.readline()
+def check_scribus_pal(path, header=None):
+    for line in get_header_lines(path, header):
         if not line.find(SP_TAG) == -1:
-            ret = True
-            break
-        i += 1
-    fileptr.close()
-    return ret
+            return True
+    return False
@@ -69,7 +69,8 @@ class ScribusPalettePresenter(TaggedModelPresenter):
             for item in skp.comments.splitlines():
                 sp.comments += item + '\n'
         sp.comments = sp.comments
-        for item in skp.colors:
+        rgb_colors = self.cms.get_colors(skp.colors, COLOR_RGB)
+        for item, rgb_color in zip(skp.colors, rgb_colors):
             obj = SPColor()
             if item[0] == COLOR_SPOT:
                 obj.Spot = '1'
@@ -87,9 +88,8 @@ class ScribusPalettePresenter(TaggedModelPresenter):
                 obj.RGB = cms.rgb_to_hexcolor(item[1])
                 obj.NAME = item[3]
             else:
-                clr = self.cms.get_rgb_color(item)
-                obj.RGB = cms.rgb_to_hexcolor(clr[1])
-                obj.NAME = clr[3]
+                obj.RGB = cms.rgb_to_hexcolor(rgb_color[1])
+                obj.NAME = rgb_color[3]
             sp.childs.append(obj)
 
     def convert_to_skp(self, skp_doc):
@@ -20,7 +20,7 @@ from uc2 import uc2const
 from uc2.formats.sk import sk_model, sk_const
 from uc2.formats.sk.sk_presenter import SK_Presenter
 from uc2.formats.sk2.sk2_presenter import SK2_Presenter
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -53,8 +53,6 @@ def sk_saver(sk2_doc, filename=None, fileptr=None, translate=True, cnf=None,
         sk2_doc.save(filename, fileptr)
 
 
-def check_sk(path):
-    fileptr = get_fileptr(path)
-    string = fileptr.read(len(sk_const.SKDOC_ID))
-    fileptr.close()
-    return string == sk_const.SKDOC_ID
+def check_sk(path, header=None):
+    header = get_header(path, header)
+    return header[:len(sk_const.SKDOC_ID)] == sk_const.SKDOC_ID
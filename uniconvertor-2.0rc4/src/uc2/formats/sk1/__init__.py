@@ -19,7 +19,7 @@ from uc2 import uc2const
 from uc2.formats.sk1 import model
 from uc2.formats.sk1.presenter import SK1Presenter
 from uc2.formats.sk2.sk2_presenter import SK2_Presenter
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -52,8 +52,5 @@ def sk1_saver(sk2_doc, filename=None, fileptr=None, translate=True, cnf=None,
         sk2_doc.save(filename, fileptr)
 
 
-def check_sk1(path):
-    fileptr = get_fileptr(path)
-    string = fileptr.read(7)
-    fileptr.close()
-    return string == '##sK1 1'
+def check_sk1(path, header=None):
+    return get_header(path, header)[:7] == '##sK1 1'
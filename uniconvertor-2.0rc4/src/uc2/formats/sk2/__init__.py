@@ -16,9 +16,10 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 from uc2 import _
+from uc2.formats.sk2.sk2_filters import SK2B_Saver
 from uc2.formats.sk2.sk2_presenter import SK2_Presenter
-from uc2.sk2const import SK2DOC_ID, SK2XML_ID, SK2VER
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header_lines
+from uc2.sk2const import SK2DOC_ID, SK2XML_ID, SK2BIN_ID, SK2VER
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -33,26 +34,29 @@ def sk2_loader(appdata, filename=None, fileptr=None, translate=True, cnf=None,
 def sk2_saver(sk2_doc, filename=None, fileptr=None, translate=True, cnf=None,
               **kw):
     cnf = merge_cnf(cnf, kw)
-    sk2_doc.save(filename, fileptr)
+    if cnf.get('binary', sk2_doc.config.binary):
+        sk2_saver = sk2_doc.saver
+        sk2_doc.saver = SK2B_Saver()
+        try:
+            sk2_doc.save(filename, fileptr)
+        finally:
+            sk2_doc.saver = sk2_saver
+    else:
+        sk2_doc.save(filename, fileptr)
 
 
-def check_sk2(path):
-    ret = False
-    fileptr = get_fileptr(path)
-    ln = fileptr.readline()
+def check_sk2(path, header=None):
+    lines = get_header_lines(path, header, 2) + ['', '']
+    ln = lines[0]
+    if ln[:len(SK2BIN_ID)] == SK2BIN_ID:
+        ln = SK2DOC_ID + ln[len(SK2BIN_ID):]
     if ln[:len(SK2DOC_ID)] == SK2DOC_ID:
         if int(ln[len(SK2DOC_ID):]) <= int(SK2VER):
-            ret = True
-        else:
-            fileptr.close()
-            raise RuntimeError(_('Newer version of SK2 format is found!'))
-    else:
-        ln2 = fileptr.readline()
-        if ln2[:len(SK2XML_ID)] == SK2XML_ID:
-            if int(ln2[len(SK2XML_ID):]) <= int(SK2VER):
-                ret = True
-            else:
-                fileptr.close()
-                raise RuntimeError(_('Newer version of SK2 format is found!'))
-    fileptr.close()
-    return ret
+            return True
+        raise RuntimeError(_('Newer version of SK2 format is found!'))
+    ln2 = lines[1]
+    if ln2[:len(SK2XML_ID)] == SK2XML_ID:
+        if int(ln2[len(SK2XML_ID):]) <= int(SK2VER):
+            return True
+        raise RuntimeError(_('Newer version of SK2 format is found!'))
+    return False
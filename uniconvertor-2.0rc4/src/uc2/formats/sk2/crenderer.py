@@ -51,6 +51,8 @@ class CairoRenderer:
     contour_flag = False
     stroke_style = []
     for_display = False
+    viewport = None
+    cull_margin = None
 
     def __init__(self, cms):
         self.cms = cms
@@ -103,7 +105,12 @@ class CairoRenderer:
 
     # -------DOCUMENT RENDERING
 
-    def render(self, ctx, objs=None):
+    def render(self, ctx, objs=None, viewport=None):
+        """
+        Renders objects. If viewport bbox (in document coordinates)
+        is provided, drawing is clipped by the viewport and objects
+        outside it are skipped.
+        """
         objs = objs or []
         if self.antialias_flag:
             ctx.set_antialias(cairo.ANTIALIAS_DEFAULT)
@@ -111,10 +118,60 @@ class CairoRenderer:
             ctx.set_antialias(cairo.ANTIALIAS_NONE)
 
         if objs:
-            for obj in objs:
-                self.render_object(ctx, obj)
+            if viewport:
+                self.viewport = libgeom.normalize_bbox(viewport)
+                x0, y0, x1, y1 = self.viewport
+                ctx.save()
+                ctx.new_path()
+                ctx.rectangle(x0, y0, x1 - x0, y1 - y0)
+                ctx.clip()
+            try:
+                for obj in objs:
+                    self.render_object(ctx, obj)
+            finally:
+                if viewport:
+                    ctx.restore()
+                    self.viewport = None
+
+    def render_layer(self, ctx, layer, viewport=None):
+        """
+        Renders layer objects. If viewport bbox is provided, objects
+        outside the viewport are skipped using layer spatial index.
+        """
+        if not viewport:
+            self.render(ctx, layer.childs)
+            return
+        objs = layer.query_bbox(viewport, visual=True)
+        self.cull_margin = layer.cache_index_margin
+        try:
+            self.render(ctx, objs, viewport)
+        finally:
+            self.cull_margin = None
+
+    def is_visible(self, obj):
+        """
+        Checks whether object intersects current viewport.
+        Group bbox is enlarged by layer stroke margin if it is known.
+        """
+        if self.viewport is None or not obj.is_selectable:
+            return True
+        if obj.is_primitive or self.cull_margin is None:
+            bbox = obj.get_render_bbox()
+        elif self.cull_margin and obj.cache_bbox:
+            margin = 2.0 * self.cull_margin
+            bbox = libgeom.enlarge_bbox(
+                libgeom.normalize_bbox(obj.cache_bbox), margin, margin)
+        else:
+            bbox = obj.cache_bbox
+        if not bbox:
+            return True
+        x0, y0, x1, y1 = libgeom.normalize_bbox(bbox)
+        vx0, vy0, vx1, vy1 = self.viewport
+        return not (x0 > vx1 or x1 < vx0 or y0 > vy1 or y1 < vy0)
 
     def render_object(self, ctx, obj):
+        if not self.is_visible(obj):
+            return
         if obj.is_primitive:
             self.render_primitives(ctx, obj)
         elif obj.is_container:
@@ -17,7 +17,7 @@
 
 import os
 
-from uc2.cms import ColorManager, CS, libcms
+from uc2.cms import ColorManager, CS
 
 
 class SK2_ColorManager(ColorManager):
@@ -28,9 +28,6 @@ class SK2_ColorManager(ColorManager):
         ColorManager.__init__(self)
 
     def update(self):
-        self.handles = {}
-        self.clear_transforms()
-
         config = self.presenter.config
         profiles = [config.default_rgb_profile,
                     config.default_cmyk_profile,
@@ -38,15 +35,12 @@ class SK2_ColorManager(ColorManager):
                     config.default_gray_profile]
 
         index = 0
-        profile_dir = self.presenter.appdata.app_color_profile_dir
+        self.profile_dir = self.presenter.appdata.app_color_profile_dir
+        self.profile_paths = {}
         for item in CS:
-            path = None
             if profiles[index]:
-                path = os.path.join(profile_dir, profiles[index])
-            if path and os.path.isfile(path):
-                self.handles[item] = libcms.cms_open_profile_from_file(path)
-            else:
-                filename = 'built-in_%s.icm' % item
-                path = os.path.join(profile_dir, filename)
-                self.handles[item] = libcms.cms_open_profile_from_file(path)
+                path = os.path.join(self.profile_dir, profiles[index])
+                if os.path.isfile(path):
+                    self.profile_paths[item] = path
             index += 1
+        self.set_handles(CS)
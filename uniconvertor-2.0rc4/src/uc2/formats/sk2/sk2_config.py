@@ -28,6 +28,9 @@ class SK2_Config(XmlConfigParser):
     preview_size = (300.0, 300.0)
     preview_transparent = False
 
+    # --- BINARY SK2 VARIANT (raw image data, no preview)
+    binary = False
+
     # --- DOCUMENT PROPERTIES
     doc_origin = sk2const.DOC_ORIGIN_LL
     doc_units = uc2const.UNIT_MM
@@ -16,14 +16,20 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import logging
+import mmap
+import struct
 
 from uc2 import libimg, sk2const
 from uc2.formats.generic_filters import AbstractLoader, AbstractSaver
 from uc2.formats.sk2 import sk2_model
 from uc2.formats.sk2.crenderer import CairoRenderer
+from uc2.utils.literals import parse_call, parse_literal
 
 LOG = logging.getLogger(__name__)
 
+RECORD_HEADER = struct.Struct('<cI')
+BLOB_REF = struct.Struct('<QQ')
+
 
 class SK2_Loader(AbstractLoader):
     name = 'SK2_Loader'
@@ -32,10 +38,18 @@ class SK2_Loader(AbstractLoader):
     line = None
 
     def do_load(self):
+        records = {
+            'obj': self.obj,
+            'set': self.set_field,
+            'end': self.obj_end,
+        }
         self.model = None
         self.break_flag = False
         self.parent_stack = []
         line = self.fileptr.readline()
+        if line.startswith(sk2const.SK2BIN_ID):
+            self.do_load_binary()
+            return
         if not line[:len(sk2const.SK2DOC_ID)] == sk2const.SK2DOC_ID:
             while self.fileptr.readline().rstrip('\n') != sk2const.SK2DOC_START:
                 pass
@@ -49,13 +63,61 @@ class SK2_Loader(AbstractLoader):
 
             if self.line:
                 try:
-                    code = compile('self.' + self.line, '<string>', 'exec')
-                    exec code
-                except Exception as e:
+                    name, args = parse_call(self.line)
+                    records[name](*args)
+                except Exception:
                     msg = 'Parsing error in "%s"', self.line
                     self.send_error(msg)
                     raise
 
+    def do_load_binary(self):
+        try:
+            data = mmap.mmap(self.fileptr.fileno(), 0,
+                             access=mmap.ACCESS_READ)
+        except (AttributeError, ValueError, EnvironmentError):
+            self.fileptr.seek(0)
+            data = self.fileptr.read()
+        blobs = []
+        pos = data.find('\n') + 1
+        size = len(data)
+        step = max(size / 20, 1)
+        next_msg = step
+        while not self.break_flag:
+            rtype, length = RECORD_HEADER.unpack_from(data, pos)
+            pos += RECORD_HEADER.size
+            payload = data[pos:pos + length]
+            pos += length
+            if rtype == sk2const.SK2BIN_OBJ:
+                self.obj(payload)
+            elif rtype == sk2const.SK2BIN_SET:
+                item, val = payload.split('\0', 1)
+                self.set_field(item, parse_literal(val))
+            elif rtype == sk2const.SK2BIN_BLOB:
+                item, ref = payload.split('\0', 1)
+                offset, blob_size = BLOB_REF.unpack(ref)
+                blobs.append((self.parent_stack[-1], item, offset, blob_size))
+            elif rtype == sk2const.SK2BIN_END:
+                self.obj_end()
+            else:
+                msg = 'Unknown binary SK2 record "%s"' % rtype
+                self.send_error(msg)
+                raise IOError(msg)
+            if pos > next_msg:
+                next_msg += step
+                self.parsing_msg(float(pos) / size * 0.95)
+
+        # Image data follows the record stream and is passed to image
+        # handler without base64 decoding. Handlers keep encoded data
+        # for saving, so blobs are copied out of the map (not shared).
+        for obj, item, offset, blob_size in blobs:
+            blob = data[pos + offset:pos + offset + blob_size]
+            if item == 'bitmap':
+                obj.set_bitmap(blob)
+            elif item == 'alpha_channel':
+                obj.set_alpha_channel(blob)
+        if isinstance(data, mmap.mmap):
+            data.close()
+
     def obj(self, tag):
         obj_cid = sk2_model.TAGNAME_TO_CID[tag]
         obj = sk2_model.CID_TO_CLASS[obj_cid](self.config)
@@ -121,26 +183,30 @@ class SK2_Saver(AbstractSaver):
         if self.config.preview:
             self.writeln('-->\n</svg>')
 
-    def save_obj(self, obj):
-        self.writeln("obj('%s')" % sk2_model.CID_TO_TAGNAME[obj.cid])
+    def get_fields(self, obj):
         props = obj.__dict__
         keys = props.keys() if not obj.is_pixmap \
             else props.keys() + ['bitmap', 'alpha_channel']
         for item in keys:
-            if item not in sk2_model.GENERIC_FIELDS and \
-                    not item.startswith('cache') and \
-                    not item.startswith('is_'):
-                if item == 'bitmap':
-                    item_str = "'%s'" % obj.get_bitmap()
-                elif item == 'alpha_channel':
-                    item_str = None if not obj.has_alpha() \
-                        else "'%s'" % obj.get_alpha_channel()
-                elif obj.is_pixmap and item in ('size', 'colorspace'):
-                    item_str = None
-                else:
-                    item_str = self.field_to_str(props[item])
-                if item_str is not None:
-                    self.writeln("set('%s',%s)" % (item, item_str))
+            if item in sk2_model.GENERIC_FIELDS or \
+                    item.startswith('cache') or item.startswith('is_'):
+                continue
+            if obj.is_pixmap and item in ('size', 'colorspace'):
+                continue
+            if item == 'alpha_channel' and not obj.has_alpha():
+                continue
+            yield item
+
+    def save_obj(self, obj):
+        self.writeln("obj('%s')" % sk2_model.CID_TO_TAGNAME[obj.cid])
+        for item in self.get_fields(obj):
+            if item == 'bitmap':
+                item_str = "'%s'" % obj.get_bitmap()
+            elif item == 'alpha_channel':
+                item_str = "'%s'" % obj.get_alpha_channel()
+            else:
+                item_str = self.field_to_str(obj.__dict__[item])
+            self.writeln("set('%s',%s)" % (item, item_str))
         for child in obj.childs:
             self.save_obj(child)
         self.writeln("end()")
@@ -151,3 +217,45 @@ class SK2_Saver(AbstractSaver):
             size=self.config.preview_size,
             transparent=self.config.preview_transparent,
             encoded=True)
+
+
+class SK2B_Saver(SK2_Saver):
+    name = 'SK2B_Saver'
+    blobs = []
+    blobs_size = 0
+
+    def do_save(self):
+        self.blobs = []
+        self.blobs_size = 0
+        self.writeln(sk2const.SK2BIN_ID + sk2const.SK2VER)
+        self.save_obj(self.model)
+        for blob in self.blobs:
+            self.write(blob)
+        self.blobs = []
+
+    def write_record(self, rtype, payload=''):
+        self.write(RECORD_HEADER.pack(rtype, len(payload)))
+        self.write(payload)
+
+    def save_obj(self, obj):
+        tag = sk2_model.CID_TO_TAGNAME[obj.cid]
+        self.write_record(sk2const.SK2BIN_OBJ, tag)
+        for item in self.get_fields(obj):
+            if item == 'bitmap':
+                self.save_blob(item, obj.handler.get_bitmap_str())
+            elif item == 'alpha_channel':
+                self.save_blob(item, obj.handler.get_alpha_str())
+            else:
+                item_str = self.field_to_str(obj.__dict__[item])
+                self.write_record(sk2const.SK2BIN_SET, item + '\0' + item_str)
+        for child in obj.childs:
+            self.save_obj(child)
+        self.write_record(sk2const.SK2BIN_END)
+
+    def save_blob(self, item, blob):
+        if not blob:
+            return
+        ref = BLOB_REF.pack(self.blobs_size, len(blob))
+        self.write_record(sk2const.SK2BIN_BLOB, item + '\0' + ref)
+        self.blobs.append(blob)
+        self.blobs_size += len(blob)
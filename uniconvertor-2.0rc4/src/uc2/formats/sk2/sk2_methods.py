@@ -382,6 +382,9 @@ class SK2_Methods:
         for obj in objs:
             if obj.is_selectable:
                 bbox = libgeom.sum_bbox(bbox, obj.cache_bbox)
+            elif obj.is_layer and obj.cache_index is not None \
+                    and obj.cache_index.count == len(obj.childs):
+                bbox = libgeom.sum_bbox(bbox, obj.cache_index.bbox)
             elif obj.childs:
                 bbox = libgeom.sum_bbox(bbox, self.count_bbox(obj.childs))
         return bbox
@@ -30,6 +30,27 @@ GENERIC_FIELDS = ['cid', 'childs', 'parent', 'config', 'handler']
 LOG = logging.getLogger(__name__)
 
 
+class LazyField(object):
+    """
+    Cache field which is computed on first access by materialize()
+    method of object marked by cache_pending flag.
+    """
+
+    def __init__(self, name, default=None):
+        self.name = name
+        self.default = default
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        if obj.cache_pending:
+            obj.materialize()
+        return obj.__dict__.get(self.name, self.default)
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+
 class DocumentObject(TextModelObject):
     """
     Abstract parent class for all document
@@ -97,6 +118,8 @@ class Document(DocumentObject):
     doc_origin = 1
     doc_units = uc2const.UNIT_MM
     resources = {}
+    cache_text_updates = 0
+    cache_text_shapings = 0
 
     def __init__(self, config):
         self.cid = DOCUMENT
@@ -125,6 +148,15 @@ class Document(DocumentObject):
             self.styles['Default Text Style'] += [True, ]
         DocumentObject.update(self)
 
+    def get_shaping_stats(self):
+        """
+        Returns (updates, shapings, avoided) tuple of text objects.
+        Text glyphs are shaped on demand, so updates which were not
+        followed by glyphs request are avoided shaping calls.
+        """
+        return self.cache_text_updates, self.cache_text_shapings, \
+            self.cache_text_updates - self.cache_text_shapings
+
     def get_def_style(self):
         return deepcopy(self.styles['Default Style'])
 
@@ -234,6 +266,8 @@ class Layer(StructuralObject):
     properties = []
     name = ''
     is_layer = True
+    cache_index = None
+    cache_index_margin = 0.0
 
     def __init__(self, config, parent=None, name=''):
         self.cid = LAYER
@@ -258,7 +292,52 @@ class Layer(StructuralObject):
     def resolve(self, name=''):
         return StructuralObject.resolve(self, '%s' % self.name)
 
+    def get_index(self):
+        """
+        Returns R-tree of layer objects. The index is built on demand
+        and is dropped when layer objects are updated or transformed.
+        """
+        index = self.cache_index
+        if index is None or index.count != len(self.childs):
+            items = []
+            margin = 0.0
+            for obj in self.childs:
+                if not obj.is_selectable or not obj.cache_bbox:
+                    continue
+                bbox = libgeom.normalize_bbox(obj.cache_bbox)
+                render_bbox = obj.get_render_bbox()
+                margin = max(margin, bbox[0] - render_bbox[0],
+                             bbox[1] - render_bbox[1],
+                             render_bbox[2] - bbox[2],
+                             render_bbox[3] - bbox[3])
+                items.append((bbox, obj))
+            index = libgeom.RTree(items)
+            index.count = len(self.childs)
+            self.cache_index = index
+            self.cache_index_margin = margin
+        return index
+
+    def query_bbox(self, bbox, visual=False):
+        """
+        Returns layer objects which bounding boxes intersect
+        provided bbox. If visual is True, the objects are
+        checked with strokes and arrows.
+        """
+        index = self.get_index()
+        if visual and self.cache_index_margin:
+            margin = 2.0 * self.cache_index_margin
+            bbox = libgeom.enlarge_bbox(libgeom.normalize_bbox(bbox),
+                                        margin, margin)
+        return index.query_bbox(bbox)
+
+    def query_point(self, point):
+        """
+        Returns layer objects which bounding boxes contain the point.
+        """
+        return self.get_index().query_point(point)
+
     def update(self):
+        self.cache_index = None
         if isinstance(self.color, str):
             try:
                 self.color = cms.hexcolor_to_rgba(self.color)
@@ -394,10 +473,30 @@ class SelectableObject(DocumentObject):
     style = [[], [], [], []]
 
     cache_bbox = []
+    cache_pending = False
     is_selectable = True
 
     def to_curve(self): return None
 
+    def materialize(self):
+        """
+        Computes lazy cache fields.
+        """
+        self.cache_pending = False
+
+    def get_render_bbox(self):
+        """
+        Returns bounding box of painted area.
+        """
+        return self.cache_bbox
+
+    def reset_layer_index(self):
+        parent = self.parent
+        while parent is not None and not parent.is_layer:
+            parent = parent.parent
+        if parent is not None:
+            parent.cache_index = None
+
 
 # ---------------Compound objects---------------------
 class Group(SelectableObject):
@@ -409,6 +508,7 @@ class Group(SelectableObject):
     cid = GROUP
     childs = []
     is_group = True
+    cache_bbox = LazyField('cache_bbox', [])
 
     def __init__(self, config, parent=None, childs=None):
         childs = childs or []
@@ -424,12 +524,29 @@ class Group(SelectableObject):
         self.update_bbox()
 
     def update_bbox(self):
+        # Bbox of unshaped text is not requested until it is needed
+        for child in self.childs:
+            if child.cache_pending:
+                self.cache_pending = True
+                break
+        else:
+            self.materialize()
+        self.reset_layer_index()
+
+    def materialize(self):
+        self.cache_pending = False
         if self.childs:
             self.cache_bbox = deepcopy(self.childs[0].cache_bbox)
             for child in self.childs[1:]:
                 self.cache_bbox = libgeom.sum_bbox(self.cache_bbox,
                                                    child.cache_bbox)
 
+    def get_render_bbox(self):
+        bbox = []
+        for child in self.childs:
+            bbox = libgeom.sum_bbox(bbox, child.get_render_bbox())
+        return bbox
+
     def update(self):
         self.update_bbox()
 
@@ -443,6 +560,7 @@ class Group(SelectableObject):
         self.cache_bbox, childs_snapshots = snapshot[2:]
         for item in childs_snapshots:
             item[0].set_trafo_snapshot(item)
+        self.reset_layer_index()
 
 
 class TP_Group(Group):
@@ -486,7 +604,7 @@ class Container(Group):
     """
 
     cid = CONTAINER
-    cache_container = None
+    cache_container = LazyField('cache_container')
     is_container = True
 
     def __init__(self, config, parent=None, childs=None):
@@ -498,10 +616,14 @@ class Container(Group):
         self.parent = parent
         self.childs += childs
 
-    def update_bbox(self):
+    def materialize(self):
+        self.cache_pending = False
         self.cache_container = self.childs[0]
         self.cache_bbox = deepcopy(self.cache_container.cache_bbox)
 
+    def get_render_bbox(self):
+        return self.childs[0].get_render_bbox()
+
 
 class PrimitiveObject(SelectableObject):
     """
@@ -578,6 +700,23 @@ class PrimitiveObject(SelectableObject):
 
     def update_bbox(self):
         self.cache_bbox = libgeom.get_cpath_bbox(self.cache_cpath)
+        self.reset_layer_index()
+
+    def get_render_bbox(self):
+        bbox = self.cache_bbox
+        stroke = self.style[1]
+        if bbox and stroke and self.cache_line_width:
+            width = self.cache_line_width
+            if stroke[5] == sk2const.JOIN_MITER:
+                width *= max(stroke[6], 1.0)
+            bbox = libgeom.enlarge_bbox(libgeom.normalize_bbox(bbox),
+                                        width, width)
+            for pair in self.cache_arrows or []:
+                for item in pair:
+                    if item:
+                        bbox = libgeom.sum_bbox(
+                            bbox, libgeom.get_cpath_bbox(item))
+        return bbox
 
     def apply_trafo(self, trafo):
         self.cache_cpath = libgeom.apply_trafo(self.cache_cpath, trafo)
@@ -599,6 +738,7 @@ class PrimitiveObject(SelectableObject):
     def set_trafo_snapshot(self, snapshot):
         self.trafo, self.fill_trafo, self.stroke_trafo = snapshot[1:4]
         self.cache_bbox, self.cache_cpath = snapshot[4:]
+        self.reset_layer_index()
         self.update_stroke()
 
 
@@ -947,10 +1087,12 @@ class Text(PrimitiveObject):
     trafos = None
 
     cache_glyphs = []
-    cache_line_points = []
-    cache_layout_data = ()
-    cache_layout_bbox = []
-    cache_clusters = []
+    cache_cpath = LazyField('cache_cpath')
+    cache_bbox = LazyField('cache_bbox', [])
+    cache_line_points = LazyField('cache_line_points', [])
+    cache_layout_data = LazyField('cache_layout_data', ())
+    cache_layout_bbox = LazyField('cache_layout_bbox', [])
+    cache_clusters = LazyField('cache_clusters', [])
     is_text = True
 
     def __init__(self, config, parent=None,
@@ -1050,7 +1192,28 @@ class Text(PrimitiveObject):
                     ret += paths
         return ret
 
+    def get_document(self):
+        obj = self.parent
+        while obj is not None and not obj.cid == DOCUMENT:
+            obj = obj.parent
+        return obj
+
     def update(self):
+        """
+        Marks glyphs to be shaped on first request of cached paths,
+        layout data or bbox.
+        """
+        self.cache_pending = True
+        doc = self.get_document()
+        if doc is not None:
+            doc.cache_text_updates += 1
+        self.reset_layer_index()
+
+    def materialize(self):
+        self.cache_pending = False
+        doc = self.get_document()
+        if doc is not None:
+            doc.cache_text_shapings += 1
         self.cache_cpath = self.get_glyphs()
         index = 0
         for item in self.cache_cpath:
@@ -1083,10 +1246,22 @@ class Text(PrimitiveObject):
                 else:
                     self.cache_bbox = libgeom.sum_bbox(self.cache_bbox, bbox)
             index += 1
+        self.reset_layer_index()
 
     def apply_trafo(self, trafo):
         for i in self.trafos.keys():
             self.trafos[i] = libgeom.multiply_trafo(self.trafos[i], trafo)
+        if self.cache_pending:
+            # Glyphs will be shaped with resulting trafos
+            self.trafo = libgeom.multiply_trafo(self.trafo, trafo)
+            if self.fill_trafo:
+                self.fill_trafo = libgeom.multiply_trafo(self.fill_trafo,
+                                                         trafo)
+            if self.stroke_trafo:
+                self.stroke_trafo = libgeom.multiply_trafo(self.stroke_trafo,
+                                                           trafo)
+            self.reset_layer_index()
+            return
         for i in range(len(self.cache_cpath)):
             if self.cache_cpath[i] is None:
                 continue
@@ -1113,14 +1288,18 @@ class Text(PrimitiveObject):
     def set_trafo_snapshot(self, snapshot):
         self.trafo, self.fill_trafo, self.stroke_trafo = snapshot[1:4]
         self.cache_bbox, self.cache_cpath, self.trafos = snapshot[4:]
+        self.reset_layer_index()
 
 
 class Pixmap(PrimitiveObject):
     """
     Represents pixmap object.
     Raster graphics is stored as a TIFF bitmaps for CMYK color space and as
-    a PNG bitmap for others. 'bitmap' field contains raster info, but
-    transparency data is stored as a grayscale image in 'alpha_channel'.
+    a PNG bitmap for others. Unaltered JPEG and PNG images are stored as
+    original file data, so JPEG bitmaps are passed through unchanged
+    (see ImageHandler.get_source_str()). 'bitmap' field contains raster
+    info, but transparency data is stored as a grayscale image in
+    'alpha_channel'.
     Images are stored as a base64 encoded string to resolve EOL and other
     special character issues. 'colorspace' describes 'bitmap' type.
     Possible types are: monochrome, grayscale, RGB and CMYK.
@@ -61,3 +61,11 @@ class SK2_Presenter(TextModelPresenter):
         TextModelPresenter.update(self, action)
         if self.model is not None:
             self.methods.update()
+
+    def close(self):
+        if self.model is not None:
+            updates, shapings, avoided = self.model.get_shaping_stats()
+            if updates:
+                self.send_info('Text shaping: %d calls, %d avoided'
+                               % (shapings, avoided))
+        TextModelPresenter.close(self)
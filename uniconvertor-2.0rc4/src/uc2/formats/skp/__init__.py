@@ -15,10 +15,9 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from uc2.formats.sk2.sk2_presenter import SK2_Presenter
 from uc2.formats.skp.skp_const import SKP_ID
 from uc2.formats.skp.skp_presenter import SKP_Presenter
-from uc2.utils.fsutils import get_fileptr
+from uc2.formats.sniffing import get_header
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -28,6 +27,7 @@ def skp_loader(appdata, filename=None, fileptr=None, translate=True,
     doc = SKP_Presenter(appdata, cnf)
     doc.load(filename, fileptr)
     if translate:
+        from uc2.formats.sk2.sk2_presenter import SK2_Presenter
         sk2_doc = SK2_Presenter(appdata, cnf)
         doc.translate_to_sk2(sk2_doc)
         doc.close()
@@ -47,8 +47,6 @@ def skp_saver(doc, filename=None, fileptr=None, translate=True,
         doc.save(filename, fileptr)
 
 
-def check_skp(path):
-    fileptr = get_fileptr(path)
-    string = fileptr.read(len(SKP_ID))
-    fileptr.close()
-    return string == SKP_ID
+def check_skp(path, header=None):
+    header = get_header(path, header)
+    return header[:len(SKP_ID)] == SKP_ID
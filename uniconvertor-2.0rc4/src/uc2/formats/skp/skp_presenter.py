@@ -24,7 +24,6 @@ from uc2.formats.generic import TextModelPresenter
 from uc2.formats.skp.skp_config import SKP_Config
 from uc2.formats.skp.skp_filters import SKP_Loader, SKP_Saver
 from uc2.formats.skp.skp_model import SK1Palette
-from uc2.formats.sk2 import sk2_model
 
 
 def create_new_palette(config): pass
@@ -71,6 +70,7 @@ class SKP_Presenter(TextModelPresenter):
         self._extract_color(sk2_doc.model)
 
     def _extract_color(self, obj):
+        from uc2.formats.sk2 import sk2_model
         if obj.cid > sk2_model.PRIMITIVE_CLASS:
             fill = obj.style[0]
             if fill and fill[1] == sk2const.FILL_SOLID:
@@ -80,6 +80,7 @@ class SKP_Presenter(TextModelPresenter):
             self._extract_color(child)
 
     def translate_to_sk2(self, sk2_doc):
+        from uc2.formats.sk2 import sk2_model
         ncells = len(self.model.colors)
         if not ncells:
             return
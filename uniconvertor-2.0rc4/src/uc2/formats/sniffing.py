@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+File format sniffing by magic bytes.
+File header is read once and matched against signatures of all
+formats. Matched formats are checked by format checkers which
+receive the same header buffer.
+"""
+
+import re
+
+from uc2 import uc2const
+from uc2.utils.fsutils import get_fileptr
+
+HEADER_SIZE = 4096
+HEADER_LINES = 20
+
+# Signatures are matched at file start, (pid, pattern, search) records
+# with search flag are searched in whole header.
+SIGNATURES = [
+    (uc2const.SK2, r'##sK1 2B? |[^\n]*\n<!-- sK1 2 ', False),
+    (uc2const.SVG, r'<svg[\s>]|<[\w.-]+:svg[\s>]', True),
+    (uc2const.WMF, r'\xd7\xcd\xc6\x9a|[\x01\x02]\x00..\x00[\x01\x03]', False),
+    (uc2const.PLT, r'IN;', False),
+    (uc2const.SK1, r'##sK1 1', False),
+    (uc2const.SK, r'##Sketch 1 ', False),
+    (uc2const.CDR, r'RIFF....CDR[6-9A-D]', False),
+    (uc2const.CDRZ, r'PK\x03\x04', False),
+    (uc2const.FIG, r'#FIG 3', False),
+    (uc2const.CGM, r'\x00[\x20-\x3f]', False),
+    (uc2const.PNG, r'\x89PNG', False),
+    (uc2const.JPG, r'\xff\xd8\xff', False),
+    (uc2const.PSD, r'8BPS', False),
+    (uc2const.XCF, r'gimp xcf', False),
+    (uc2const.JP2, r'\x00\x00\x00\x0cjP  |\xff\x4f\xff\x51', False),
+    (uc2const.TIF, r'II\*\x00|MM\x00\*', False),
+    (uc2const.GIF, r'GIF8[79]a', False),
+    (uc2const.BMP, r'BM', False),
+    (uc2const.PCX, r'\x0a[\x00-\x05]\x01', False),
+    (uc2const.PPM, r'P[1-7]\s', False),
+    (uc2const.XBM, r'#define ', True),
+    (uc2const.XPM, r'/\* XPM \*/', True),
+    (uc2const.WEBP, r'RIFF....WEBP', False),
+    (uc2const.SKP, r'##sK1 palette', False),
+    (uc2const.GPL, r'GIMP Palette', False),
+    (uc2const.SCRIBUS_PAL, r'SCRIBUSCOLORS', True),
+    (uc2const.SOC, r'office:color-table|ooo:color-table', True),
+    (uc2const.CPL, r'\xcd\xdd|\xdd\xdc|\xcd\xbc|\xcd\xdc|\xdc\xdc|\xcc\xdc|'
+                   r'\xcc\xbc', False),
+    (uc2const.COREL_PAL, r'<palette', True),
+    (uc2const.ASE, r'ASEF', False),
+    (uc2const.ACO, r'\x00[\x01\x02]', False),
+    (uc2const.JCW, r'JCW', False),
+    (uc2const.CMX, r'RIF[FX]....CMX1', False),
+    (uc2const.CCX, r'RIF[FX]....CDRX', False),
+    (uc2const.RIFF, r'RIFF', False),
+    (uc2const.XML, r'<\?xml ', True),
+]
+
+SIGNATURE_INDEX = {}
+for pid, pattern, search in SIGNATURES:
+    regex = re.compile(pattern, re.DOTALL)
+    SIGNATURE_INDEX[pid] = regex.search if search else regex.match
+
+
+def read_header(path, size=HEADER_SIZE):
+    fileptr = get_fileptr(path)
+    header = fileptr.read(size)
+    fileptr.close()
+    return header
+
+
+def get_header(path, header=None, size=0):
+    """
+    Returns shared header buffer or reads it if it is not provided
+    or is too short for requested size.
+    """
+    if header is None or (size and len(header) < size and
+                          len(header) == HEADER_SIZE):
+        header = read_header(path, max(size, HEADER_SIZE))
+    return header
+
+
+def get_header_lines(path, header=None, num=HEADER_LINES):
+    """
+    Returns first lines of file taken from shared header buffer.
+    """
+    header = get_header(path, header)
+    lines = header.splitlines(True)
+    if len(lines) > num or len(header) < HEADER_SIZE:
+        return lines[:num]
+    fileptr = get_fileptr(path)
+    lines = [fileptr.readline() for _i in range(num)]
+    fileptr.close()
+    return lines
+
+
+def is_complete(header):
+    return len(header) < HEADER_SIZE
+
+
+def sniff(header, formats):
+    """
+    Returns formats which signatures are matched by file header.
+    Formats without signature and text formats which signatures
+    can be beyond header are kept as candidates.
+    """
+    ret = []
+    complete = is_complete(header)
+    for pid in formats:
+        match = SIGNATURE_INDEX.get(pid)
+        if match is None or match(header) or \
+                (not complete and pid in SEARCH_FORMATS):
+            ret.append(pid)
+    return ret
+
+
+SEARCH_FORMATS = set(pid for pid, _pattern, search in SIGNATURES if search)
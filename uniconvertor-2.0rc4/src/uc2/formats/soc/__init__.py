@@ -15,11 +15,10 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from uc2.formats.sk2.sk2_presenter import SK2_Presenter
 from uc2.formats.skp.skp_presenter import SKP_Presenter
+from uc2.formats.sniffing import get_header_lines
 from uc2.formats.soc.soc_const import SOC_PAL_TAG, SOC_PAL_OO_TAG
 from uc2.formats.soc.soc_presenter import SOC_Presenter
-from uc2.utils.fsutils import get_fileptr
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -36,6 +35,7 @@ def soc_loader(appdata, filename=None, fileptr=None, translate=True,
     if translate:
         skp_doc = SKP_Presenter(appdata, cnf)
         doc.convert_to_skp(skp_doc)
+        from uc2.formats.sk2.sk2_presenter import SK2_Presenter
         sk2_doc = SK2_Presenter(appdata, cnf)
         skp_doc.translate_to_sk2(sk2_doc)
         doc.close()
@@ -65,18 +65,10 @@ def soc_saver(doc, filename=None, fileptr=None, translate=True,
         doc.save(filename, fileptr)
 
 
-def check_soc(path):
-    fileptr = get_fileptr(path)
-    ret = False
-    i = 0
-    while i < 20:
-        line = fileptr.readline()
+def check_soc(path, header=None):
+    for line in get_header_lines(path, header):
         if not line.find(SOC_PAL_TAG) == -1:
-            ret = True
-            break
+            return True
         if not line.find(SOC_PAL_OO_TAG) == -1:
-            ret = True
-            break
-        i += 1
-    fileptr.close()
-    return ret
+            return True
+    return False
@@ -64,9 +64,9 @@ class SOC_Presenter(TextModelPresenter):
             soc.comments += 'Palette source: ' + skp_model.source + '\n'
         soc.comments += skp_model.comments
         soc.comments = soc.comments
-        for item in skp_model.colors:
-            color = self.cms.get_rgb_color(item)[1]
-            rgb = cms.rgb_to_hexcolor(color)
+        rgb_colors = self.cms.get_colors(skp_model.colors, COLOR_RGB)
+        for item, color in zip(skp_model.colors, rgb_colors):
+            rgb = cms.rgb_to_hexcolor(color[1])
             soc.colors.append([rgb, item[3]])
 
     def convert_to_skp(self, skp_doc):
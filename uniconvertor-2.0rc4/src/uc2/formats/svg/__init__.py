@@ -15,14 +15,22 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from StringIO import StringIO
+from tempfile import SpooledTemporaryFile
 from xml.etree import cElementTree
 
 from uc2 import uc2const
 from uc2.formats.sk2.sk2_presenter import SK2_Presenter
+from uc2.formats.sniffing import get_header, is_complete
 from uc2.formats.svg.svg_presenter import SVG_Presenter
+from uc2.libimg.downsampling import get_downsampler
 from uc2.utils.mixutils import merge_cnf
 from uc2.utils.fsutils import get_fileptr
 
+# Size of in-memory buffer for streamed SVG body, larger body
+# is moved into temporary file
+SPOOL_SIZE = 8 * 1024 * 1024
+
 
 def svg_loader(appdata, filename=None, fileptr=None,
                translate=True, cnf=None, **kw):
@@ -46,22 +54,41 @@ def svg_saver(sk2_doc, filename=None, fileptr=None,
         translate = False
     if translate:
         svg_doc = SVG_Presenter(sk2_doc.appdata, cnf)
-        svg_doc.translate_from_sk2(sk2_doc)
-        svg_doc.save(filename, fileptr)
+        stream = SpooledTemporaryFile(SPOOL_SIZE)
+        downsampler = get_downsampler(cnf)
+        if downsampler:
+            downsampler.apply(sk2_doc.model)
+        try:
+            svg_doc.translate_from_sk2(sk2_doc, stream)
+        finally:
+            if downsampler:
+                downsampler.restore()
+        try:
+            svg_doc.save(filename, fileptr)
+        finally:
+            stream.close()
         svg_doc.close()
     else:
         sk2_doc.save(filename, fileptr)
 
 
-def check_svg(path):
-    tag = None
-    fileptr = get_fileptr(path)
+def check_svg(path, header=None):
+    header = get_header(path, header)
+    tag = get_root_tag(StringIO(header))
+    if tag is None and not is_complete(header):
+        # Root element is beyond header
+        fileptr = get_fileptr(path)
+        try:
+            tag = get_root_tag(fileptr)
+        finally:
+            fileptr.close()
+    return tag == '{http://www.w3.org/2000/svg}svg' or tag == 'svg'
+
+
+def get_root_tag(fileptr):
     try:
-        for event, el in cElementTree.iterparse(fileptr, ('start',)):
-            tag = el.tag
-            break
+        for _event, el in cElementTree.iterparse(fileptr, ('start',)):
+            return el.tag
     except cElementTree.ParseError:
         pass
-    finally:
-        fileptr.close()
-    return tag == '{http://www.w3.org/2000/svg}svg' or tag == 'svg'
+    return None
@@ -21,7 +21,8 @@ from uc2 import uc2const
 from uc2.formats.generic import TaggedModelPresenter
 from uc2.formats.svg.svg_config import SVG_Config
 from uc2.formats.svg.svg_methods import SVG_Methods, create_new_svg
-from uc2.formats.svg.svg_translators import SK2_to_SVG_Translator
+from uc2.formats.svg.svg_translators import SK2_to_SVG_Translator, \
+    SK2_to_SVG_Writer
 from uc2.formats.svg.svg_translators import SVG_to_SK2_Translator
 from uc2.formats.xml_.xml_filters import Advanced_XML_Loader, Advanced_XML_Saver
 
@@ -58,9 +59,17 @@ class SVG_Presenter(TaggedModelPresenter):
         TaggedModelPresenter.update(self, action)
         self.methods.update()
 
-    def translate_from_sk2(self, sk2_doc):
-        translator = SK2_to_SVG_Translator()
-        translator.translate(sk2_doc, self)
+    def translate_from_sk2(self, sk2_doc, stream=None):
+        """
+        Translates SK2 document into SVG model. If stream is provided,
+        document body is written into it instead of model tree.
+        """
+        if stream is None:
+            translator = SK2_to_SVG_Translator()
+            translator.translate(sk2_doc, self)
+        else:
+            translator = SK2_to_SVG_Writer()
+            translator.translate(sk2_doc, self, stream)
 
     def translate_to_sk2(self, sk2_doc):
         translator = SVG_to_SK2_Translator()
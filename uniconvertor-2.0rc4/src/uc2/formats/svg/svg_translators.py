@@ -23,15 +23,25 @@ from copy import deepcopy
 
 from PIL import Image
 
-from uc2 import uc2const, libgeom, libpango, cms, sk2const, utils
+from uc2 import uc2const, libgeom, libpango, cms, sk2const, utils, events, \
+    msgconst
 from uc2.formats.sk2 import sk2_model
 from uc2.formats.svg import svg_const, svg_utils
 from uc2.formats.svg.svg_utils import get_svg_trafo, check_svg_attr, \
     parse_svg_points, parse_svg_coords, parse_svg_color, parse_svg_stops, \
-    get_svg_level_trafo
+    get_svg_level_trafo, parse_svg_numbers, copy_lists
+from uc2.formats.xml_.xml_filters import get_obj_attrs
+from uc2.formats.xml_.xml_model import XmlContentStream
+from uc2.libimg.handlers import JPEG_FMT, get_jpeg_orientation
 
 LOG = logging.getLogger(__name__)
 
+# Element attributes which define level style
+STYLE_ATTRS = frozenset(svg_const.SVG_STYLE.keys() + ['class', 'style'])
+
+# Number of XML fragments joined into single write call
+WRITE_BUFFER_SIZE = 4096
+
 SK2_UNITS = {
     svg_const.SVG_PX: uc2const.UNIT_PX,
     svg_const.SVG_PC: uc2const.UNIT_PX,
@@ -93,6 +103,12 @@ class SVG_to_SK2_Translator(object):
     sk2_mtds = None
     svg_mtds = None
     id_map = None
+    use_cache = {}
+    use_cacheable = True
+    style_cache = {}
+    sk2_style_cache = {}
+    color_cache = {}
+    cache_stats = {}
 
     def translate(self, svg_doc, sk2_doc):
         self.svg_doc = svg_doc
@@ -105,6 +121,12 @@ class SVG_to_SK2_Translator(object):
         self.id_map = self.svg_mt.id_map
         self.profiles = {}
         self.current_color = ''
+        self.use_cache = {}
+        self.use_cacheable = True
+        self.clear_style_cache()
+        self.color_cache = {}
+        self.cache_stats = {'style': [0, 0], 'sk2 style': [0, 0],
+                            'color': [0, 0]}
         self.define_units()
         self.translate_units()
         self.translate_page()
@@ -114,6 +136,7 @@ class SVG_to_SK2_Translator(object):
         if len(self.page.childs) > 1 and not self.layer.childs:
             self.page.childs.remove(self.layer)
         self.sk2_mt.do_update()
+        self.report_cache_stats()
         self._clear_objs()
 
     def _clear_objs(self):
@@ -127,9 +150,24 @@ class SVG_to_SK2_Translator(object):
                 self.__dict__[item] = None
         self.dpi_coeff = 1.0
         self.current_color = ''
+        self.use_cacheable = True
 
     # --- Utility methods
 
+    def clear_style_cache(self):
+        self.style_cache = {}
+        self.sk2_style_cache = {}
+
+    def report_cache_stats(self):
+        rates = []
+        for name in ('style', 'sk2 style', 'color'):
+            hits, misses = self.cache_stats[name]
+            rate = 100.0 * hits / (hits + misses) if hits + misses else 0.0
+            rates.append('%s %.1f%% (%d/%d)' % (name, rate, hits,
+                                                 hits + misses))
+        msg = 'SVG style cache hit rates: %s' % ', '.join(rates)
+        events.emit(events.MESSAGES, msgconst.INFO, msg)
+
     def define_units(self):
         if not self.svg_doc.config.svg_dpi:
             if 'width' in self.svg_mt.attrs and \
@@ -291,11 +329,30 @@ class SVG_to_SK2_Translator(object):
         return None
 
     def get_level_style(self, svg_obj, style_in):
+        """
+        Returns style dict of element level. Dicts are cached by
+        inherited style and element style attributes, so returned
+        dict is shared and should not be modified.
+        """
         if 'color' in svg_obj.attrs:
             if svg_obj.attrs['color'] == 'inherit':
                 pass
             else:
                 self.current_color = svg_obj.attrs['color']
+        attrs = [item for item in svg_obj.attrs.items()
+                 if item[0] in STYLE_ATTRS]
+        attrs.sort()
+        key = (id(style_in), tuple(attrs))
+        if key in self.style_cache:
+            self.cache_stats['style'][0] += 1
+            return self.style_cache[key][0]
+        self.cache_stats['style'][1] += 1
+        style = self.parse_level_style(svg_obj, style_in)
+        # Inherited style is kept to preserve its id
+        self.style_cache[key] = (style, style_in)
+        return style
+
+    def parse_level_style(self, svg_obj, style_in):
         style = deepcopy(style_in)
         for item in svg_const.SVG_STYLE.keys():
             if item in svg_obj.attrs:
@@ -328,8 +385,41 @@ class SVG_to_SK2_Translator(object):
         return style
 
     def get_sk2_style(self, svg_obj, style, text_style=False):
-        sk2_style = [[], [], [], []]
+        """
+        Returns SK2 style of element. Parsed styles are cached by
+        level style, text flag and current color; returned style
+        is a copy owned by caller.
+        """
         style = self.get_level_style(svg_obj, style)
+        key = (id(style), text_style, self.current_color)
+        if key in self.sk2_style_cache:
+            self.cache_stats['sk2 style'][0] += 1
+            entry = self.sk2_style_cache[key]
+        else:
+            self.cache_stats['sk2 style'][1] += 1
+            sk2_style = self.parse_sk2_style(style, text_style)
+            entry = (sk2_style, self.style_opts, self.current_color)
+            self.sk2_style_cache[key] = entry
+        sk2_style, style_opts, self.current_color = entry
+        self.style_opts = deepcopy(style_opts) if style_opts else {}
+        return copy_lists(sk2_style)
+
+    def parse_color(self, sclr, alpha=1.0):
+        """
+        Returns cached color of SVG color string. Color list
+        is shared, so it should be copied before modification.
+        """
+        key = (sclr, alpha, self.current_color)
+        if key in self.color_cache:
+            self.cache_stats['color'][0] += 1
+        else:
+            self.cache_stats['color'][1] += 1
+            self.color_cache[key] = parse_svg_color(sclr, alpha,
+                                                    self.current_color)
+        return self.color_cache[key]
+
+    def parse_sk2_style(self, style, text_style=False):
+        sk2_style = [[], [], [], []]
         self.style_opts = {}
 
         if 'display' in style and style['display'] == 'none':
@@ -364,7 +454,7 @@ class SVG_to_SK2_Translator(object):
                     tr = [] + self.style_opts['grad-trafo']
                     self.style_opts['fill-grad-trafo'] = tr
             else:
-                clr = parse_svg_color(fill, alpha, self.current_color)
+                clr = self.parse_color(fill, alpha)
                 if clr:
                     sk2_style[0] = [fillrule, sk2const.FILL_SOLID, clr]
 
@@ -381,12 +471,7 @@ class SVG_to_SK2_Translator(object):
 
             dash = []
             if style['stroke-dasharray'] != 'none':
-                try:
-                    code = compile('dash=[' + style['stroke-dasharray'] + ']',
-                                   '<string>', 'exec')
-                    exec code
-                except Exception:
-                    dash = []
+                dash = parse_svg_numbers(style['stroke-dasharray'])
             if dash:
                 sk2_dash = []
                 for item in dash:
@@ -412,7 +497,7 @@ class SVG_to_SK2_Translator(object):
                     self.style_opts['stroke-fill'] = stroke_fill
                     self.style_opts['stroke-fill-color'] = stroke_fill[2][2][0][
                         1]
-                    clr = parse_svg_color('black')
+                    clr = self.parse_color('black')
                     sk2_style[1] = [stroke_rule, stroke_width, clr, dash,
                                     stroke_linecap, stroke_linejoin,
                                     stroke_miterlimit, 0, 1, []]
@@ -420,7 +505,7 @@ class SVG_to_SK2_Translator(object):
                         tr = [] + self.style_opts['grad-trafo']
                         self.style_opts['stroke-grad-trafo'] = tr
             else:
-                clr = parse_svg_color(stroke, alpha, self.current_color)
+                clr = self.parse_color(stroke, alpha)
                 if clr:
                     sk2_style[1] = [stroke_rule, stroke_width, clr, dash,
                                     stroke_linecap, stroke_linejoin,
@@ -675,6 +760,9 @@ class SVG_to_SK2_Translator(object):
                 if len(vals) == 2:
                     style[vals[0].strip()] = vals[1].strip()
             self.classes[class_.strip()] = style
+        # Level styles and instances depend on classes
+        self.clear_style_cache()
+        self.use_cache = {}
 
     def translate_color_profile(self, svg_obj):
         self.profiles[svg_obj.attrs['name']] = svg_obj
@@ -686,6 +774,7 @@ class SVG_to_SK2_Translator(object):
 
         if 'inkscape:groupmode' in svg_obj.attrs:
             if svg_obj.attrs['inkscape:groupmode'] == 'layer':
+                self.use_cacheable = False
                 name = 'Layer %d' % len(self.page.childs)
                 if 'inkscape:label' in svg_obj.attrs:
                     name = svg_obj.attrs['inkscape:label']
@@ -747,6 +836,8 @@ class SVG_to_SK2_Translator(object):
 
         curve = None
         if style[1] and 'stroke-fill' in self.style_opts:
+            # Stroke outline is built in page coordinates
+            self.use_cacheable = False
             obj.update()
             stroke_obj = obj.to_curve()
             pths = libgeom.apply_trafo_to_paths(stroke_obj.get_initial_paths(),
@@ -983,11 +1074,67 @@ class SVG_to_SK2_Translator(object):
         if 'xlink:href' in svg_obj.attrs:
             obj_id = svg_obj.attrs['xlink:href'][1:]
             if obj_id in self.id_map:
-                self.translate_obj(parent, self.id_map[obj_id], tr, stl)
+                self.translate_instance(parent, obj_id, tr, stl)
             else:
                 LOG.warn('<use> object id %s is not found', obj_id)
 
+    def translate_instance(self, parent, obj_id, trafo, style):
+        """
+        Translates referenced object once per inherited style and
+        color. Next references get transformed copies of translated
+        objects. Objects which translation depends on document trafo
+        (texts, stroke outlines) or has side effects (layers) are
+        translated on every reference.
+        """
+        key = (obj_id, self.current_color, tuple(sorted(style.items())))
+        instance = self.use_cache.get(key)
+        if instance:
+            inv_trafo, objs, self.current_color = instance
+            tr = libgeom.multiply_trafo(inv_trafo, trafo)
+            for obj in objs:
+                obj = obj.copy()
+                self.transform_instance(obj, parent, tr)
+                parent.childs.append(obj)
+            return
+
+        cacheable = self.use_cacheable
+        self.use_cacheable = instance is None
+        group = sk2_model.Group(parent.config, parent)
+        self.translate_obj(group, self.id_map[obj_id], trafo, style)
+        for obj in group.childs:
+            obj.parent = parent
+        parent.childs += group.childs
+        if instance is None:
+            instance = False
+            if self.use_cacheable:
+                try:
+                    inv_trafo = libgeom.invert_trafo(trafo)
+                    instance = (inv_trafo, group.childs, self.current_color)
+                except Exception:
+                    # Singular trafo
+                    pass
+            self.use_cache[key] = instance
+        self.use_cacheable = cacheable and self.use_cacheable
+
+    def transform_instance(self, obj, parent, trafo):
+        """
+        Transforms copy of cached object and sets parents
+        of the copy and its descendants.
+        """
+        obj.parent = parent
+        if obj.is_primitive:
+            obj.trafo = libgeom.multiply_trafo(obj.trafo, trafo)
+            if obj.fill_trafo:
+                obj.fill_trafo = libgeom.multiply_trafo(obj.fill_trafo, trafo)
+            if obj.stroke_trafo:
+                obj.stroke_trafo = libgeom.multiply_trafo(obj.stroke_trafo,
+                                                          trafo)
+        for child in obj.childs:
+            self.transform_instance(child, obj, trafo)
+
     def translate_text(self, parent, svg_obj, trafo, style):
+        # Text trafo depends on document trafo
+        self.use_cacheable = False
         cfg = parent.config
         stl = self.get_level_style(svg_obj, style)
         sk2_style = self.get_sk2_style(svg_obj, stl, True)
@@ -1101,6 +1248,7 @@ class SK2_to_SVG_Translator(object):
     defs_count = 0
     trafo = None
     defs = None
+    body = None
     svg_doc = None
     sk2_doc = None
     svg_mt = None
@@ -1126,6 +1274,7 @@ class SK2_to_SVG_Translator(object):
             if item.tag == 'defs':
                 self.defs = item
                 break
+        self.body = self.get_body()
         for item in self.sk2_mt.childs:
             if item.cid == sk2_model.PAGES:
                 page = item.childs[0]
@@ -1140,13 +1289,14 @@ class SK2_to_SVG_Translator(object):
                 self.trafo[5] = self.dy
                 self.page_dx = 0.0
                 for page in item.childs:
-                    self.translate_page(self.svg_mt, page)
+                    self.translate_page(self.body, page)
         self.indent_level = 0
         if self.defs.childs:
             self.add_spacer(self.defs)
         else:
             self.svg_mt.childs.remove(self.defs)
-        self.add_spacer(self.svg_mt)
+        self.add_spacer(self.body)
+        self.body = None
         self.svg_doc = None
         self.sk2_doc = None
         self.svg_mt = None
@@ -1154,6 +1304,9 @@ class SK2_to_SVG_Translator(object):
         self.sk2_mtds = None
         self.svg_mtds = None
 
+    def get_body(self):
+        return self.svg_mt
+
     def add_spacer(self, parent):
         spacer = '\n' + '\t' * self.indent_level
         parent.childs.append(svg_utils.create_spacer(spacer))
@@ -1162,14 +1315,24 @@ class SK2_to_SVG_Translator(object):
         self.add_spacer(parent)
         parent.childs.append(obj)
 
+    def start_group(self, parent, group):
+        """
+        Appends group element and returns parent for group childs.
+        """
+        self.append_obj(parent, group)
+        return group
+
+    def end_group(self, parent, group):
+        self.add_spacer(parent)
+
     def translate_page(self, dest_parent, source_obj):
         w, h = source_obj.page_format[1]
         self.trafo[4] = w / 2.0 + self.page_dx
         if self.page_dx:
             rect = svg_utils.create_rect(self.page_dx, self.dy - h / 2.0, w, h)
             rect.attrs['style'] = 'fill:none;stroke:black;'
-            self.append_obj(self.svg_mt, rect)
-        self.translate_objs(self.svg_mt, source_obj.childs)
+            self.append_obj(dest_parent, rect)
+        self.translate_objs(dest_parent, source_obj.childs)
         self.page_dx += w + 30.0
 
     def translate_objs(self, dest_parent, source_objs):
@@ -1201,9 +1364,9 @@ class SK2_to_SVG_Translator(object):
         group = svg_utils.create_xmlobj('g')
         if not source_obj.properties[0]:
             group.attrs['style'] = 'display:none;'
-        self.translate_objs(group, source_obj.childs)
-        self.add_spacer(group)
-        self.append_obj(dest_parent, group)
+        parent = self.start_group(dest_parent, group)
+        self.translate_objs(parent, source_obj.childs)
+        self.end_group(parent, group)
 
     def translate_group(self, dest_parent, source_obj):
         if source_obj.is_container:
@@ -1223,9 +1386,9 @@ class SK2_to_SVG_Translator(object):
 
             group = svg_utils.create_xmlobj('g')
             group.attrs['clip-path'] = 'url(#%s)' % clip_id
-            self.translate_objs(group, source_obj.childs[1:])
-            self.add_spacer(group)
-            self.append_obj(dest_parent, group)
+            parent = self.start_group(dest_parent, group)
+            self.translate_objs(parent, source_obj.childs[1:])
+            self.end_group(parent, group)
 
             if clip.style[1] and not clip.style[1][7]:
                 stroke_obj = clip.copy()
@@ -1234,9 +1397,9 @@ class SK2_to_SVG_Translator(object):
                 self.translate_primitive(dest_parent, stroke_obj)
         else:
             group = svg_utils.create_xmlobj('g')
-            self.translate_objs(group, source_obj.childs)
-            self.add_spacer(group)
-            self.append_obj(dest_parent, group)
+            parent = self.start_group(dest_parent, group)
+            self.translate_objs(parent, source_obj.childs)
+            self.end_group(parent, group)
 
     def make_clippath(self, source_obj):
         clippath = svg_utils.create_xmlobj('clipPath')
@@ -1269,17 +1432,34 @@ class SK2_to_SVG_Translator(object):
         if arrows:
             self.translate_primitive(dest_parent, arrows)
 
-    def translate_pixmap(self, dest_parent, source_obj):
-        surface = source_obj.handler.get_surface(self.sk2_doc.cms)
+    def get_pixmap_data(self, source_obj):
+        """
+        Returns (mime type, data) of pixmap image. Unaltered RGB
+        JPEG or PNG data is embedded as is, other bitmaps are
+        rendered to PNG. Viewers rotate JPEG by EXIF Orientation
+        but bitmap is not rotated, so such JPEG is rendered too.
+        """
+        hnd = source_obj.handler
+        source = hnd.get_source_str()
+        if source and not hnd.alpha and \
+                source_obj.colorspace == uc2const.IMAGE_RGB and \
+                (source[0] != JPEG_FMT or
+                 get_jpeg_orientation(source[1]) == 1):
+            return 'image/%s' % source[0].lower(), source[1]
+        surface = hnd.get_surface(self.sk2_doc.cms)
         image_stream = StringIO()
         surface.write_to_png(image_stream)
-        content = b64encode(image_stream.getvalue())
+        return 'image/png', image_stream.getvalue()
+
+    def translate_pixmap(self, dest_parent, source_obj):
+        mime, data = self.get_pixmap_data(source_obj)
         image = svg_utils.create_xmlobj('image')
         w, h = source_obj.get_size()
         trafo = [1.0, 0.0, 0.0, -1.0, 0.0, 0.0]
         trafo = libgeom.multiply_trafo(trafo, source_obj.trafo)
         trafo = libgeom.multiply_trafo(trafo, self.trafo)
-        image.attrs['xlink:href'] = 'data:image/png;base64,' + content
+        image.attrs['xlink:href'] = 'data:%s;base64,%s' % (mime,
+                                                            b64encode(data))
         image.attrs['transform'] = 'matrix(%s)' % trafo.__str__()[1:-1]
         image.attrs['x'] = '0'
         image.attrs['y'] = str(-h)
@@ -1390,15 +1570,75 @@ class SK2_to_SVG_Translator(object):
         return grad_id
 
     def translate_stops(self, parent, stops):
-        for stop in stops:
+        rgb_colors = self.sk2_doc.cms.get_colors([stop[1] for stop in stops])
+        for stop, rgb_color in zip(stops, rgb_colors):
             attrs = {}
             offset, color = stop
             attrs['offset'] = str(offset)
-            clr = self.sk2_doc.cms.get_rgb_color(color)
-            clr = cms.rgb_to_hexcolor(clr[1])
+            clr = cms.rgb_to_hexcolor(rgb_color[1])
             alpha = str(color[2])
             attrs['style'] = 'stop-color:%s;stop-opacity:%s;' % (clr, alpha)
             stop_obj = svg_utils.create_xmlobj('stop', attrs)
             self.append_obj(parent, stop_obj)
         self.indent_level -= 1
         self.add_spacer(parent)
+
+
+class SK2_to_SVG_Writer(SK2_to_SVG_Translator):
+    """
+    Translator which writes document body into provided stream
+    as soon as SK2 objects are visited instead of building
+    XMLObject tree. Gradients and clip paths are collected
+    into defs of SVG model; body is placed after defs
+    as XmlContentStream element.
+    """
+    stream = None
+    buffer = None
+
+    def translate(self, sk2_doc, svg_doc, stream=None):
+        self.stream = stream
+        self.buffer = []
+        SK2_to_SVG_Translator.translate(self, sk2_doc, svg_doc)
+        self.flush()
+        self.stream = None
+        self.buffer = None
+
+    def get_body(self):
+        self.svg_mt.childs.append(XmlContentStream(self.stream))
+        return self.stream
+
+    def write(self, data):
+        self.buffer.append(data)
+        if len(self.buffer) >= WRITE_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.stream.write(''.join(self.buffer))
+        self.buffer = []
+
+    def add_spacer(self, parent):
+        if parent is self.stream:
+            self.write('\n' + '\t' * self.indent_level)
+        else:
+            SK2_to_SVG_Translator.add_spacer(self, parent)
+
+    def append_obj(self, parent, obj):
+        if parent is self.stream:
+            self.add_spacer(parent)
+            self.write('<%s%s />' % (obj.tag, get_obj_attrs(obj)))
+        else:
+            SK2_to_SVG_Translator.append_obj(self, parent, obj)
+
+    def start_group(self, parent, group):
+        if parent is self.stream:
+            self.add_spacer(parent)
+            self.write('<%s%s>' % (group.tag, get_obj_attrs(group)))
+            return parent
+        return SK2_to_SVG_Translator.start_group(self, parent, group)
+
+    def end_group(self, parent, group):
+        if parent is self.stream:
+            self.add_spacer(parent)
+            self.write('</%s>' % group.tag)
+        else:
+            SK2_to_SVG_Translator.end_group(self, parent, group)
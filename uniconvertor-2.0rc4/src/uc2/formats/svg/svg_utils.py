@@ -30,6 +30,24 @@ F13 = 1.0 / 3.0
 F23 = 2.0 / 3.0
 LOG = logging.getLogger(__name__)
 
+NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+NUMBER_RE = re.compile(NUMBER)
+PATH_CMD_RE = re.compile(r'([MmZzLlHhVvCcSsQqTtAa])')
+# rx ry x-axis-rotation large-arc-flag sweep-flag x y
+ARC_RE = re.compile(r'\s*,?\s*'.join(
+    ['(%s)' % NUMBER] * 3 + ['([01])'] * 2 + ['(%s)' % NUMBER] * 2))
+TRAFO_RE = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)'
+                      r'\s*\(([^)]*)\)')
+
+
+def copy_lists(obj):
+    """
+    Fast deepcopy of nested lists with immutable items
+    (SK2 styles, colors, trafos).
+    """
+    return [copy_lists(item) if isinstance(item, list) else item
+            for item in obj]
+
 
 def check_svg_attr(svg_obj, attr, value=None):
     if value is None: return attr in svg_obj.attrs
@@ -66,17 +84,28 @@ def trafo_matrix(m11, m21, m12, m22, dx, dy):
     return [m11, m21, m12, m22, dx, dy]
 
 
+TRAFO_FUNCS = {
+    'matrix': trafo_matrix,
+    'translate': trafo_translate,
+    'scale': trafo_scale,
+    'rotate': trafo_rotate,
+    'skewX': trafo_skewX,
+    'skewY': trafo_skewY,
+}
+
+
+def parse_svg_numbers(snumbers):
+    return map(float, NUMBER_RE.findall(snumbers))
+
+
 def get_svg_trafo(strafo):
     trafo = [] + libgeom.NORMAL_TRAFO
-    trs = strafo.split(') ')
+    trs = TRAFO_RE.findall(strafo)
     trs.reverse()
-    for tr in trs:
-        tr += ')'
-        tr = tr.replace(', ', ',').replace(' ', ',').replace('))', ')')
+    for name, args in trs:
         try:
-            code = compile('tr=trafo_' + tr, '<string>', 'exec')
-            exec code
-        except:
+            tr = TRAFO_FUNCS[name](*parse_svg_numbers(args))
+        except (TypeError, ValueError, ZeroDivisionError):
             continue
         trafo = libgeom.multiply_trafo(trafo, tr)
     return trafo
@@ -97,37 +126,23 @@ def get_svg_level_trafo(svg_obj, trafo):
 
 
 def parse_svg_points(spoints):
-    points = []
-    spoints = re.sub('  *', ' ', spoints)
-    spoints = spoints.replace('-', ',-').replace('e,-', 'e-')
-    spoints = spoints.replace(', ,', ',').replace(' ', ',')
-    pairs = spoints.replace(',,', ',').split(',')
-    if not pairs[0]: pairs = pairs[1:]
-    pairs = [pairs[i:i + 2] for i in range(0, len(pairs), 2)]
-    for pair in pairs:
-        try:
-            points.append([float(pair[0]), float(pair[1])])
-        except:
-            continue
-    return points
+    vals = parse_svg_numbers(spoints)
+    return [vals[i:i + 2] for i in range(0, len(vals) - 1, 2)]
 
 
 def parse_svg_coords(scoords):
-    scoords = scoords.strip().replace(',', ' ').replace('-', ' -')
-    scoords = scoords.replace('e -', 'e-').strip()
-    scoords = re.sub('  *', ' ', scoords)
-    if scoords:
-        processed_items = []
-        for item in scoords.split(' '):
-            count = item.count('.')
-            if count > 1:
-                subitems = item.rsplit('.', count - 1)
-                processed_items.append(subitems[0])
-                processed_items += ['.' + s for s in subitems[1:]]
-            else:
-                processed_items.append(item)
-        return [float(item) for item in processed_items]
-    return None
+    return parse_svg_numbers(scoords) or None
+
+
+def parse_svg_arc_coords(scoords):
+    """
+    Parses elliptical arc arguments; arc flags
+    may be not separated from following numbers.
+    """
+    coords = []
+    for match in ARC_RE.finditer(scoords):
+        coords += [float(item) for item in match.groups()]
+    return coords
 
 
 def parse_svg_color(sclr, alpha=1.0, current_color=''):
@@ -195,22 +210,14 @@ def base_point(point):
 
 
 def parse_svg_path_cmds(pathcmds):
-    index = 0
-    last = None
-    last_index = 0
+    items = PATH_CMD_RE.split(pathcmds)
     cmds = []
-    pathcmds = re.sub('  *', ' ', pathcmds)
-    for item in pathcmds:
-        if item in 'MmZzLlHhVvCcSsQqTtAa':
-            if last:
-                coords = parse_svg_coords(pathcmds[last_index + 1:index])
-                cmds.append((last, coords))
-            last = item
-            last_index = index
-        index += 1
-
-    coords = parse_svg_coords(pathcmds[last_index + 1:index])
-    cmds.append([last, coords])
+    for index in range(1, len(items), 2):
+        cmd = items[index]
+        if cmd in 'Aa':
+            cmds.append((cmd, parse_svg_arc_coords(items[index + 1])))
+        else:
+            cmds.append((cmd, parse_svg_numbers(items[index + 1])))
 
     paths = []
     path = []
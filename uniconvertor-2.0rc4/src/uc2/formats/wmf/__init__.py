@@ -17,9 +17,9 @@
 
 from uc2 import uc2const
 from uc2.formats.sk2.sk2_presenter import SK2_Presenter
+from uc2.formats.sniffing import get_header
 from uc2.formats.wmf.wmf_presenter import WMF_Presenter
 from uc2.formats.wmf.wmf_const import WMF_SIGNATURE, METAFILETYPES, METAVERSIONS
-from uc2.utils.fsutils import get_fileptr
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -52,14 +52,11 @@ def wmf_saver(sk2_doc, filename=None, fileptr=None,
         sk2_doc.save(filename, fileptr)
 
 
-def check_wmf(path):
-    fileptr = get_fileptr(path)
-    sign = fileptr.read(len(WMF_SIGNATURE))
-    fileptr.seek(0)
-    metatype = fileptr.read(2)
-    fileptr.read(2)
-    metaver = fileptr.read(2)
-    fileptr.close()
+def check_wmf(path, header=None):
+    header = get_header(path, header)
+    sign = header[:len(WMF_SIGNATURE)]
+    metatype = header[:2]
+    metaver = header[4:6]
     if sign == WMF_SIGNATURE:
         return True
     if metatype in METAFILETYPES and metaver in METAVERSIONS:
@@ -15,8 +15,8 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from uc2.formats.sniffing import get_header_lines
 from uc2.formats.xml_.xml_presenter import XML_Presenter
-from uc2.utils.fsutils import get_fileptr
 from uc2.utils.mixutils import merge_cnf
 
 
@@ -34,15 +34,8 @@ def xml__saver(doc, filename=None, fileptr=None, translate=False,
     doc.save(filename, fileptr)
 
 
-def check_xml_(path):
-    fileptr = get_fileptr(path)
-    ret = False
-    i = 0
-    while i < 20:
-        line = fileptr.readline()
+def check_xml_(path, header=None):
+    for line in get_header_lines(path, header):
         if not line.find('<?xml ') == -1:
-            ret = True
-            break
-        i += 1
-    fileptr.close()
-    return ret
+            return True
+    return False
@@ -15,8 +15,15 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import shutil
+
 from uc2.formats.generic_filters import AbstractXMLLoader, AbstractSaver
-from uc2.formats.xml_.xml_model import XMLObject, XmlContentText
+from uc2.formats.xml_.xml_model import XMLObject, XmlContentText, \
+    XmlContentStream
+
+
+def get_obj_attrs(obj):
+    return ''.join([' %s="%s"' % item for item in obj.attrs.items()])
 
 class XML_Loader(AbstractXMLLoader):
 
@@ -96,11 +103,7 @@ class XML_Saver(AbstractSaver):
             self.writeln(ind + '<%s%s />' % (obj.tag, attrs))
 
     def get_obj_attrs(self, obj):
-        line = ''
-        if not obj.attrs:return line
-        for item in obj.attrs.keys():
-            line += ' %s="%s"' % (item, obj.attrs[item])
-        return line
+        return get_obj_attrs(obj)
 
 class Advanced_XML_Saver(XML_Saver):
 
@@ -115,6 +118,10 @@ class Advanced_XML_Saver(XML_Saver):
         if obj.tag == 'spacer':
             self.write(obj.text)
             return
+        if isinstance(obj, XmlContentStream):
+            obj.fileptr.seek(0)
+            shutil.copyfileobj(obj.fileptr, self.fileptr)
+            return
         attrs = self.get_obj_attrs(obj)
         if obj.childs:
             start = '<%s%s>' % (obj.tag, attrs)
@@ -56,3 +56,17 @@ class XmlContentText(XMLObject):
         XMLObject.__init__(self, 'spacer')
 
     def is_content(self): return True
+
+
+class XmlContentStream(XMLObject):
+    """
+    Placeholder of serialized XML fragment stored in file-like
+    object. Fragment is copied as is on saving.
+    """
+    fileptr = None
+
+    def __init__(self, fileptr=None):
+        self.fileptr = fileptr
+        XMLObject.__init__(self, 'stream')
+
+    def is_content(self): return True
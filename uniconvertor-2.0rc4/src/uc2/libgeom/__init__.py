@@ -22,6 +22,7 @@ from cwrap import *
 from flattering import get_flattened_paths, flat_paths, flat_path
 from objs import *
 from points import *
+from rtree import RTree
 from shaping import intersect_paths, fuse_paths, trim_paths, excluse_paths
 from text_on_path import set_text_on_path
 from trafo import *
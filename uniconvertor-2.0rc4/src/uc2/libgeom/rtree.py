@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import math
+
+from bbox import normalize_bbox
+
+NODE_SIZE = 16
+
+
+def _bbox_union(entries):
+    x0 = min(item[0][0] for item in entries)
+    y0 = min(item[0][1] for item in entries)
+    x1 = max(item[0][2] for item in entries)
+    y1 = max(item[0][3] for item in entries)
+    return [x0, y0, x1, y1]
+
+
+def _x_center(entry):
+    return entry[0][0] + entry[0][2]
+
+
+def _y_center(entry):
+    return entry[0][1] + entry[0][3]
+
+
+class RTree(object):
+    """
+    Static R-tree over bounding boxes bulk loaded by Sort-Tile-Recursive
+    algorithm. Tree is built from (bbox, value) pairs; items with empty
+    bbox are not indexed. Query results keep the order of source items.
+    """
+    count = 0
+    size = 0
+    root = None
+    bbox = []
+
+    def __init__(self, items, node_size=NODE_SIZE):
+        items = list(items)
+        self.count = len(items)
+        self.node_size = max(node_size, 2)
+        entries = [(normalize_bbox(bbox), index, value)
+                   for index, (bbox, value) in enumerate(items) if bbox]
+        self.size = len(entries)
+        if entries:
+            self.root = self._build(entries, True)
+            self.bbox = self.root[0]
+
+    def __len__(self):
+        return self.size
+
+    def _pack(self, entries, leaf):
+        """
+        Packs entries into nodes of parent level.
+        Node is a (bbox, childs, is_leaf) tuple.
+        """
+        size = self.node_size
+        nodes_num = int(math.ceil(len(entries) / float(size)))
+        slices = int(math.ceil(math.sqrt(nodes_num)))
+        slice_size = slices * size
+        entries = sorted(entries, key=_x_center)
+        nodes = []
+        for i in range(0, len(entries), slice_size):
+            vslice = sorted(entries[i:i + slice_size], key=_y_center)
+            for j in range(0, len(vslice), size):
+                childs = vslice[j:j + size]
+                nodes.append((_bbox_union(childs), childs, leaf))
+        return nodes
+
+    def _build(self, entries, leaf):
+        nodes = self._pack(entries, leaf)
+        while len(nodes) > 1:
+            nodes = self._pack(nodes, False)
+        return nodes[0]
+
+    def query_bbox(self, bbox):
+        """
+        Returns list of values which bounding boxes
+        intersect provided bounding box.
+        """
+        if self.root is None or not bbox:
+            return []
+        x0, y0, x1, y1 = normalize_bbox(bbox)
+        result = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            for child in node[1]:
+                cx0, cy0, cx1, cy1 = child[0]
+                if cx0 > x1 or cx1 < x0 or cy0 > y1 or cy1 < y0:
+                    continue
+                if node[2]:
+                    result.append(child[1:])
+                else:
+                    stack.append(child)
+        result.sort()
+        return [item[1] for item in result]
+
+    def query_point(self, point):
+        """
+        Returns list of values which bounding boxes contain the point.
+        """
+        x, y = point
+        return self.query_bbox([x, y, x, y])
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+from PIL import Image
+
+from uc2 import libgeom
+from uc2.libimg.handlers import EditableImageHandler
+
+LOG = logging.getLogger(__name__)
+
+FILTERS = {
+    'nearest': Image.NEAREST,
+    'bilinear': Image.BILINEAR,
+    'bicubic': Image.BICUBIC,
+    'lanczos': Image.LANCZOS,
+}
+DEFAULT_FILTER = 'bicubic'
+
+
+def get_filter(name=None):
+    name = str(name or DEFAULT_FILTER).lower()
+    if name not in FILTERS:
+        LOG.warning('Unknown resampling filter "%s", %s is used',
+                    name, DEFAULT_FILTER)
+        name = DEFAULT_FILTER
+    return FILTERS[name]
+
+
+def get_downsampled_size(size, resolution, dpi):
+    """
+    Returns pixel size of image scaled to target dpi
+    or None if effective resolution does not exceed it.
+    """
+    h_dpi, v_dpi = resolution
+    if h_dpi <= dpi and v_dpi <= dpi:
+        return None
+    w, h = size
+    w = max(1, int(round(w * min(1.0, float(dpi) / h_dpi))))
+    h = max(1, int(round(h * min(1.0, float(dpi) / v_dpi))))
+    return None if (w, h) == tuple(size) else (w, h)
+
+
+def resize_images(jobs, resample=None, workers=None):
+    """
+    Resizes images of (image, size) jobs in thread pool
+    (PIL releases GIL while resampling) and returns
+    list of resized images.
+    """
+    resample = get_filter(resample)
+
+    def resize(job):
+        image, size = job
+        return image.resize(size, resample) if image else None
+
+    workers = min(workers or multiprocessing.cpu_count(), len(jobs))
+    if workers < 2:
+        return [resize(job) for job in jobs]
+    pool = ThreadPool(workers)
+    try:
+        return pool.map(resize, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def get_pixmaps(model):
+    pixmaps = []
+    stack = [model]
+    while stack:
+        obj = stack.pop()
+        if obj.is_pixmap:
+            pixmaps.append(obj)
+        stack.extend(obj.childs)
+    return pixmaps
+
+
+def get_downsampler(cnf):
+    """
+    Returns PixmapDownsampler for image-dpi and image-filter
+    export options or None if downsampling is not requested.
+    """
+    dpi = cnf.get('image-dpi')
+    try:
+        dpi = float(dpi) if dpi else 0
+    except ValueError:
+        LOG.warning('Wrong image-dpi value "%s"', dpi)
+        dpi = 0
+    if dpi <= 0:
+        return None
+    return PixmapDownsampler(dpi, cnf.get('image-filter'))
+
+
+class PixmapDownsampler(object):
+    """
+    Temporarily replaces bitmaps of document pixmaps which effective
+    resolution exceeds target dpi by downsampled ones. Pixmap trafo
+    is scaled to keep pixmap geometry. restore() returns original
+    bitmaps, so source document is not changed by export.
+    """
+
+    def __init__(self, dpi, resample=None, workers=None):
+        self.dpi = float(dpi)
+        self.resample = resample
+        self.workers = workers
+        self.replaced = []
+
+    def apply(self, model):
+        pixmaps = []
+        jobs = []
+        for pixmap in get_pixmaps(model):
+            size = get_downsampled_size(pixmap.size,
+                                        pixmap.get_resolution(), self.dpi)
+            if size:
+                pixmaps.append((pixmap, size))
+                jobs.append((pixmap.handler.bitmap, size))
+                jobs.append((pixmap.handler.alpha, size))
+        if not pixmaps:
+            return 0
+        images = resize_images(jobs, self.resample, self.workers)
+        for index, (pixmap, size) in enumerate(pixmaps):
+            w, h = pixmap.size
+            trafo = [float(w) / size[0], 0.0, 0.0, float(h) / size[1],
+                     0.0, 0.0]
+            self.replaced.append((pixmap, pixmap.handler, pixmap.trafo))
+            handler = EditableImageHandler(pixmap)
+            handler.set_images(*images[index * 2:index * 2 + 2])
+            pixmap.handler = handler
+            pixmap.trafo = libgeom.multiply_trafo(trafo, pixmap.trafo)
+        LOG.info('%d pixmaps are downsampled to %s dpi',
+                 len(pixmaps), self.dpi)
+        return len(pixmaps)
+
+    def restore(self):
+        for pixmap, handler, trafo in self.replaced:
+            pixmap.handler = handler
+            pixmap.trafo = trafo
+        self.replaced = []
@@ -31,14 +31,33 @@ from . import magickwand
 
 TIFF_FMT = 'TIFF'
 PNG_FMT = 'PNG'
+JPEG_FMT = 'JPEG'
+
+SIGNATURES = (('\xff\xd8\xff', JPEG_FMT), ('\x89PNG\r\n\x1a\n', PNG_FMT))
 
 LOG = logging.getLogger(__name__)
 
+EXIF_ORIENTATION = 0x0112
+
+
+def get_jpeg_orientation(image_str):
+    """
+    Returns EXIF Orientation value of JPEG data (1 if there is no
+    such tag) or None if EXIF data cannot be read.
+    """
+    try:
+        exif = Image.open(StringIO(image_str))._getexif() or {}
+    except Exception:
+        return None
+    return exif.get(EXIF_ORIENTATION, 1)
+
 
 class ImageHandler(object):
     pixmap = None
     bitmap = None
     alpha = None
+    bitmap_str = None
+    alpha_str = None
 
     cdata = None
     ps_cdata = None
@@ -78,22 +97,54 @@ class ImageHandler(object):
         image.load()
         return image
 
+    def get_bitmap_str(self):
+        if self.bitmap_str is None:
+            self.bitmap_str = self._image2str(self.bitmap)
+        return self.bitmap_str
+
+    def get_alpha_str(self):
+        if self.alpha_str is None:
+            self.alpha_str = self._image2str(self.alpha)
+        return self.alpha_str
+
+    def get_source_str(self):
+        """
+        Returns (format, data) of encoded JPEG or PNG bitmap which
+        still matches the bitmap: either original file data kept
+        on loading or data already encoded on saving. Returns None
+        if there is no such data, so image should be re-encoded.
+        """
+        if self.bitmap and self.bitmap_str:
+            for signature, fmt in SIGNATURES:
+                if self.bitmap_str.startswith(signature):
+                    return fmt, self.bitmap_str
+        return None
+
     def get_bitmap_b64str(self):
-        bitmap_str = self._image2str(self.bitmap)
+        bitmap_str = self.get_bitmap_str()
         return b64encode(bitmap_str) if bitmap_str else None
 
     def get_alpha_b64str(self):
-        alpha_str = self._image2str(self.alpha)
+        alpha_str = self.get_alpha_str()
         return b64encode(alpha_str) if alpha_str else None
 
     def set_images(self, bitmap=None, alpha=None):
-        self.bitmap = bitmap if bitmap else self.bitmap
-        self.alpha = alpha if alpha else self.alpha
+        if bitmap:
+            self.bitmap = bitmap
+            self.bitmap_str = None
+        if alpha:
+            self.alpha = alpha
+            self.alpha_str = None
         self.clear_cache()
 
     def set_images_from_str(self, bitmap_str=None, alpha_str=None):
         self.set_images(self._str2image(bitmap_str),
                         self._str2image(alpha_str))
+        # Encoded data is kept to be saved without re-encoding
+        if bitmap_str:
+            self.bitmap_str = bitmap_str
+        if alpha_str:
+            self.alpha_str = alpha_str
 
     def set_images_from_b64str(self, bitmap_str=None, alpha_str=None):
         bitmap_str = b64decode(bitmap_str) if bitmap_str else None
@@ -104,7 +155,8 @@ class ImageHandler(object):
     def update_cache(self, cms):
         pass
 
-    def load_from_images(self, cms, image, alpha=None):
+    def load_from_images(self, cms, image, alpha=None, image_str=None):
+        source = image
         image.load()
         LOG.debug('Image mode %s', image.mode)
         if alpha:
@@ -148,11 +200,21 @@ class ImageHandler(object):
             if alpha.mode.endswith('A'):
                 alpha = alpha.split()[-1]
         self.set_images(image, alpha)
+        # Original JPEG/PNG data is kept while no mode conversion
+        # or profile adjustment has been applied to pixels
+        if image_str and image is source and \
+                'transparency' not in image.info:
+            self.bitmap_str = image_str
         self.update_cache(cms)
 
     def _load_by_pil(self, cms, fileptr):
         fileptr.seek(0)
-        self.load_from_images(cms, Image.open(fileptr))
+        image = Image.open(fileptr)
+        image_str = None
+        if image.format in (JPEG_FMT, PNG_FMT):
+            fileptr.seek(0)
+            image_str = fileptr.read()
+        self.load_from_images(cms, image, image_str=image_str)
 
     def _load_by_magickwand(self, cms, fileptr):
         fileptr.seek(0)
@@ -315,16 +377,18 @@ class EditableImageHandler(DrawableImageHandler):
         hdl = EditableImageHandler(pixmap)
         hdl.set_images(self.bitmap.copy() if self.bitmap else None,
                        self.alpha.copy() if self.alpha else None)
+        hdl.bitmap_str = self.bitmap_str
+        hdl.alpha_str = self.alpha_str
         return hdl
 
     def remove_alpha(self):
         self.alpha = None
+        self.alpha_str = None
         self.clear_cache()
 
     def invert_alpha(self):
         if self.alpha:
-            self.alpha = ImageOps.invert(self.alpha)
-            self.clear_cache()
+            self.set_images(None, ImageOps.invert(self.alpha))
 
     def invert_image(self, cms):
         if self.bitmap.mode == uc2const.IMAGE_MONO:
@@ -16,7 +16,9 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
-from core import get_version
+from core import get_version, get_glyph_cache_stats, clear_glyph_cache, \
+    open_glyph_disk_cache, flush_glyph_disk_cache, close_glyph_disk_cache, \
+    get_glyph_disk_cache_stats
 from fonts import get_fonts, get_sample_size, render_sample, find_font_family, \
     find_font_and_face
 from paths import get_text_paths
@@ -18,8 +18,10 @@
 import _libpango
 import cairo
 import os
-from copy import deepcopy
 
+from uc2.utils.cache import LRUCache
+
+from diskcache import GlyphDiskCache
 from markup import apply_markup, apply_glyph_markup
 
 PANGO_UNITS = 1024
@@ -39,18 +41,89 @@ def get_version():
 
 # --- Glyph caching
 
-GLYPH_CACHE = {}
-
-
-def get_glyph_cache(font_name, char):
-    char = str(char)
-    if font_name in GLYPH_CACHE and char in GLYPH_CACHE[font_name]:
-        return deepcopy(GLYPH_CACHE[font_name][char])
-
-
-def set_glyph_cache(font_name, char, glyph):
-    GLYPH_CACHE[font_name] = GLYPH_CACHE.get(font_name, {})
-    GLYPH_CACHE[font_name][str(char)] = deepcopy(glyph)
+GLYPH_CACHE_SIZE = 8192
+GLYPH_CACHE = LRUCache(GLYPH_CACHE_SIZE)
+DISK_CACHE = None
+
+
+def get_glyph_cache_stats():
+    """
+    Returns (hits, misses, size) tuple of glyph outline cache.
+    """
+    return GLYPH_CACHE.get_stats()
+
+
+def clear_glyph_cache(fontmap_id=None):
+    GLYPH_CACHE.clear()
+    if DISK_CACHE is not None and fontmap_id is not None:
+        DISK_CACHE.update(fontmap_id)
+
+
+def open_glyph_disk_cache(path):
+    """
+    Enables persistent glyph outline cache stored in path.
+    """
+    global DISK_CACHE
+    close_glyph_disk_cache()
+    DISK_CACHE = GlyphDiskCache(path)
+
+
+def flush_glyph_disk_cache(force=False):
+    """
+    Writes collected outlines into persistent glyph cache once
+    enough of them are pending, or immediately on force.
+    """
+    if DISK_CACHE is not None:
+        DISK_CACHE.flush(force)
+
+
+def close_glyph_disk_cache():
+    global DISK_CACHE
+    if DISK_CACHE is not None:
+        DISK_CACHE.flush(True)
+        DISK_CACHE.close()
+        DISK_CACHE = None
+
+
+def get_glyph_disk_cache_stats():
+    """
+    Returns (hits, misses, size) tuple of persistent glyph cache
+    or None if it is not enabled.
+    """
+    return DISK_CACHE.get_stats() if DISK_CACHE is not None else None
+
+
+def get_glyph_path(ctx, text, width, text_style, markup, text_range=None,
+                   check_nt=False):
+    """
+    Returns (cairo path, vpos) tuple for single char or cluster.
+    Outlines are cached untransformed by font description, layout
+    width, alignment and glyph text with applied local markup,
+    so caller gets path copy to be translated into place.
+    """
+    markuped_text, vpos = apply_glyph_markup(text, text_range or [],
+                                             markup, check_nt)
+    key = (get_font_description_string(text_style, check_nt),
+           width, text_style[3], markuped_text)
+    cpath = GLYPH_CACHE.get(key)
+    if cpath is None and DISK_CACHE is not None:
+        cpath = DISK_CACHE.get(ctx, key)
+        if cpath is not None:
+            GLYPH_CACHE.put(key, cpath)
+    if cpath is None:
+        ctx.new_path()
+        ctx.move_to(0, 0)
+        layout = create_layout(ctx)
+        set_glyph_layout(text, width, text_style, markup,
+                         text_range, check_nt, layout)
+        layout_path(ctx, layout)
+        cpath = ctx.copy_path()
+        GLYPH_CACHE.put(key, cpath)
+        if DISK_CACHE is not None:
+            DISK_CACHE.put(key, cpath)
+    ctx.new_path()
+    ctx.append_path(cpath)
+    return ctx.copy_path(), vpos
 
 
 # --- Pango context functionality
@@ -59,10 +132,14 @@ def create_layout(ctx=CTX):
     return _libpango.create_layout(ctx)
 
 
-def get_font_description(text_style, check_nt=False):
+def get_font_description_string(text_style, check_nt=False):
     font_size = text_style[2] * 10.0 \
         if check_nt and os.name == 'nt' else text_style[2]
-    fnt_descr = text_style[0] + ', ' + text_style[1] + ' ' + str(font_size)
+    return text_style[0] + ', ' + text_style[1] + ' ' + str(font_size)
+
+
+def get_font_description(text_style, check_nt=False):
+    fnt_descr = get_font_description_string(text_style, check_nt)
     return _libpango.create_font_description(fnt_descr)
 
 
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Persistent glyph outline cache.
+
+File layout (little-endian):
+  header  - magic, version, font map id (md5), record count
+  index   - (key md5, offset, size) records sorted by key md5
+  records - operator count, coordinate count, operator bytes,
+            coordinates as doubles
+
+File is memory-mapped read-only, so many processes can share it.
+New outlines are collected in memory and merged into new file
+which replaces old one on flush. Flush writes the file once enough
+outlines are collected (FLUSH_THRESHOLD) or on close. Font map id
+is a digest of fontconfig font list, so cache is invalidated when
+fonts are changed.
+"""
+
+import _libpango
+import cairo
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+
+LOG = logging.getLogger(__name__)
+
+MAGIC = 'UCGC'
+VERSION = 1
+
+HEADER = struct.Struct('<4sH16sI')
+INDEX = struct.Struct('<16sII')
+RECORD = struct.Struct('<II')
+
+FLUSH_THRESHOLD = 256
+
+
+def get_fontmap_id(font_map=None):
+    """
+    Returns digest of font families and faces list provided
+    by fontconfig.
+    """
+    if font_map is None:
+        font_map = _libpango.get_fontmap()
+    return hashlib.md5(repr(font_map)).digest()
+
+
+def get_key_digest(key):
+    return hashlib.md5('\0'.join([item.encode('utf-8')
+                                  if isinstance(item, unicode) else str(item)
+                                  for item in key])).digest()
+
+
+def replace_file(src, dst):
+    """
+    Renames src file into dst one. On Windows rename fails
+    if dst exists, so it is removed first (not atomically).
+    """
+    if os.name == 'nt' and os.path.exists(dst):
+        os.remove(dst)
+    os.rename(src, dst)
+
+
+def pack_cpath(cpath):
+    ops = []
+    coords = []
+    for op, points in cpath:
+        ops.append(chr(op))
+        coords += points
+    return RECORD.pack(len(ops), len(coords)) + ''.join(ops) + \
+        struct.pack('<%dd' % len(coords), *coords)
+
+
+def unpack_cpath(ctx, data, offset=0):
+    nops, ncoords = RECORD.unpack_from(data, offset)
+    offset += RECORD.size
+    ops = data[offset:offset + nops]
+    coords = struct.unpack_from('<%dd' % ncoords, data, offset + nops)
+    ctx.new_path()
+    index = 0
+    for op in ops:
+        op = ord(op)
+        if op == cairo.PATH_MOVE_TO:
+            ctx.move_to(*coords[index:index + 2])
+            index += 2
+        elif op == cairo.PATH_LINE_TO:
+            ctx.line_to(*coords[index:index + 2])
+            index += 2
+        elif op == cairo.PATH_CURVE_TO:
+            ctx.curve_to(*coords[index:index + 6])
+            index += 6
+        else:
+            ctx.close_path()
+    return ctx.copy_path()
+
+
+class GlyphDiskCache(object):
+    """
+    Read-only memory-mapped glyph outline file with in-memory
+    set of pending outlines to be written on flush().
+    """
+    path = ''
+    fontmap_id = ''
+    fileptr = None
+    mmap = None
+    count = 0
+    broken = False
+
+    def __init__(self, path, fontmap_id=None):
+        self.path = path
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.open(fontmap_id or get_fontmap_id())
+
+    def open(self, fontmap_id):
+        self.close()
+        self.fontmap_id = fontmap_id
+        if not os.path.exists(self.path):
+            return
+        try:
+            self.fileptr = open(self.path, 'rb')
+            size = os.fstat(self.fileptr.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError('Truncated glyph cache')
+            self.mmap = mmap.mmap(self.fileptr.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+            magic, version, fontmap_id, count = HEADER.unpack_from(self.mmap)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError('Unknown glyph cache format')
+            if size < HEADER.size + count * INDEX.size:
+                raise ValueError('Truncated glyph cache')
+            if fontmap_id == self.fontmap_id:
+                self.count = count
+        except Exception as e:
+            LOG.warning('Cannot read glyph cache "%s": %s', self.path, e)
+            self.close()
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.close()
+        if self.fileptr is not None:
+            self.fileptr.close()
+        self.fileptr = self.mmap = None
+        self.count = 0
+
+    def update(self, fontmap_id):
+        """
+        Drops cached outlines if font list is changed.
+        """
+        if fontmap_id != self.fontmap_id:
+            self.pending.clear()
+            self.open(fontmap_id)
+
+    def find(self, digest):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            item = INDEX.unpack_from(self.mmap, HEADER.size + mid * INDEX.size)
+            if item[0] < digest:
+                lo = mid + 1
+            elif item[0] > digest:
+                hi = mid
+            else:
+                return item[1:]
+        return None
+
+    def check_record(self, offset, size):
+        """
+        Checks that index entry points to complete outline record
+        inside of records area of mapped file.
+        """
+        if offset < HEADER.size + self.count * INDEX.size or \
+                size < RECORD.size or offset + size > len(self.mmap):
+            return False
+        nops, ncoords = RECORD.unpack_from(self.mmap, offset)
+        return RECORD.size + nops + ncoords * 8 == size
+
+    def get(self, ctx, key):
+        """
+        Returns cairo path for key or None. Path is built on ctx.
+        """
+        digest = get_key_digest(key)
+        if digest in self.pending:
+            self.hits += 1
+            return unpack_cpath(ctx, self.pending[digest])
+        item = self.find(digest) if self.count else None
+        if item is not None and not self.check_record(*item):
+            # Stored outlines are not used anymore and
+            # cache file is rebuilt on next flush
+            LOG.warning('Broken glyph cache "%s" is dropped', self.path)
+            self.close()
+            self.broken = True
+            item = None
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return unpack_cpath(ctx, self.mmap, item[0])
+
+    def put(self, key, cpath):
+        self.pending[get_key_digest(key)] = pack_cpath(cpath)
+
+    def get_records(self):
+        records = {}
+        for index in range(self.count):
+            digest, offset, size = INDEX.unpack_from(
+                self.mmap, HEADER.size + index * INDEX.size)
+            if self.check_record(offset, size):
+                records[digest] = self.mmap[offset:offset + size]
+        return records
+
+    def flush(self, force=False):
+        """
+        Merges pending outlines with stored ones and replaces cache
+        file. Without force the file is written only if number
+        of pending outlines reaches FLUSH_THRESHOLD. Broken file
+        is replaced by pending outlines without threshold.
+        """
+        if not self.pending:
+            return
+        if not force and not self.broken and \
+                len(self.pending) < FLUSH_THRESHOLD:
+            return
+        records = {}
+        if not self.broken:
+            # Picks up outlines flushed by other processes
+            self.open(self.fontmap_id)
+            records = self.get_records()
+        records.update(self.pending)
+        digests = sorted(records)
+        offset = HEADER.size + len(digests) * INDEX.size
+        index = []
+        for digest in digests:
+            size = len(records[digest])
+            index.append(INDEX.pack(digest, offset, size))
+            offset += size
+        fd, tmp_path = tempfile.mkstemp('.tmp', 'glyphs',
+                                        os.path.dirname(self.path))
+        try:
+            fileptr = os.fdopen(fd, 'wb')
+            fileptr.write(HEADER.pack(MAGIC, VERSION, self.fontmap_id,
+                                      len(digests)))
+            fileptr.write(''.join(index))
+            for digest in digests:
+                fileptr.write(records[digest])
+            fileptr.close()
+            # Mapped file cannot be replaced on Windows
+            self.close()
+            replace_file(tmp_path, self.path)
+        except (IOError, OSError) as e:
+            LOG.warning('Cannot write glyph cache "%s": %s', self.path, e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.pending.clear()
+        self.broken = False
+        self.open(self.fontmap_id)
+
+    def get_stats(self):
+        """
+        Returns (hits, misses, size) tuple.
+        """
+        return self.hits, self.misses, self.count + len(self.pending)
@@ -21,7 +21,8 @@ import string
 
 import _libpango
 
-from core import PANGO_LAYOUT
+from core import PANGO_LAYOUT, clear_glyph_cache
+from diskcache import get_fontmap_id
 
 FAMILIES_LIST = []
 FAMILIES_DICT = {}
@@ -38,6 +39,7 @@ def update_fonts():
     FAMILIES_LIST[:] = []
     FAMILIES_DICT.clear()
     font_map = _libpango.get_fontmap()
+    clear_glyph_cache(get_fontmap_id(font_map))
     for item in font_map:
         font_name = item[0]
         font_faces = item[1]
@@ -219,20 +219,15 @@ def get_glyphs(ctx, layout_data, text, width, text_style, markup):
                 glyphs.append(None)
                 continue
 
-        ctx.new_path()
-        ctx.move_to(0, 0)
-        layout = core.create_layout(ctx)
         text_range = [i, i + len(item)]
-        vpos = core.set_glyph_layout(item, width, text_style, markup,
-                                     text_range, True, layout)
+        cpath, vpos = core.get_glyph_path(ctx, item, width, text_style,
+                                          markup, text_range, True)
         if vpos:
             for index in range(*text_range):
                 x, y, w, h, base_line, byte_index = layout_data[index]
                 dh = (y - base_line) * vpos
                 layout_data[index] = (x, y + dh, w, h,
                                       base_line + dh, byte_index)
-        core.layout_path(ctx, layout)
-        cpath = ctx.copy_path()
         m00 = 1.0
         m11 = -1.0
         if os.name == 'nt':
@@ -264,19 +259,14 @@ def get_rtl_glyphs(ctx, layout_data, log_layout_data, byte_dict, rtl_regs,
             glyphs.append(None)
             continue
 
-        ctx.new_path()
-        ctx.move_to(0, 0)
-        layout = core.create_layout(ctx)
-        vpos = core.set_glyph_layout(txt, width, text_style,
-                                     markup, text_range, True, layout)
+        cpath, vpos = core.get_glyph_path(ctx, txt, width, text_style,
+                                          markup, text_range, True)
         if vpos:
             for index in range(*text_range):
                 x, y, w, h, base_line, byte_index = log_layout_data[index]
                 dh = (y - base_line) * vpos
                 log_layout_data[index] = (x, y + dh, w, h,
                                           base_line + dh, byte_index)
-        core.layout_path(ctx, layout)
-        cpath = ctx.copy_path()
         m00 = 1.0
         m11 = -1.0
         if os.name == 'nt':
@@ -295,7 +285,7 @@ def get_text_paths(orig_text, width, text_style, markup):
     core.set_layout(orig_text, width, text_style, markup)
     w, h = core.get_layout_size()
 
-    surf = cairo.ImageSurface(cairo.FORMAT_RGB24, 100, 100)
+    surf = cairo.ImageSurface(cairo.FORMAT_RGB24, 1, 1)
     ctx = cairo.Context(surf)
     ctx.set_matrix(libcairo.DIRECT_MATRIX)
 
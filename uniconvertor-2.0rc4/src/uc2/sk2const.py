@@ -29,6 +29,14 @@ SK2IMG_TAG = '<image y="0.0"  x="0.0" xlink:href="data:image/png;base64,'
 SK2IMG_TAG_END = '"  height="%d" width="%d" />'
 SK2DOC_START = '<!-- Encapsulated SK2'
 
+# Binary SK2 variant: records are '<cI' (type, payload size) headers
+# followed by payload; image data are stored after the record stream.
+SK2BIN_ID = '##sK1 2B '
+SK2BIN_OBJ = 'O'
+SK2BIN_SET = 'S'
+SK2BIN_BLOB = 'B'
+SK2BIN_END = 'E'
+
 DOC_ORIGIN_CENTER = 0
 DOC_ORIGIN_LL = 1
 DOC_ORIGIN_LU = 2
@@ -43,36 +43,33 @@ class UCData:
         if not self.app_config_dir:
             path = fsutils.expanduser(os.path.join(cfgdir, '.config', 'uc2'))
             self.app_config_dir = path
+        self.app_config = os.path.join(self.app_config_dir, 'preferences.cfg')
+        self.app_color_profile_dir = os.path.join(self.app_config_dir,
+                                                  'profiles')
         if check:
             self.check_config_dirs()
 
     def check_config_dirs(self):
-
-        if not fsutils.lexists(self.app_config_dir):
-            fsutils.makedirs(self.app_config_dir)
-
-        self.app_config = os.path.join(self.app_config_dir, 'preferences.cfg')
-
-        # Check color profiles directory
-        self.app_color_profile_dir = os.path.join(self.app_config_dir,
-                                                  'profiles')
+        """
+        Creates config and color profiles directories if missing.
+        Built-in color profiles are saved on first use
+        by uc2.cms.get_builtin_profile_path().
+        """
         if not fsutils.lexists(self.app_color_profile_dir):
             fsutils.makedirs(self.app_color_profile_dir)
 
-        from uc2.cms import libcms
-
-        for item in uc2const.COLORSPACES + [uc2const.COLOR_DISPLAY, ]:
-            filename = 'built-in_%s.icm' % item
-            path = os.path.join(self.app_color_profile_dir, filename)
-            if not fsutils.lexists(path):
-                path = fsutils.get_sys_path(path)
-                libcms.cms_save_default_profile(path, item)
-
 
 class UCConfig(SerializedConfig):
     # ============== GENERIC SECTION ===================
     system_encoding = 'utf-8'  # default encoding (GUI uses utf-8 only)
     log_level = 'INFO'
+    batch_workers = 0  # batch mode processes, 0 - use CPU count
+    batch_job_timeout = 300  # batch mode job timeout in seconds
+    server_job_timeout = 300  # server mode job timeout in seconds
+    server_queue_size = 16  # server mode jobs waiting for free worker
+    server_max_data_size = 256  # server mode request data limit in MB
+    server_allow_paths = False  # server mode accepts file paths of clients
+    glyph_cache = False  # persistent glyph outline cache in config dir
 
     # ============== COLOR MANAGEMENT SECTION ===================
 
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Bounded mapping which drops least recently used items.
+    Counts cache hits and misses.
+    """
+    maxsize = 0
+    hits = 0
+    misses = 0
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        try:
+            value = self.data.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.data[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        if key in self.data:
+            del self.data[key]
+        elif len(self.data) >= self.maxsize:
+            self.data.popitem(False)
+        self.data[key] = value
+
+    def clear(self):
+        self.data.clear()
+
+    def get_stats(self):
+        """
+        Returns (hits, misses, size) tuple.
+        """
+        return self.hits, self.misses, len(self.data)
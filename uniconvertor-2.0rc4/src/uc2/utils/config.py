@@ -16,6 +16,8 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import logging
+import os
+from copy import deepcopy
 
 import xml.sax
 from xml.sax import handler
@@ -25,11 +27,16 @@ from xml.sax.xmlreader import InputSource
 from uc2.utils.fs import path_system, path_unicode
 from uc2.utils import fsutils
 from uc2.utils.fsutils import get_fileptr
+from uc2.utils.literals import parse_literal
 
 LOG = logging.getLogger(__name__)
 
 IDENT = '\t'
 
+# Parsed preferences shared by config instances,
+# {path: ((mtime, size), {key: value})}
+CONFIG_CACHE = {}
+
 
 def encode_quotes(line):
     result = line.replace('"', '&quot;')
@@ -63,24 +70,9 @@ class XmlConfigParser(object):
 
     def load(self, filename=None):
         self.filename = filename
-        if fsutils.lexists(filename):
-            content_handler = XMLPrefReader(pref=self)
-            error_handler = ErrorHandler()
-            entity_resolver = EntityResolver()
-            dtd_handler = DTDHandler()
-            try:
-                input_file = get_fileptr(filename)
-                input_source = InputSource()
-                input_source.setByteStream(input_file)
-                xml_reader = xml.sax.make_parser()
-                xml_reader.setContentHandler(content_handler)
-                xml_reader.setErrorHandler(error_handler)
-                xml_reader.setEntityResolver(entity_resolver)
-                xml_reader.setDTDHandler(dtd_handler)
-                xml_reader.parse(input_source)
-                input_file.close()
-            except Exception as e:
-                LOG.error('Cannot read preferences from %s %s', filename, e)
+        values = get_config_values(filename)
+        if values:
+            self.__dict__.update(deepcopy(values))
 
     def save(self, filename=None):
         if self.filename and filename is None:
@@ -120,32 +112,77 @@ class XmlConfigParser(object):
         writer.endElement('preferences')
         writer.endDocument()
         fileobj.close()
+        CONFIG_CACHE.pop(filename, None)
+
+
+def read_config(filename):
+    """
+    Parses preferences file into {key: value} dict.
+    """
+    values = {}
+    content_handler = XMLPrefReader(values)
+    error_handler = ErrorHandler()
+    entity_resolver = EntityResolver()
+    dtd_handler = DTDHandler()
+    try:
+        input_file = get_fileptr(filename)
+        input_source = InputSource()
+        input_source.setByteStream(input_file)
+        xml_reader = xml.sax.make_parser()
+        xml_reader.setContentHandler(content_handler)
+        xml_reader.setErrorHandler(error_handler)
+        xml_reader.setEntityResolver(entity_resolver)
+        xml_reader.setDTDHandler(dtd_handler)
+        xml_reader.parse(input_source)
+        input_file.close()
+    except Exception as e:
+        LOG.error('Cannot read preferences from %s %s', filename, e)
+    return values
+
+
+def get_config_values(filename):
+    """
+    Returns parsed preferences of the file. Parsed values are cached
+    per process while file modification time and size are the same.
+    Returned dict is shared, so it should be copied before changes.
+    """
+    if not filename:
+        return {}
+    try:
+        stat = os.stat(fsutils.get_sys_path(filename))
+    except OSError:
+        return {}
+    stamp = (stat.st_mtime, stat.st_size)
+    cached = CONFIG_CACHE.get(filename)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    values = read_config(filename)
+    CONFIG_CACHE[filename] = (stamp, values)
+    return values
 
 
 class XMLPrefReader(handler.ContentHandler):
     """Handler for xml file reading"""
 
-    def __init__(self, pref=None):
+    def __init__(self, values=None):
         handler.ContentHandler.__init__(self)
         self.key = None
-        self.value = None
-        self.pref = pref
+        self.value = ''
+        self.values = {} if values is None else values
 
     def startElement(self, name, attrs):
         self.key = name
+        self.value = ''
 
     def endElement(self, name):
         if name != 'preferences':
             try:
-                line = path_system('self.value=' + self.value)
-                code = compile(line, '<string>', 'exec')
-                exec code
-                self.pref.__dict__[self.key] = self.value
+                self.values[self.key] = parse_literal(path_system(self.value))
             except Exception as e:
-                LOG.error('Error in "%s" %s', line, e)
+                LOG.error('Error in "%s" %s', self.value, e)
 
     def characters(self, data):
-        self.value = data
+        self.value += data
 
 
 class ErrorHandler(handler.ErrorHandler):
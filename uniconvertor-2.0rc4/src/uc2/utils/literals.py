@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+#
+#  Parser for Python literal records (strings, numbers, lists, tuples,
+#  dicts, None/True/False) used by text based formats and configs.
+#  Unlike compile()/exec it never evaluates code.
+#
+
+import json
+import re
+
+# Fast path for records like set('field',[[1.0,2.0],...]) holding
+# numbers only; such data is a valid JSON and decoded by C scanner.
+NUMERIC_RECORD = re.compile(
+    r"(\w+)\((?:'(\w*)'(?:,([-+\d.eE\s,\[\]]+))?)?\)\s*$")
+NUMERIC = re.compile(r"[-+\d.eE\s,\[\]]+$")
+
+TOKENS = re.compile(r"""\s*(?:
+    ([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?[lL]?)    # number
+    |([uUbB]?(?:'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"))  # string
+    |([A-Za-z_]\w*)                                     # name
+    |([][(){},:])                                       # delimiter
+    |(\S)                                               # garbage
+    )""", re.X | re.S)
+
+NAMES = {'None': None, 'True': True, 'False': False}
+CLOSERS = {'[': ']', '(': ')', '{': '}'}
+
+
+def _number(token):
+    if token[-1] in 'lL':
+        return long(token[:-1])
+    if '.' in token or 'e' in token or 'E' in token:
+        return float(token)
+    return int(token)
+
+
+def _string(token):
+    prefix = token[0]
+    if prefix in 'uUbB':
+        token = token[1:]
+    body = token[1:-1]
+    if '\\' in body:
+        if prefix in 'uU':
+            return body.decode('unicode_escape')
+        body = body.decode('string_escape')
+    if prefix in 'uU':
+        return body.decode('utf-8')
+    return body
+
+
+def _close(items, opener, has_comma):
+    if opener == '[':
+        return items
+    if opener == '(':
+        if len(items) == 1 and not has_comma:
+            return items[0]
+        return tuple(items)
+    if len(items) % 2:
+        raise ValueError('Odd number of dict items')
+    return dict(zip(items[::2], items[1::2]))
+
+
+def _parse(text, args=False):
+    """
+    Parses literal tokens of the text. If args is True the text
+    is an argument list in parentheses and always produces a list.
+    """
+    stack = []
+    items = top = []
+    opener = None
+    has_comma = False
+    for num, string, name, delim, garbage in TOKENS.findall(text):
+        if num:
+            items.append(_number(num))
+        elif string:
+            items.append(_string(string))
+        elif name:
+            if name not in NAMES:
+                raise ValueError('Unexpected name "%s"' % name)
+            items.append(NAMES[name])
+        elif delim in CLOSERS:
+            stack.append((items, opener, has_comma))
+            items, opener, has_comma = [], delim, False
+        elif delim == ',' or delim == ':':
+            has_comma = has_comma or delim == ','
+        elif delim:
+            if opener is None or CLOSERS[opener] != delim:
+                raise ValueError('Unbalanced "%s"' % delim)
+            if args and len(stack) == 1:
+                value = items
+            else:
+                value = _close(items, opener, has_comma)
+            items, opener, has_comma = stack.pop()
+            items.append(value)
+        elif garbage:
+            raise ValueError('Unexpected character "%s"' % garbage)
+    if stack:
+        raise ValueError('Unclosed "%s"' % opener)
+    return top
+
+
+def parse_literal(text):
+    """
+    Returns Python value of literal string representation.
+    """
+    if NUMERIC.match(text):
+        try:
+            return json.loads(text)
+        except ValueError:
+            # Python-only forms like 1. or .5 or trailing commas
+            pass
+    result = _parse(text)
+    if len(result) != 1:
+        raise ValueError('Single literal expected: %s' % text[:50])
+    return result[0]
+
+
+def parse_call(line):
+    """
+    Splits 'name(arg0, arg1,...)' record into name and argument list.
+    Arguments should be literals only.
+    """
+    match = NUMERIC_RECORD.match(line)
+    if match:
+        name, key, value = match.groups()
+        if key is None:
+            return name, []
+        if value is None:
+            return name, [key]
+        try:
+            return name, [key, json.loads(value)]
+        except ValueError:
+            pass
+    index = line.find('(')
+    name = line[:index].strip()
+    if index < 0 or not name:
+        raise ValueError('Record expected: %s' % line[:50])
+    result = _parse(line[index:], True)
+    if len(result) != 1 or not isinstance(result[0], list):
+        raise ValueError('Bad record arguments: %s' % line[:50])
+    return name, result[0]
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Batch mode regression tests: job resolution and failure isolation
+of worker processes.
+Usage: python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from StringIO import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import uc2
+from uc2.application import UCApplication
+
+PALETTE = 'GIMP Palette\nName: Batch\nColumns: 4\n#\n' \
+          '255   0   0 red\n  0 255   0 green\n'
+
+
+class BatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp('.batch')
+        self.app = UCApplication(os.path.dirname(uc2.__file__),
+                                 os.path.join(self.path, 'cfg'))
+        self.stdout = sys.stdout
+        sys.stdout = StringIO()
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+        shutil.rmtree(self.path)
+
+    def make_file(self, name, data=PALETTE):
+        filepath = os.path.join(self.path, name)
+        with open(filepath, 'wb') as fileptr:
+            fileptr.write(data)
+        return filepath
+
+
+class GetBatchJobsTest(BatchTestCase):
+
+    def test_patterns(self):
+        src1 = self.make_file('a.gpl')
+        src2 = self.make_file('b.gpl')
+        self.make_file('c.txt')
+        out = os.path.join(self.path, 'out', '{name}.{ext}.skp')
+        jobs = self.app.get_batch_jobs(
+            [os.path.join(self.path, '*.gpl'), out], {'batch': True})
+        self.assertEqual(jobs, [
+            (src1, os.path.join(self.path, 'out', 'a.gpl.skp')),
+            (src2, os.path.join(self.path, 'out', 'b.gpl.skp'))])
+
+    def test_dir_field(self):
+        src = self.make_file('a.gpl')
+        jobs = self.app.get_batch_jobs(
+            [src, '{dir}/{name}.skp'], {'batch': True})
+        self.assertEqual(jobs, [(src, os.path.join(self.path, 'a.skp'))])
+
+    def test_patterns_are_required(self):
+        self.assertRaises(SystemExit, self.app.get_batch_jobs,
+                          ['*.gpl'], {'batch': True})
+
+    def test_manifest(self):
+        manifest = self.make_file('jobs.txt', '# comment\n\n'
+                                  'a.gpl out/a.skp\n'
+                                  '"my palette.gpl" /tmp/b.skp\n')
+        jobs = self.app.get_batch_jobs([], {'batch': manifest})
+        self.assertEqual(jobs, [
+            (os.path.join(self.path, 'a.gpl'),
+             os.path.join(self.path, 'out', 'a.skp')),
+            (os.path.join(self.path, 'my palette.gpl'), '/tmp/b.skp')])
+
+    def test_manifest_relative_to_cwd(self):
+        self.make_file('jobs.txt', 'a.gpl a.skp\n')
+        jobs = self.app.get_batch_jobs([], {'batch': 'jobs.txt'}, self.path)
+        self.assertEqual(jobs, [(os.path.join(self.path, 'a.gpl'),
+                                 os.path.join(self.path, 'a.skp'))])
+
+    def test_digit_manifest_name(self):
+        self.make_file('123', 'a.gpl a.skp\n')
+        argv = sys.argv
+        sys.argv = ['uniconvertor', '--batch=123', '--workers=2']
+        try:
+            options = self.app.parse_cmdline(self.path)[1]
+        finally:
+            sys.argv = argv
+        self.assertEqual(options, {'batch': '123', 'workers': 2})
+        jobs = self.app.get_batch_jobs([], options, self.path)
+        self.assertEqual(jobs, [(os.path.join(self.path, 'a.gpl'),
+                                 os.path.join(self.path, 'a.skp'))])
+
+    def test_braces_in_path(self):
+        os.mkdir(os.path.join(self.path, '{src}'))
+        src = self.make_file(os.path.join('{src}', '{0} {x}.gpl'))
+        jobs = self.app.get_batch_jobs(
+            [os.path.join(self.path, '{src}', '*.gpl'),
+             '{dir}/{name}-{1}.skp'], {'batch': True})
+        self.assertEqual(jobs, [(src, os.path.join(
+            self.path, '{src}', '{0} {x}-{1}.skp'))])
+
+    def test_missing_manifest(self):
+        self.assertRaises(SystemExit, self.app.get_batch_jobs, [],
+                          {'batch': os.path.join(self.path, 'jobs.txt')})
+
+    def test_wrong_manifest_line(self):
+        manifest = self.make_file('jobs.txt', 'a.gpl b.skp c.skp\n')
+        self.assertRaises(SystemExit, self.app.get_batch_jobs, [],
+                          {'batch': manifest})
+
+    def test_same_destination(self):
+        self.make_file('a.gpl')
+        self.make_file('b.gpl')
+        out = os.path.join(self.path, 'palette.skp')
+        self.assertRaises(SystemExit, self.app.get_batch_jobs,
+                          [os.path.join(self.path, '*.gpl'), out],
+                          {'batch': True})
+
+    def test_same_normalized_destination(self):
+        manifest = self.make_file('jobs.txt', 'a.gpl out/a.skp\n'
+                                  'b.gpl out/../out/a.skp\n')
+        self.assertRaises(SystemExit, self.app.get_batch_jobs, [],
+                          {'batch': manifest})
+
+
+class RunBatchTest(BatchTestCase):
+
+    def setUp(self):
+        BatchTestCase.setUp(self)
+        self.run_job = UCApplication.run_job
+
+    def tearDown(self):
+        UCApplication.run_job = self.run_job
+        BatchTestCase.tearDown(self)
+
+    def run_batch(self, names, options=None):
+        for name in names:
+            self.make_file(name)
+        options = dict(options or {}, batch=True, workers=2)
+        try:
+            self.app.run_batch([os.path.join(self.path, '*.gpl'),
+                                os.path.join(self.path, '{name}.skp')],
+                               options)
+        except SystemExit as e:
+            return e.code
+        self.fail('Batch mode should exit with status')
+
+    def test_translation(self):
+        self.assertEqual(self.run_batch(['a.gpl', 'b.gpl', 'c.gpl']), 0)
+        for name in ('a.skp', 'b.skp', 'c.skp'):
+            self.assertTrue(os.path.exists(os.path.join(self.path, name)))
+        self.assertIn('3 files, 3 translated, 0 failed',
+                      sys.stdout.getvalue())
+
+    def test_crashed_worker(self):
+        # Worker processes are forked, so they use patched method
+        if not hasattr(os, 'fork'):
+            self.skipTest('Worker processes are not forked')
+
+        def run_job(app, src, dst, options):
+            if src.endswith('crash.gpl'):
+                os._exit(3)
+            return self.run_job(app, src, dst, options)
+
+        UCApplication.run_job = run_job
+        self.assertEqual(self.run_batch(['a.gpl', 'crash.gpl', 'z.gpl']), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.path, 'a.skp')))
+        self.assertTrue(os.path.exists(os.path.join(self.path, 'z.skp')))
+        output = sys.stdout.getvalue()
+        self.assertIn('3 files, 2 translated, 1 failed', output)
+        self.assertIn('crashed (exit code 3)', output)
+
+    def test_job_timeout(self):
+        if not hasattr(os, 'fork'):
+            self.skipTest('Worker processes are not forked')
+
+        def run_job(app, src, dst, options):
+            if src.endswith('hang.gpl'):
+                time.sleep(60)
+            return self.run_job(app, src, dst, options)
+
+        UCApplication.run_job = run_job
+        start = time.time()
+        self.assertEqual(self.run_batch(['a.gpl', 'hang.gpl', 'z.gpl'],
+                                        {'timeout': 1}), 1)
+        self.assertLess(time.time() - start, 30)
+        self.assertTrue(os.path.exists(os.path.join(self.path, 'z.skp')))
+        output = sys.stdout.getvalue()
+        self.assertIn('3 files, 2 translated, 1 failed', output)
+        self.assertIn('Job timeout (1 s) is exceeded', output)
+
+
+if __name__ == '__main__':
+    unittest.main()
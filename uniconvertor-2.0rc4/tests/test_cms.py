@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Built-in color profile files regression tests: profiles are saved
+on first request by concurrent processes.
+Usage: python -m unittest discover -s tests
+"""
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2 import cms, uc2const
+
+COLORSPACES = (uc2const.COLOR_RGB, uc2const.COLOR_CMYK,
+               uc2const.COLOR_LAB, uc2const.COLOR_GRAY)
+
+
+def save_profiles(profile_dir):
+    return [cms.get_builtin_profile_path(profile_dir, colorspace)
+            for colorspace in COLORSPACES]
+
+
+def read_file(path):
+    with open(path, 'rb') as fileptr:
+        return fileptr.read()
+
+
+class BuiltinProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp('.profiles')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def check_profiles(self, paths):
+        filenames = ['built-in_%s.icm' % item for item in COLORSPACES]
+        self.assertEqual(sorted(os.listdir(self.path)), sorted(filenames))
+        for path, colorspace in zip(paths, COLORSPACES):
+            self.assertEqual(os.path.basename(path),
+                             'built-in_%s.icm' % colorspace)
+            self.assertTrue(read_file(path))
+
+    def test_save(self):
+        self.check_profiles(save_profiles(self.path))
+
+    def test_existing_profile(self):
+        path = os.path.join(self.path, 'built-in_RGB.icm')
+        with open(path, 'wb') as fileptr:
+            fileptr.write('profile')
+        self.assertEqual(
+            cms.get_builtin_profile_path(self.path, uc2const.COLOR_RGB), path)
+        self.assertEqual(read_file(path), 'profile')
+
+    def test_wrong_colorspace(self):
+        self.assertRaises(Exception, cms.get_builtin_profile_path,
+                          self.path, 'XYZ')
+        self.assertEqual(os.listdir(self.path), [])
+
+    def test_concurrent_save(self):
+        pool = multiprocessing.Pool(4)
+        try:
+            results = pool.map(save_profiles, [self.path] * 16)
+        finally:
+            pool.close()
+            pool.join()
+        self.check_profiles(results[0])
+        expected = [read_file(path) for path in results[0]]
+        for paths in results:
+            self.assertEqual([read_file(path) for path in paths], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Preferences reader regression tests: value round trip and
+per-process cache of parsed preferences.
+Usage: python -m unittest discover -s tests
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2.utils import config
+
+logging.getLogger('uc2.utils.config').addHandler(logging.NullHandler())
+
+
+class TestConfig(config.XmlConfigParser):
+    system_encoding = 'utf-8'
+    number = 1
+    name = 'default'
+    items = [1, 2]
+    extra = None
+
+
+class ConfigTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp('.config')
+        self.filename = os.path.join(self.path, 'preferences.xml')
+        self.read_config = config.read_config
+        self.calls = []
+
+        def read_config(filename):
+            self.calls.append(filename)
+            return self.read_config(filename)
+
+        config.read_config = read_config
+
+    def tearDown(self):
+        config.read_config = self.read_config
+        config.CONFIG_CACHE.clear()
+        shutil.rmtree(self.path)
+
+    def write(self, content):
+        with open(self.filename, 'wb') as fileptr:
+            fileptr.write(content)
+
+    def load(self):
+        cnf = TestConfig()
+        cnf.load(self.filename)
+        return cnf
+
+
+class ReadConfigTest(ConfigTestCase):
+
+    def test_round_trip(self):
+        cnf = TestConfig()
+        cnf.number = 5
+        cnf.name = 'it\'s a "quoted" \\ path'
+        cnf.items = [[1.5, -2e-3], ('s', u'x'), 12L]
+        cnf.extra = {'key': True, 'none': None}
+        cnf.save(self.filename)
+
+        loaded = self.load()
+        self.assertEqual(loaded.number, 5)
+        self.assertEqual(loaded.name, 'it\'s a "quoted" \\ path')
+        self.assertEqual(loaded.items, [[1.5, -2e-3], ('s', u'x'), 12L])
+        self.assertEqual(loaded.extra, {'key': True, 'none': None})
+
+    def test_non_ascii_value(self):
+        if sys.getfilesystemencoding().lower() not in ('utf-8', 'utf8'):
+            self.skipTest('Preferences are encoded by filesystem encoding')
+        cnf = TestConfig()
+        cnf.name = 'ёж'
+        cnf.save(self.filename)
+        self.assertEqual(self.load().name, 'ёж')
+
+    def test_missing_file(self):
+        cnf = self.load()
+        self.assertEqual((cnf.number, cnf.name), (1, 'default'))
+        self.assertEqual(self.calls, [])
+
+    def test_wrong_value(self):
+        self.write('<?xml version="1.0" encoding="utf-8"?>\n<preferences>\n'
+                   '\t<number>7</number>\n\t<name>oops(</name>\n'
+                   '\t<items>[3, (4, 5)]</items>\n</preferences>\n')
+        cnf = self.load()
+        self.assertEqual(cnf.number, 7)
+        self.assertEqual(cnf.name, 'default')
+        self.assertEqual(cnf.items, [3, (4, 5)])
+
+    def test_malformed_file(self):
+        self.write('<preferences><number>7</number>')
+        cnf = self.load()
+        self.assertEqual(cnf.name, 'default')
+
+    def test_update(self):
+        cnf = TestConfig()
+        cnf.update({'number': 3, 'unknown': 4})
+        self.assertEqual(cnf.number, 3)
+        self.assertFalse(hasattr(cnf, 'unknown'))
+
+
+class ConfigCacheTest(ConfigTestCase):
+
+    def setUp(self):
+        ConfigTestCase.setUp(self)
+        cnf = TestConfig()
+        cnf.number = 5
+        cnf.items = [[1, 2], [3]]
+        cnf.save(self.filename)
+
+    def test_single_parse(self):
+        first = self.load()
+        second = self.load()
+        self.assertEqual((first.number, second.number), (5, 5))
+        self.assertEqual(self.calls, [self.filename])
+
+    def test_instances_are_isolated(self):
+        first = self.load()
+        first.items[0].append(9)
+        first.update({'number': 8})
+        second = self.load()
+        self.assertEqual(second.items, [[1, 2], [3]])
+        self.assertEqual(second.number, 5)
+
+    def test_invalidation_on_save(self):
+        cnf = self.load()
+        cnf.number = 6
+        cnf.save()
+        self.assertEqual(self.load().number, 6)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_invalidation_on_file_change(self):
+        self.load()
+        self.write('<?xml version="1.0" encoding="utf-8"?>\n<preferences>\n'
+                   '\t<number>42</number>\n</preferences>\n')
+        self.assertEqual(self.load().number, 42)
+        self.assertEqual(len(self.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
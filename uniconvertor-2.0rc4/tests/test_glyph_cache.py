@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Glyph disk cache regression tests: stored outlines and handling
+of broken cache files.
+Usage: python -m unittest discover -s tests
+"""
+
+import logging
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    import cairo
+    from uc2.libpango import diskcache
+except ImportError:
+    # Glyph cache requires native modules
+    diskcache = None
+
+logging.getLogger('uc2.libpango.diskcache').addHandler(logging.NullHandler())
+
+FONTMAP_ID = '0123456789abcdef'
+
+
+def get_path(index):
+    return [(cairo.PATH_MOVE_TO, (float(index), 0.0)),
+            (cairo.PATH_LINE_TO, (10.0, float(index))),
+            (cairo.PATH_CLOSE_PATH, ())]
+
+
+class GlyphDiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        if diskcache is None:
+            self.skipTest('Glyph cache is not available')
+        self.path = tempfile.mkdtemp('.glyphs')
+        self.filename = os.path.join(self.path, 'glyphs.cache')
+        surface = cairo.ImageSurface(cairo.FORMAT_RGB24, 1, 1)
+        self.ctx = cairo.Context(surface)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def make_cache(self, count=3):
+        cache = diskcache.GlyphDiskCache(self.filename, FONTMAP_ID)
+        for index in range(count):
+            cache.put(('Sans', index), get_path(index))
+        cache.flush(True)
+        cache.close()
+
+    def open_cache(self):
+        return diskcache.GlyphDiskCache(self.filename, FONTMAP_ID)
+
+    def get_path(self, cache, index):
+        cpath = cache.get(self.ctx, ('Sans', index))
+        return None if cpath is None else list(cpath)
+
+    def patch_index(self, index, offset=None, size=None):
+        with open(self.filename, 'r+b') as fileptr:
+            pos = diskcache.HEADER.size + index * diskcache.INDEX.size
+            fileptr.seek(pos)
+            entry = list(diskcache.INDEX.unpack(
+                fileptr.read(diskcache.INDEX.size)))
+            entry[1] = entry[1] if offset is None else offset
+            entry[2] = entry[2] if size is None else size
+            fileptr.seek(pos)
+            fileptr.write(diskcache.INDEX.pack(*entry))
+
+    def test_stored_outlines(self):
+        self.make_cache()
+        cache = self.open_cache()
+        self.assertEqual(cache.count, 3)
+        for index in range(3):
+            self.assertEqual(self.get_path(cache, index), get_path(index))
+        self.assertEqual(self.get_path(cache, 5), None)
+        self.assertEqual(cache.get_stats(), (3, 1, 3))
+        cache.close()
+
+    def check_broken(self, cache, index=0):
+        self.assertEqual(self.get_path(cache, index), None)
+        self.assertTrue(cache.broken)
+        self.assertEqual(cache.count, 0)
+        # Broken file is rebuilt by pending outlines
+        cache.put(('Sans', index), get_path(index))
+        cache.flush()
+        self.assertFalse(cache.broken)
+        cache.close()
+        cache = self.open_cache()
+        self.assertEqual(cache.count, 1)
+        self.assertEqual(self.get_path(cache, index), get_path(index))
+        cache.close()
+
+    def test_offset_out_of_file(self):
+        self.make_cache()
+        for index in range(3):
+            self.patch_index(index, offset=1 << 30)
+        self.check_broken(self.open_cache())
+
+    def test_size_out_of_file(self):
+        self.make_cache()
+        for index in range(3):
+            self.patch_index(index, size=1 << 30)
+        self.check_broken(self.open_cache())
+
+    def test_offset_into_index(self):
+        self.make_cache()
+        for index in range(3):
+            self.patch_index(index, offset=diskcache.HEADER.size)
+        self.check_broken(self.open_cache())
+
+    def test_wrong_record_size(self):
+        self.make_cache()
+        with open(self.filename, 'rb') as fileptr:
+            data = fileptr.read()
+        offset = diskcache.HEADER.size + 3 * diskcache.INDEX.size
+        with open(self.filename, 'r+b') as fileptr:
+            for index in range(3):
+                fileptr.seek(offset)
+                size = diskcache.INDEX.unpack_from(
+                    data, diskcache.HEADER.size +
+                    index * diskcache.INDEX.size)[2]
+                fileptr.write(struct.pack('<I', 1000))
+                offset += size
+        self.check_broken(self.open_cache())
+
+    def test_wrong_version(self):
+        self.make_cache()
+        with open(self.filename, 'r+b') as fileptr:
+            fileptr.seek(4)
+            fileptr.write(struct.pack('<H', diskcache.VERSION + 1))
+        cache = self.open_cache()
+        self.assertEqual(cache.count, 0)
+        self.assertEqual(self.get_path(cache, 0), None)
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Literal parser regression tests.
+Usage: python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2.utils.literals import parse_call, parse_literal
+
+
+class ParseLiteralTest(unittest.TestCase):
+
+    def test_numbers(self):
+        for text in ('0', '-3', '1.5', '1e-3', '-2.5E+2', '12L'):
+            self.assertEqual(parse_literal(text), eval(text))
+
+    def test_python_only_numbers(self):
+        # Not valid JSON, so numeric fast path falls back to tokenizer
+        self.assertEqual(parse_literal('1.'), 1.0)
+        self.assertEqual(parse_literal('.5'), 0.5)
+        self.assertEqual(parse_literal('[1., 2.]'), [1.0, 2.0])
+        self.assertEqual(parse_literal('[1,2,]'), [1, 2])
+        self.assertEqual(parse_literal('[[.5, 1.], []]'), [[0.5, 1.0], []])
+
+    def test_containers(self):
+        text = "[(1, 'a'), {'k': [None, True, False]}, (2,), ()]"
+        self.assertEqual(parse_literal(text), eval(text))
+
+    def test_strings(self):
+        for text in ("'it\\'s'", '"q\\"uote"', "u'\\u0436'", "'\\\\'",
+                     "'\\xd1\\x91'"):
+            self.assertEqual(parse_literal(text), eval(text))
+        # Unicode literals of files are utf-8 encoded
+        self.assertEqual(parse_literal("u'ёж'"), u'\u0451\u0436')
+
+    def test_code_is_rejected(self):
+        for text in ('__import__("os")', 'open', '[1, 2', '1 + 2', '', 'a b'):
+            self.assertRaises(ValueError, parse_literal, text)
+
+
+class ParseCallTest(unittest.TestCase):
+
+    def test_numeric_records(self):
+        self.assertEqual(parse_call("set_trafo('x',[1.0,0.0])"),
+                         ('set_trafo', ['x', [1.0, 0.0]]))
+        self.assertEqual(parse_call("layer()"), ('layer', []))
+        self.assertEqual(parse_call("page('')"), ('page', ['']))
+
+    def test_python_only_numeric_records(self):
+        self.assertEqual(parse_call("set('a',[1.,2.])"),
+                         ('set', ['a', [1.0, 2.0]]))
+        self.assertEqual(parse_call("set('a',[1,2,])"), ('set', ['a', [1, 2]]))
+        self.assertEqual(parse_call("set('a',.5)"), ('set', ['a', 0.5]))
+        self.assertEqual(parse_call("set('a',1,2)"), ('set', ['a', 1, 2]))
+
+    def test_generic_records(self):
+        self.assertEqual(parse_call("obj('text', u'x', [(1, 2)], None)"),
+                         ('obj', ['text', u'x', [(1, 2)], None]))
+
+    def test_bad_records(self):
+        for line in ('no_call', '(1)', "f(1", "f(x)"):
+            self.assertRaises(ValueError, parse_call, line)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+RIFF lazy chunk regression tests: documents which chunks are mapped
+from source file are saved back into the source file.
+Usage: python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from uc2.formats.riff.presenter import RIFF_Presenter
+
+try:
+    from uc2.formats.cdr.cdr_presenter import CDR_Presenter
+except ImportError:
+    # CDR translators require native modules
+    CDR_Presenter = None
+
+
+class AppData(object):
+    app_config_dir = ''
+
+
+def make_chunk(identifier, data):
+    chunk = identifier + struct.pack('<I', len(data)) + data
+    return chunk + '\0' if len(data) & 1 else chunk
+
+
+def make_list(list_identifier, chunks, identifier='LIST'):
+    data = list_identifier + ''.join(chunks)
+    return identifier + struct.pack('<I', len(data)) + data
+
+
+class SaveIntoSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp('.riff')
+        self.appdata = AppData()
+        self.appdata.app_config_dir = self.path
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write(self, name, data):
+        filepath = os.path.join(self.path, name)
+        with open(filepath, 'wb') as fileptr:
+            fileptr.write(data)
+        return filepath
+
+    def check_save(self, presenter, filepath):
+        with open(filepath, 'rb') as fileptr:
+            data = fileptr.read()
+        doc = presenter(self.appdata)
+        doc.load(filepath)
+        doc.save(filepath)
+        # Saved document still has its chunks
+        self.assertEqual(doc.model.get_chunk(), data)
+        doc.close()
+        with open(filepath, 'rb') as fileptr:
+            self.assertEqual(fileptr.read(), data)
+
+    def test_riff(self):
+        # Chunks span several memory pages of the file map
+        data = make_list('TEST', [
+            make_chunk('head', 'abc'),
+            make_list('body', [make_chunk('data', os.urandom(100000)),
+                               make_chunk('tail', '1234')]),
+            make_chunk('blob', os.urandom(50001))], 'RIFF')
+        self.check_save(RIFF_Presenter, self.write('test.riff', data))
+
+    def test_cdr(self):
+        if CDR_Presenter is None:
+            self.skipTest('CDR presenter is not available')
+        data = make_list('CDR7', [
+            make_chunk('vrsn', struct.pack('<H', 700)),
+            make_list('test', [make_chunk('data', os.urandom(100000))]),
+            make_chunk('blob', os.urandom(50001))], 'RIFF')
+        self.check_save(CDR_Presenter, self.write('test.cdr', data))
+
+
+if __name__ == '__main__':
+    unittest.main()
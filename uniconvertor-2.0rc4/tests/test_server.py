@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Conversion server protocol regression tests (through UCClient).
+Usage: python -m unittest discover -s tests
+"""
+
+import json
+import os
+import shutil
+import socket
+import stat
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import uc2
+from uc2 import uc2const
+from uc2.app_server import HEADER_SIZE, ServerError, UCClient, UCServer, \
+    recv_message
+from uc2.application import UCApplication
+
+PALETTE = 'GIMP Palette\nName: Server\nColumns: 4\n#\n' \
+          '255   0   0 red\n  0 255   0 green\n'
+
+
+class ServerTestCase(unittest.TestCase):
+    options = {'max-size': 1}
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp('.server')
+        self.app = UCApplication(os.path.dirname(uc2.__file__),
+                                 os.path.join(self.path, 'cfg'))
+        self.address = os.path.join(self.path, 'uc2.sock')
+        self.server = UCServer(self.app, self.address,
+                               dict(self.options, workers=1, queue=0))
+        self.server.start()
+        self.thread = threading.Thread(target=self.server.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.client = UCClient(self.address, timeout=60)
+
+    def tearDown(self):
+        self.server.server.shutdown()
+        self.thread.join()
+        self.server.stop()
+        shutil.rmtree(self.path)
+
+    def make_file(self, name, data=PALETTE):
+        filepath = os.path.join(self.path, name)
+        with open(filepath, 'wb') as fileptr:
+            fileptr.write(data)
+        return filepath
+
+
+class ServerTest(ServerTestCase):
+
+    def test_socket(self):
+        mode = os.stat(self.address).st_mode
+        self.assertTrue(stat.S_ISSOCK(mode))
+        self.assertEqual(stat.S_IMODE(mode), 0o600)
+
+    def test_health(self):
+        health = self.client.health()
+        self.assertEqual(health['status'], 'ok')
+        self.assertEqual(health['workers'], 1)
+        self.assertEqual(health['alive'], 1)
+
+    def test_unknown_command(self):
+        response = self.client.request({'cmd': 'restart'})[0]
+        self.assertEqual(response['status'], 'error')
+
+    def test_convert_data(self):
+        response, result = self.client.convert(uc2const.SKP, data=PALETTE,
+                                               name='palette.gpl')
+        self.assertEqual(response['status'], 'ok')
+        self.assertTrue(result.startswith('##sK1 palette'))
+        self.assertIn("'Server'", result)
+
+        metrics = self.client.metrics()
+        self.assertEqual((metrics['jobs'], metrics['ok']), (1, 1))
+
+    def test_wrong_data(self):
+        response, result = self.client.convert(uc2const.SKP, data='\0' * 100)
+        self.assertEqual(response['status'], 'error')
+        self.assertEqual(result, '')
+
+    def test_unsupported_format(self):
+        response = self.client.convert('abc', data=PALETTE)[0]
+        self.assertEqual(response['status'], 'error')
+        self.assertIn('Unsupported output format', response['error'])
+
+    def test_no_input(self):
+        response = self.client.convert(uc2const.SKP)[0]
+        self.assertEqual(response['status'], 'error')
+
+    def test_paths_are_rejected(self):
+        src = self.make_file('palette.gpl')
+        dst = os.path.join(self.path, 'palette.skp')
+        for kw in ({'src': src}, {'data': PALETTE, 'dst': dst}):
+            response = self.client.convert(uc2const.SKP, **kw)[0]
+            self.assertEqual(response['status'], 'error')
+            self.assertIn('paths are not allowed', response['error'])
+        self.assertFalse(os.path.exists(dst))
+
+    def test_data_size_limit(self):
+        response = self.client.convert(uc2const.SKP, data=PALETTE + ' ' *
+                                       self.server.max_data_size)[0]
+        self.assertEqual(response['status'], 'error')
+        self.assertIn('too large', response['error'])
+
+    def test_wrong_data_size(self):
+        for data_size in (-1, 1.5, '10'):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.address)
+                body = json.dumps({'cmd': 'health', 'data_size': data_size})
+                sock.sendall(HEADER_SIZE.pack(len(body)) + body)
+                response = recv_message(sock)[0]
+            finally:
+                sock.close()
+            self.assertEqual(response['status'], 'error')
+
+    def test_busy(self):
+        self.server.slots.acquire()
+        try:
+            response = self.client.convert(uc2const.SKP,
+                                           data=PALETTE + ' ' * 1000000)[0]
+        finally:
+            self.server.slots.release()
+        self.assertEqual(response['status'], 'busy')
+        self.assertEqual(self.client.metrics()['rejected'], 1)
+
+
+class AllowPathsTest(ServerTestCase):
+    options = {'allow-paths': True, 'max-size': 0.5}
+
+    def test_convert_paths(self):
+        src = self.make_file('palette.gpl')
+        dst = os.path.join(self.path, 'palette.skp')
+        response, result = self.client.convert(uc2const.SKP, src=src,
+                                               dst=dst)
+        self.assertEqual(response['status'], 'ok')
+        self.assertEqual(result, '')
+        self.assertTrue(os.path.exists(dst))
+
+    def test_convert_file_into_data(self):
+        src = self.make_file('palette.gpl')
+        response, result = self.client.convert(uc2const.SKP, src=src)
+        self.assertEqual(response['status'], 'ok')
+        self.assertTrue(result.startswith('##sK1 palette'))
+
+    def test_data_and_path(self):
+        src = self.make_file('palette.gpl')
+        response = self.client.convert(uc2const.SKP, src=src,
+                                       data=PALETTE)[0]
+        self.assertEqual(response['status'], 'error')
+
+    def test_max_size_option(self):
+        self.assertEqual(self.server.max_data_size, 512 * 1024)
+
+
+class ServerStartTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp('.server')
+        self.app = UCApplication(os.path.dirname(uc2.__file__),
+                                 os.path.join(self.path, 'cfg'))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_regular_file_is_kept(self):
+        address = os.path.join(self.path, 'uc2.sock')
+        with open(address, 'wb') as fileptr:
+            fileptr.write('data')
+        server = UCServer(self.app, address, {'workers': 1})
+        self.assertRaises(ServerError, server.start)
+        server.stop()
+        with open(address, 'rb') as fileptr:
+            self.assertEqual(fileptr.read(), 'data')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright (C) 2018 by Igor E. Novikov
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Binary SK2 regression tests: text and binary SK2 round trips
+produce the same document.
+Usage: python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from cStringIO import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import uc2
+from uc2 import app_cms, sk2const, uc2const
+from uc2.application import UCApplication
+
+try:
+    from PIL import Image
+    from uc2.formats.sk2 import sk2_loader, sk2_model, sk2_saver
+    from uc2.formats.sk2.sk2_filters import SK2_Saver
+    from uc2.formats.sk2.sk2_presenter import SK2_Presenter
+except ImportError:
+    # SK2 model requires native modules
+    sk2_model = None
+
+RED = [uc2const.COLOR_RGB, [1.0, 0.0, 0.0], 1.0, 'Red']
+BLUE = [uc2const.COLOR_CMYK, [1.0, 1.0, 0.0, 0.0], 0.5, '']
+
+
+def get_image_str(mode, size, color):
+    fobj = StringIO()
+    Image.new(mode, size, color).save(fobj, format='PNG')
+    return fobj.getvalue()
+
+
+def get_tree(obj):
+    fields = {}
+    for item in SK2_Saver().get_fields(obj):
+        if item == 'bitmap':
+            fields[item] = obj.handler.bitmap.tobytes()
+        elif item == 'alpha_channel':
+            fields[item] = obj.handler.alpha.tobytes()
+        else:
+            fields[item] = obj.__dict__[item]
+    return obj.cid, fields, [get_tree(child) for child in obj.childs]
+
+
+class SK2BinaryTest(unittest.TestCase):
+
+    def setUp(self):
+        if sk2_model is None:
+            self.skipTest('SK2 model is not available')
+        self.path = tempfile.mkdtemp('.sk2')
+        self.app = UCApplication(os.path.dirname(uc2.__file__),
+                                 os.path.join(self.path, 'cfg'))
+        self.app.default_cms = app_cms.AppColorManager(self.app)
+        self.doc = self.make_doc()
+        self.docs = [self.doc]
+
+    def tearDown(self):
+        for doc in self.docs:
+            doc.close()
+        shutil.rmtree(self.path)
+
+    def make_doc(self):
+        doc = SK2_Presenter(self.app.appdata)
+        config = doc.model.config
+        layer = doc.methods.get_layer(doc.methods.get_page())
+        fill = [sk2const.FILL_EVENODD, sk2const.FILL_SOLID, RED]
+        stroke = [sk2const.STROKE_MIDDLE, 0.5, BLUE, [3, 1], 1, 0, 5.0,
+                  0, 1, []]
+        layer.childs.append(sk2_model.Rectangle(
+            config, layer, [10.0, 20.0, 100.0, 50.0],
+            style=[fill, stroke, [], []], corners=[0.5, 0.0, 0.5, 0.0]))
+        group = sk2_model.Group(config, layer)
+        group.childs.append(sk2_model.Curve(
+            config, group, [[[0.0, 0.0], [[10.0, 10.0],
+                            [[20.0, 0.0], [30.0, 10.0], [40.0, 0.0], 1]], 1]],
+            [1.0, 0.0, 0.0, 2.0, 5.0, -5.0], [[], stroke, [], []]))
+        group.childs.append(sk2_model.Pixmap(
+            config, group, get_image_str('RGB', (4, 3), (255, 0, 0)),
+            get_image_str('L', (4, 3), 128)))
+        layer.childs.append(group)
+        doc.model.styles['Blue'] = [[], stroke, [], []]
+        doc.update()
+        return doc
+
+    def save_and_load(self, binary):
+        filename = os.path.join(self.path, 'doc%d.sk2' % binary)
+        sk2_saver(self.doc, filename, binary=binary)
+        doc = sk2_loader(self.app.appdata, filename)
+        self.docs.append(doc)
+        with open(filename, 'rb') as fileptr:
+            header = fileptr.readline()
+        return doc, header
+
+    def test_round_trip(self):
+        text_doc, text_header = self.save_and_load(False)
+        bin_doc, bin_header = self.save_and_load(True)
+        self.assertFalse(text_header.startswith(sk2const.SK2BIN_ID))
+        self.assertTrue(bin_header.startswith(sk2const.SK2BIN_ID))
+
+        tree = get_tree(self.doc.model)
+        self.assertEqual(get_tree(text_doc.model), tree)
+        self.assertEqual(get_tree(bin_doc.model), tree)
+        self.assertEqual(bin_doc.model.styles, text_doc.model.styles)
+        self.assertEqual(bin_doc.model.styles['Blue'],
+                         self.doc.model.styles['Blue'])
+
+    def test_binary_resave(self):
+        bin_doc = self.save_and_load(True)[0]
+        self.doc = bin_doc
+        self.assertEqual(get_tree(self.save_and_load(True)[0].model),
+                         get_tree(bin_doc.model))
+
+
+if __name__ == '__main__':
+    unittest.main()